@@ -0,0 +1,327 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from typing import List, Optional
+
+"""
+End-to-end benchmarks of the analyze and evaluate pipelines against stubbed judges.
+
+Builds a synthetic manifest of the requested size, then runs each pipeline in a fresh
+interpreter so peak memory is measured per pipeline. Analysis requests go to the local mock
+Ollama server; evaluations go to stub experiments that wait out a sampled judge latency.
+Reports throughput, per-unit latency percentiles, peak RSS and startup time as JSON, so runs
+can be compared across commits. Run from the repository root:
+
+    python -m benchmarks.pipeline --documents 50 --analyses 4 --experiments 3 --output bench.json
+"""
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PIPELINES = ["analyze", "evaluate"]
+NOTICE_PARAGRAPH = (
+    "Your CalFresh benefits have been approved. You will receive {amount} dollars each month "
+    "starting {month} 1. You must complete your periodic report by {month} 10 or your benefits "
+    "may stop. Call the county office within 10 days if any of this information is wrong."
+)
+MONTHS = ["January", "March", "June", "September"]
+
+
+def build_manifest(documents: int, analyses: int, paragraphs: int, seed: int):
+    """
+    Builds a manifest of synthetic notices, each with the given number of analyses.
+    """
+    from eval_eval.schema import Analysis, AnalysisQuestion, Document, Manifest
+
+    rng = random.Random(seed)
+    manifest = Manifest(documents=[])
+    for document_index in range(documents):
+        text = "\n\n".join(
+            NOTICE_PARAGRAPH.format(
+                amount=rng.randint(20, 900), month=rng.choice(MONTHS)
+            )
+            for _ in range(paragraphs)
+        )
+        document = Document(path=f"synthetic/notice_{document_index}.txt", text=text)
+        for analysis_index in range(analyses):
+            document.notice_analysis.append(
+                Analysis(
+                    summary=f"Benefits were approved for notice {document_index}.",
+                    questions=[
+                        AnalysisQuestion(
+                            question=f"Question {question_index + 1}",
+                            answer=f"Answer {question_index + 1} for analysis {analysis_index}.",
+                        )
+                        for question_index in range(4)
+                    ],
+                    llm_model_name="synthetic",
+                    prompt_name=f"prompt_{analysis_index}",
+                )
+            )
+        manifest.documents.append(document)
+    return manifest
+
+
+def build_stub_experiments(count: int, latency: str, seed: int) -> list:
+    """
+    Builds experiments whose judges take a sampled latency and return a result per part.
+    """
+    from eval_eval.evaluation import MetricExperimentBase
+    from eval_eval.mock_server import parse_latency
+    from eval_eval.schema import EvaluationResult
+
+    sample = parse_latency(latency)
+    rng = random.Random(seed)
+
+    def make(metric_name: str) -> type:
+        async def a_run_eval(analysis, notice_text, notice_path):
+            await asyncio.sleep(sample(rng))
+            return [
+                EvaluationResult(
+                    metric_name=metric_name, score=1.0, related_analysis=part
+                )
+                for part in ["summary"] + [item.question for item in analysis.questions]
+            ]
+
+        def run_eval(analysis, notice_text, notice_path):
+            return asyncio.run(a_run_eval(analysis, notice_text, notice_path))
+
+        return type(
+            f"StubJudgeExperiment{metric_name}",
+            (MetricExperimentBase,),
+            {
+                "METRIC_NAME": metric_name,
+                "JUDGE_MODEL": "stub",
+                "run_eval": staticmethod(run_eval),
+                "a_run_eval": staticmethod(a_run_eval),
+            },
+        )
+
+    return [make(f"stub_judge_{i}") for i in range(count)]
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    if len(values) == 0:
+        return None
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))], 4)
+
+
+def summarize(units: int, seconds: float, latencies: List[float]) -> dict:
+    return {
+        "units": units,
+        "seconds": round(seconds, 4),
+        "units_per_second": round(units / seconds, 2) if seconds > 0 else None,
+        "p50_seconds": percentile(latencies, 0.5),
+        "p95_seconds": percentile(latencies, 0.95),
+        # ru_maxrss is in kilobytes on Linux and bytes on macOS.
+        "peak_rss_mb": round(
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            / (1024 * 1024 if sys.platform == "darwin" else 1024),
+            1,
+        ),
+    }
+
+
+def run_analyze(args: argparse.Namespace) -> dict:
+    import ollama
+
+    from eval_eval.analysis import a_generate_analysis_from_manifest
+    from eval_eval.mock_server import MockLLMServer
+
+    manifest = build_manifest(args.documents, 0, args.paragraphs, args.seed)
+    latencies = []
+
+    class TimedClient(ollama.AsyncClient):
+        async def generate(self, *generate_args, **generate_kwargs):
+            # Requests without a prompt only load or unload a model.
+            if not generate_kwargs.get("prompt"):
+                return await super().generate(*generate_args, **generate_kwargs)
+            start = time.perf_counter()
+            try:
+                return await super().generate(*generate_args, **generate_kwargs)
+            finally:
+                latencies.append(time.perf_counter() - start)
+
+    with MockLLMServer(port=0, latency=args.judge_latency, seed=args.seed) as server:
+        start = time.perf_counter()
+        asyncio.run(
+            a_generate_analysis_from_manifest(
+                manifest,
+                args.models.split(","),
+                args.concurrency or 2,
+                TimedClient(host=server.url),
+            )
+        )
+        seconds = time.perf_counter() - start
+    return summarize(len(latencies), seconds, latencies)
+
+
+def run_evaluate(args: argparse.Namespace) -> dict:
+    from eval_eval.evaluation import run_experiments_from_manifest
+
+    manifest = build_manifest(args.documents, args.analyses, args.paragraphs, args.seed)
+    experiment_classes = build_stub_experiments(
+        args.experiments, args.judge_latency, args.seed
+    )
+    start = time.perf_counter()
+    run_experiments_from_manifest(
+        manifest,
+        [],
+        experiment_classes=experiment_classes,
+        concurrency=args.concurrency,
+    )
+    seconds = time.perf_counter() - start
+    # A unit's duration is split across its results, so add them back up.
+    latencies = []
+    for document in manifest.documents:
+        for analysis in document.notice_analysis:
+            unit_durations = {}
+            for result in analysis.evaluation_results:
+                unit_durations[result.metric_name] = (
+                    unit_durations.get(result.metric_name, 0) + result.duration
+                )
+            latencies.extend(unit_durations.values())
+    return summarize(len(latencies), seconds, latencies)
+
+
+def time_startup(runs: int) -> dict:
+    """
+    Times importing main.py in fresh interpreters, which is what every CLI run pays first.
+    """
+    durations = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "-c", "import main"],
+            cwd=REPO_ROOT,
+            check=True,
+            capture_output=True,
+        )
+        durations.append(time.perf_counter() - start)
+    return {"median_seconds": round(statistics.median(durations), 4), "runs": runs}
+
+
+def run_child(args: argparse.Namespace, pipeline: str) -> dict:
+    """
+    Runs one pipeline in a fresh interpreter and reads back its JSON report.
+    """
+    command = [sys.executable, "-m", "benchmarks.pipeline", "--stage", pipeline]
+    for name in [
+        "documents",
+        "analyses",
+        "experiments",
+        "paragraphs",
+        "judge_latency",
+        "models",
+        "seed",
+    ]:
+        command += [f"--{name}", str(getattr(args, name))]
+    if args.concurrency is not None:
+        command += ["--concurrency", str(args.concurrency)]
+    process = subprocess.run(
+        command, cwd=REPO_ROOT, check=True, capture_output=True, text=True
+    )
+    return json.loads(process.stdout.strip().splitlines()[-1])
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=REPO_ROOT,
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def get_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--documents", type=int, default=20, help="The number of synthetic documents."
+    )
+    parser.add_argument(
+        "--analyses", type=int, default=4, help="Analyses per document when evaluating."
+    )
+    parser.add_argument(
+        "--experiments", type=int, default=3, help="Stub experiments to evaluate with."
+    )
+    parser.add_argument(
+        "--paragraphs", type=int, default=8, help="Paragraphs per synthetic notice."
+    )
+    parser.add_argument(
+        "--judge_latency",
+        type=str,
+        default="lognormal:0.05,0.5",
+        help="Stub judge latency, in the mock server's distribution format.",
+    )
+    parser.add_argument(
+        "--models",
+        type=str,
+        default="llama3.1:8b,qwen3:8b",
+        help="Comma separated analysis models.",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        help="Passed to the pipelines. Defaults to their own defaults.",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--pipelines",
+        type=str,
+        default=",".join(PIPELINES),
+        help="Comma separated pipelines to run.",
+    )
+    parser.add_argument(
+        "--startup_runs",
+        type=int,
+        default=5,
+        help="Fresh interpreters to time startup over.",
+    )
+    parser.add_argument(
+        "--output", type=str, help="Where to write the JSON report. Defaults to stdout."
+    )
+    parser.add_argument("--stage", type=str, choices=PIPELINES, help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = get_args()
+    if args.stage is not None:
+        # Keep the report the last line of stdout, whatever the pipeline logs.
+        report = run_analyze(args) if args.stage == "analyze" else run_evaluate(args)
+        print(json.dumps(report))
+        sys.exit(0)
+    results = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "config": {
+            "documents": args.documents,
+            "analyses": args.analyses,
+            "experiments": args.experiments,
+            "paragraphs": args.paragraphs,
+            "judge_latency": args.judge_latency,
+            "models": args.models,
+            "concurrency": args.concurrency,
+            "seed": args.seed,
+        },
+        "startup": time_startup(args.startup_runs),
+    }
+    for pipeline in args.pipelines.split(","):
+        results[pipeline] = run_child(args, pipeline)
+    output = json.dumps(results, indent=2)
+    if args.output is not None:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
@@ -0,0 +1,69 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+"""
+Benchmarks how long selecting experiments takes in a fresh interpreter.
+
+Compares importing every experiment module, as an unfiltered run does, with importing only
+the module that defines one metric. Run from the repository root:
+
+    python benchmarks/startup.py --metrics=opik_eval_hallucination
+"""
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SELECT_ALL = (
+    "from eval_eval.evaluation import select_experiments; select_experiments([])"
+)
+SELECT_METRICS = "from eval_eval.evaluation import select_experiments; select_experiments({metrics!r})"
+
+
+def time_startup(code: str, runs: int) -> list:
+    """
+    Times a snippet in fresh interpreters, so no module is already imported.
+    """
+    durations = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "-c", code], cwd=REPO_ROOT, check=True, capture_output=True
+        )
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def report(name: str, durations: list) -> None:
+    print(
+        f"{name}: median {statistics.median(durations):.2f}s, "
+        f"min {min(durations):.2f}s, max {max(durations):.2f}s over {len(durations)} runs"
+    )
+
+
+def get_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--metrics",
+        type=str,
+        default="opik_eval_hallucination",
+        help="A comma separated list of metric names to select.",
+    )
+    parser.add_argument(
+        "--runs", type=int, default=5, help="How many times to time each case."
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = get_args()
+    metrics = args.metrics.split(",")
+    all_durations = time_startup(SELECT_ALL, args.runs)
+    selected_durations = time_startup(SELECT_METRICS.format(metrics=metrics), args.runs)
+    report("All experiments", all_durations)
+    report(f"Only {args.metrics}", selected_durations)
+    print(
+        f"Speedup: {statistics.median(all_durations) / statistics.median(selected_durations):.1f}x"
+    )
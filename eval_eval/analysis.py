@@ -1,56 +1,294 @@
 import asyncio
+from typing import Iterable, Iterator, List
 
 import ollama
+from pydantic import ValidationError
 
+from eval_eval.dedup import NoticeIndex
 from eval_eval.logger import logger
-from eval_eval.prompts.analysis import prompt_1, prompt_2
+from eval_eval.prompts.analysis import prompt_1_v2, prompt_2_v2
+from eval_eval.residency import ModelResidency
 from eval_eval.schema import Analysis, Document, Manifest
+from eval_eval.streaming import StreamingJSONValidator, StreamViolation
 
 """
 Utilities for running LLM-based analysis on the notice documents.
 """
 
-BATCH_SIZE = 2
+# The default number of analysis requests in flight for each model.
+DEFAULT_CONCURRENCY = 2
+# Attempts at a streamed analysis before giving up on it.
+STREAM_ATTEMPTS = 3
 
 
-def generate_analysis_from_manifest(manifest: Manifest, models: list) -> Manifest:
+def generate_analysis_from_manifest(
+    manifest: Manifest,
+    models: list,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    reuse_prefix: bool = False,
+    stream: bool = False,
+    dedupe: bool = False,
+    near_duplicates: bool = False,
+) -> Manifest:
+    """
+    Analyzes every document of a manifest in place.
+
+    With dedupe, only the first document with each notice is analyzed, and later documents
+    with the same notice get copies of its analyses. With near_duplicates as well, notices
+    that differ only slightly, such as in names and dates, count as the same.
+    """
     logger.info(
-        f"Beginning analysis of {len(manifest.documents)} documents with batch size {BATCH_SIZE}"
+        f"Beginning analysis of {len(manifest.documents)} documents with concurrency {concurrency} per model"
     )
-    manifest_with_analysis = asyncio.run(
-        a_generate_analysis_from_manifest(manifest, models)
+    index = NoticeIndex(near_duplicates) if dedupe else None
+    documents, duplicates = manifest.documents, []
+    if index is not None:
+        documents, duplicates = index.split(manifest.documents)
+    asyncio.run(
+        a_generate_analysis_from_manifest(
+            Manifest(documents=documents),
+            models,
+            concurrency,
+            reuse_prefix=reuse_prefix,
+            stream=stream,
+        )
     )
+    if index is not None:
+        for entry, document in duplicates:
+            index.fan_out(entry, document)
+        index.log()
     logger.info("Analysis complete!")
-    return manifest_with_analysis
+    return manifest
+
+
+def analyze_documents(
+    documents: Iterable[Document],
+    models: list,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    reuse_prefix: bool = False,
+    stream: bool = False,
+    dedupe: bool = False,
+    near_duplicates: bool = False,
+) -> Iterator[Document]:
+    """
+    Analyzes documents one at a time as they are pulled from the iterable, for streamed manifests.
+
+    Every document runs on the same event loop and Ollama client so connections stay warm.
+    Models stay pinned across documents and are released once the stream ends. With dedupe,
+    documents with the notice of an earlier one get copies of its analyses instead, so memory
+    grows with the number of unique notices.
+    """
+    index = NoticeIndex(near_duplicates) if dedupe else None
+    client = ollama.AsyncClient()
+    residency = ModelResidency(client)
+    with asyncio.Runner() as runner:
+        runner.run(residency.discover())
+        try:
+            for document in documents:
+                entry = index.match(document) if index is not None else None
+                if entry is not None:
+                    index.fan_out(entry, document)
+                else:
+                    runner.run(
+                        a_generate_analysis_from_manifest(
+                            Manifest(documents=[document]),
+                            models,
+                            concurrency,
+                            client,
+                            residency,
+                            reuse_prefix,
+                            stream,
+                        )
+                    )
+                yield document
+        finally:
+            runner.run(residency.close())
+            if index is not None:
+                index.log()
+
+
+async def a_generate_analysis_from_manifest(
+    manifest: Manifest,
+    models: list,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    client: ollama.AsyncClient | None = None,
+    residency: ModelResidency | None = None,
+    reuse_prefix: bool = False,
+    stream: bool = False,
+) -> Manifest:
+    """
+    Generates analysis for every document, model and prompt.
 
+    Models are worked through one at a time, starting with any that are already loaded. Each
+    is warmed before its requests start and pinned until they finish, then released to make
+    room for the next. Each model's requests share a semaphore, so a new request starts as
+    soon as one of its slots frees up rather than waiting on a whole batch. Analyses are
+    attached in (model, prompt) order regardless of which request finishes first.
 
-async def a_generate_analysis_from_manifest(manifest: Manifest, models: list):
-    tasks = {model: [] for model in models}
-    for document in manifest.documents:
+    With reuse_prefix, a document's prompts are sent one after another from the same slot.
+    The prompts share the document as a prefix, so later prompts reuse the notice Ollama
+    encoded for the first instead of all of them encoding it at once.
+
+    With stream, responses are validated as they're generated and retried when they go
+    wrong. See generate_analysis.
+
+    When a residency is passed in, the caller owns it: models stay pinned after this call,
+    for the next documents of a stream.
+    """
+    if client is None:
+        client = ollama.AsyncClient()
+    owns_residency = residency is None
+    if owns_residency:
+        residency = ModelResidency(client)
+        await residency.discover()
+    analyses = {}
+    ordered_models = residency.order(models)
+    try:
+        for position, model_name in enumerate(ordered_models):
+            await residency.warm(model_name)
+            slots = asyncio.Semaphore(concurrency)
+            # Each sequence of prompts holds one slot and is sent in order.
+            if reuse_prefix:
+                sequences = [
+                    (document_index, [prompt_1_v2, prompt_2_v2])
+                    for document_index in range(len(manifest.documents))
+                ]
+            else:
+                sequences = [
+                    (document_index, [prompt])
+                    for document_index in range(len(manifest.documents))
+                    for prompt in (prompt_1_v2, prompt_2_v2)
+                ]
+            results = await asyncio.gather(
+                *(
+                    _generate_with_slot(
+                        slots,
+                        manifest.documents[document_index],
+                        model_name,
+                        prompts,
+                        client,
+                        residency,
+                        stream,
+                    )
+                    for document_index, prompts in sequences
+                )
+            )
+            for (document_index, prompts), sequence_analyses in zip(sequences, results):
+                for prompt, analysis in zip(prompts, sequence_analyses):
+                    analyses[(document_index, model_name, prompt)] = analysis
+            if owns_residency and position < len(ordered_models) - 1:
+                await residency.release(model_name)
+    finally:
+        # Failed runs also hand models back, so they aren't left pinned.
+        if owns_residency:
+            await residency.close()
+    for document_index, document in enumerate(manifest.documents):
         for model_name in models:
-            for prompt in (prompt_1, prompt_2):
-                tasks[model_name].append(
-                    attach_analysis_to_document(document, model_name, prompt)
+            for prompt in (prompt_1_v2, prompt_2_v2):
+                document.notice_analysis.append(
+                    analyses[(document_index, model_name, prompt)]
                 )
-    output = []
-    for model_tasks in tasks.values():
-        for i in range(0, len(model_tasks), BATCH_SIZE):
-            batch = model_tasks[i : i + BATCH_SIZE]
-            results = await asyncio.gather(*batch)
-            output.extend(results)
-    return Manifest(documents=output)
+    return manifest
 
 
-async def attach_analysis_to_document(
-    document: Document, model_name: str, prompt: callable
-) -> Document:
+async def _generate_with_slot(
+    slots: asyncio.Semaphore,
+    document: Document,
+    model_name: str,
+    prompts: List[callable],
+    client: ollama.AsyncClient,
+    residency: ModelResidency,
+    stream: bool,
+) -> List[Analysis]:
+    async with slots:
+        return [
+            await generate_analysis(
+                document, model_name, prompt, client, residency, stream
+            )
+            for prompt in prompts
+        ]
+
+
+async def generate_analysis(
+    document: Document,
+    model_name: str,
+    prompt: callable,
+    client: ollama.AsyncClient | None = None,
+    residency: ModelResidency | None = None,
+    stream: bool = False,
+) -> Analysis:
+    """
+    Generates one analysis of a document.
+
+    With stream, the response is checked against the Analysis schema as it's generated. A
+    response that breaks the schema or runs on is cut off at once, so the model stops
+    generating, and the request is retried, up to STREAM_ATTEMPTS attempts in all.
+    """
     logger.info(f"Analyzing {document.path} with {model_name} and {prompt.__name__}")
+    if client is None:
+        client = ollama.AsyncClient()
     prompt_text = prompt(document.text)
-    ret = await ollama.AsyncClient().generate(
-        model_name, prompt_text, format=Analysis.model_json_schema(), stream=False
-    )
-    analysis = Analysis.model_validate_json(ret.response)
+    if stream:
+        analysis = await _generate_streamed(client, model_name, prompt_text, residency)
+    else:
+        ret = await client.generate(
+            model=model_name,
+            prompt=prompt_text,
+            format=Analysis.model_json_schema(),
+            stream=False,
+            keep_alive=residency.keep_alive if residency is not None else None,
+        )
+        if residency is not None:
+            residency.record(model_name, ret)
+        analysis = Analysis.model_validate_json(ret.response)
     analysis.llm_model_name = model_name
     analysis.prompt_name = prompt.__name__
+    return analysis
+
+
+async def _generate_streamed(
+    client: ollama.AsyncClient,
+    model_name: str,
+    prompt_text: str,
+    residency: ModelResidency | None,
+) -> Analysis:
+    schema = Analysis.model_json_schema()
+    for attempt in range(1, STREAM_ATTEMPTS + 1):
+        validator = StreamingJSONValidator(schema)
+        parts = []
+        response = await client.generate(
+            model=model_name,
+            prompt=prompt_text,
+            format=schema,
+            stream=True,
+            keep_alive=residency.keep_alive if residency is not None else None,
+        )
+        try:
+            async for part in response:
+                validator.feed(part.response)
+                parts.append(part.response)
+                if part.done and residency is not None:
+                    residency.record(model_name, part)
+            return Analysis.model_validate_json("".join(parts))
+        except (StreamViolation, ValidationError) as e:
+            error = e
+            logger.warning(
+                f"Stopped {model_name} analysis after {validator.chars} characters on attempt {attempt} of {STREAM_ATTEMPTS}: {e}"
+            )
+            if residency is not None:
+                residency.record_abort(model_name)
+        finally:
+            # Closing the stream drops the connection, which stops Ollama generating.
+            await response.aclose()
+    raise error
+
+
+async def attach_analysis_to_document(
+    document: Document,
+    model_name: str,
+    prompt: callable,
+    client: ollama.AsyncClient | None = None,
+) -> Document:
+    analysis = await generate_analysis(document, model_name, prompt, client)
     document.notice_analysis.append(analysis)
     return document
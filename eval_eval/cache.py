@@ -0,0 +1,127 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from typing import List, Optional
+
+from eval_eval.logger import logger
+from eval_eval.schema import Analysis, EvaluationResult
+
+"""
+An on-disk cache of evaluation results so repeated runs only pay for judge calls whose inputs changed.
+"""
+
+DEFAULT_CACHE_PATH = ".eval_cache.sqlite"
+# Entries beyond this count are evicted least recently used first.
+DEFAULT_MAX_ENTRIES = 100_000
+# Entries older than this many seconds are evicted. Defaults to 30 days.
+DEFAULT_MAX_AGE = 30 * 24 * 60 * 60
+
+
+def cache_key(
+    metric_name: str, judge_model: str, notice_text: str, analysis: Analysis
+) -> str:
+    """
+    Hashes everything a judge sees when scoring an analysis.
+
+    Only the analysis content is included; its name fields and any previous evaluation
+    results don't change what the judge is asked.
+    """
+    analysis_text = analysis.model_dump_json(include={"summary", "questions"})
+    digest = hashlib.sha256()
+    for part in (metric_name, judge_model, notice_text, analysis_text):
+        digest.update(part.encode("utf-8"))
+        # Separate the parts so ("ab", "c") and ("a", "bc") hash differently.
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """
+    Stores lists of evaluation results in a local SQLite database keyed by cache_key.
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_CACHE_PATH,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        max_age: float = DEFAULT_MAX_AGE,
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS results (
+                key TEXT PRIMARY KEY,
+                metric_name TEXT NOT NULL,
+                results TEXT NOT NULL,
+                created REAL NOT NULL,
+                accessed REAL NOT NULL
+            )
+            """
+        )
+        self._connection.commit()
+        self.hits = 0
+        self.misses = 0
+        self.evict()
+
+    def get(self, key: str) -> Optional[List[EvaluationResult]]:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT results, created FROM results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or time.time() - row[1] > self.max_age:
+                self.misses += 1
+                return None
+            self._connection.execute(
+                "UPDATE results SET accessed = ? WHERE key = ?", (time.time(), key)
+            )
+            self._connection.commit()
+            self.hits += 1
+        return [
+            EvaluationResult.model_validate(result) for result in json.loads(row[0])
+        ]
+
+    def put(self, key: str, metric_name: str, results: List[EvaluationResult]) -> None:
+        now = time.time()
+        payload = json.dumps([result.model_dump() for result in results])
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)",
+                (key, metric_name, payload, now, now),
+            )
+            self._connection.commit()
+
+    def evict(self) -> None:
+        """
+        Removes expired entries and trims the cache to max_entries.
+        """
+        with self._lock:
+            expired = self._connection.execute(
+                "DELETE FROM results WHERE created < ?", (time.time() - self.max_age,)
+            ).rowcount
+            overflow = self._connection.execute(
+                """
+                DELETE FROM results WHERE key IN (
+                    SELECT key FROM results ORDER BY accessed DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_entries,),
+            ).rowcount
+            self._connection.commit()
+        if expired or overflow:
+            logger.info(
+                f"Evicted {expired} expired and {overflow} excess entries from {self.path}"
+            )
+
+    def close(self) -> None:
+        logger.info(
+            f"Result cache: {self.hits} hits, {self.misses} misses ({self.path})"
+        )
+        self.evict()
+        with self._lock:
+            self._connection.close()
@@ -0,0 +1,126 @@
+import json
+import os
+from typing import Dict, List
+
+from eval_eval.logger import logger
+from eval_eval.schema import Analysis, Document, EvaluationResult, Manifest
+
+"""
+Checkpointing for evaluation runs so a crashed run can resume where it stopped.
+"""
+
+
+def has_results(analysis: Analysis, metric_name: str) -> bool:
+    """
+    Checks whether an analysis already holds results from an experiment.
+
+    Experiments that report several sub-metrics name them "<METRIC_NAME>:<sub-metric>",
+    so those count as results for the experiment too.
+    """
+    for result in analysis.evaluation_results:
+        if result.metric_name == metric_name or result.metric_name.startswith(
+            f"{metric_name}:"
+        ):
+            return True
+    return False
+
+
+class Checkpoint:
+    """
+    An append-only JSONL file with one line per completed (document, analysis, experiment) unit.
+
+    Lines are flushed as soon as a unit finishes, so everything evaluated before a crash can
+    be restored onto a freshly hydrated manifest.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+        self._records = None
+
+    def append(
+        self,
+        document: Document,
+        analysis_index: int,
+        metric_name: str,
+        results: List[EvaluationResult],
+    ) -> None:
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+        analysis = document.notice_analysis[analysis_index]
+        record = {
+            "document": document.path,
+            "analysis": analysis_index,
+            "llm_model_name": analysis.llm_model_name,
+            "prompt_name": analysis.prompt_name,
+            "metric_name": metric_name,
+            "results": [result.model_dump() for result in results],
+        }
+        self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+
+    def restore(self, manifest: Manifest) -> int:
+        """
+        Attaches checkpointed results to the matching analyses in the manifest.
+
+        Records for analyses that already hold results for the metric are ignored. The
+        checkpoint file is read on first use, so restoring a streamed manifest one document
+        at a time doesn't re-read it.
+
+        Returns
+        -------
+        restored: int
+          The number of units restored.
+        """
+        if self._records is None:
+            self._records = self._load()
+        restored = 0
+        for document in manifest.documents:
+            for record in self._records.get(document.path, []):
+                if record["analysis"] >= len(document.notice_analysis):
+                    continue
+                analysis = document.notice_analysis[record["analysis"]]
+                if (
+                    analysis.llm_model_name != record["llm_model_name"]
+                    or analysis.prompt_name != record["prompt_name"]
+                    or has_results(analysis, record["metric_name"])
+                ):
+                    continue
+                analysis.evaluation_results.extend(
+                    EvaluationResult.model_validate(result)
+                    for result in record["results"]
+                )
+                restored += 1
+        if restored > 0:
+            logger.info(f"Restored {restored} evaluations from {self.path}")
+        return restored
+
+    def _load(self) -> Dict[str, List[dict]]:
+        """
+        Reads checkpoint records once, grouped by document path.
+        """
+        records = {}
+        if not os.path.exists(self.path):
+            return records
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line_number, line in enumerate(f, start=1):
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # The last line may be partial if the run died mid-write.
+                    logger.warning(
+                        f"Skipping unreadable line {line_number} of {self.path}"
+                    )
+                    continue
+                records.setdefault(record["document"], []).append(record)
+        return records
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def remove(self) -> None:
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -0,0 +1,193 @@
+import hashlib
+import random
+from typing import Dict, List, Optional, Tuple
+
+from eval_eval.logger import logger
+from eval_eval.preprocessing import normalize_whitespace
+from eval_eval.schema import Document
+from eval_eval.text import ngrams, tokens
+
+"""
+Deduplication of documents that share a notice.
+
+Manifests can hold many copies of the same notice, and many near copies of one template with
+only names and dates changed. NoticeIndex matches each document to the first one seen with the
+same notice, so analysis and evaluation run once per notice and the results are copied to the
+duplicates. Exact duplicates are matched by a hash of the notice with whitespace normalized.
+Near duplicates are optionally matched by MinHash, with locality-sensitive hashing to find
+candidates without comparing every pair.
+"""
+
+# Near duplicates must have an estimated Jaccard similarity of word shingles of at least this.
+NEAR_DUPLICATE_THRESHOLD = 0.85
+# Words per shingle. Short shingles keep a changed name or date from touching many of them.
+SHINGLE_WORDS = 3
+# MinHash signatures are split into bands of rows. Notices sharing any band are compared, which
+# finds nearly every pair above the threshold.
+BANDS = 16
+ROWS = 8
+# A Mersenne prime modulus for the hash permutations.
+_PRIME = (1 << 61) - 1
+_rng = random.Random(0)
+_PERMUTATIONS = [
+    (_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(BANDS * ROWS)
+]
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def minhash(text: str) -> Tuple[int, ...]:
+    """
+    The MinHash signature of a text's word shingles.
+    """
+    text_tokens = tokens(text)
+    shingles = {
+        int.from_bytes(
+            hashlib.blake2b(" ".join(shingle).encode("utf-8"), digest_size=8).digest(),
+            "big",
+        )
+        for shingle in ngrams(text_tokens, SHINGLE_WORDS) or [tuple(text_tokens)]
+    }
+    return tuple(
+        min((a * shingle + b) % _PRIME for shingle in shingles)
+        for a, b in _PERMUTATIONS
+    )
+
+
+def similarity(signature: Tuple[int, ...], other: Tuple[int, ...]) -> float:
+    """
+    Estimates the Jaccard similarity of the shingles behind two signatures.
+    """
+    return sum(a == b for a, b in zip(signature, other)) / len(signature)
+
+
+class _Entry:
+    """
+    A representative document and how many analyses it held before it was processed.
+    """
+
+    def __init__(self, document: Document, signature: Optional[Tuple[int, ...]]):
+        self.document = document
+        self.signature = signature
+        self.analysis_count = len(document.notice_analysis)
+
+
+class NoticeIndex:
+    """
+    Matches documents to the first document seen with the same notice.
+
+    With match_analyses, documents must also hold the same analyses to match, so evaluation
+    results can be copied analysis by analysis.
+    """
+
+    def __init__(
+        self,
+        near_duplicates: bool = False,
+        match_analyses: bool = False,
+        threshold: float = NEAR_DUPLICATE_THRESHOLD,
+    ):
+        self.near_duplicates = near_duplicates
+        self.match_analyses = match_analyses
+        self.threshold = threshold
+        self.documents = 0
+        self.exact_duplicates = 0
+        self.near_duplicate_count = 0
+        self._exact: Dict[str, _Entry] = {}
+        self._bands: Dict[Tuple[str, int, Tuple[int, ...]], List[_Entry]] = {}
+
+    def _analyses_key(self, document: Document) -> str:
+        if not self.match_analyses:
+            return ""
+        return _digest(
+            "\0".join(
+                analysis.model_dump_json(include={"summary", "questions"})
+                for analysis in document.notice_analysis
+            )
+        )
+
+    def match(self, document: Document) -> Optional[_Entry]:
+        """
+        Finds the representative of a document's notice.
+
+        Returns None when the document is the first with its notice, and it becomes the
+        representative that later duplicates are matched to.
+        """
+        self.documents += 1
+        text = normalize_whitespace(document.text)
+        analyses_key = self._analyses_key(document)
+        key = _digest(text) + analyses_key
+        entry = self._exact.get(key)
+        if entry is not None:
+            self.exact_duplicates += 1
+            return entry
+        signature = minhash(text) if self.near_duplicates else None
+        if signature is not None:
+            bands = [
+                (analyses_key, band, signature[band * ROWS : (band + 1) * ROWS])
+                for band in range(BANDS)
+            ]
+            candidates = {
+                id(candidate): candidate
+                for band in bands
+                for candidate in self._bands.get(band, [])
+            }
+            for candidate in candidates.values():
+                if similarity(signature, candidate.signature) >= self.threshold:
+                    self.near_duplicate_count += 1
+                    return candidate
+        entry = _Entry(document, signature)
+        self._exact[key] = entry
+        if signature is not None:
+            for band in bands:
+                self._bands.setdefault(band, []).append(entry)
+        return None
+
+    def fan_out(self, entry: _Entry, duplicate: Document) -> None:
+        """
+        Copies what the representative gained when it was processed to a duplicate.
+
+        Evaluation results are copied for every metric the duplicate has no results for. The
+        representative may have held results before it was processed, such as those restored
+        from a checkpoint when resuming, which the duplicate may not have. Copied results are
+        marked cached, so run totals count what they cost once.
+        """
+        representative = entry.document
+        for analysis in representative.notice_analysis[entry.analysis_count :]:
+            duplicate.notice_analysis.append(analysis.model_copy(deep=True))
+        if not self.match_analyses:
+            return
+        for analysis, duplicate_analysis in zip(
+            representative.notice_analysis, duplicate.notice_analysis
+        ):
+            held = {
+                result.metric_name for result in duplicate_analysis.evaluation_results
+            }
+            duplicate_analysis.evaluation_results.extend(
+                result.model_copy(deep=True, update={"cached": True})
+                for result in analysis.evaluation_results
+                if result.metric_name not in held
+            )
+
+    def split(self, documents: List[Document]) -> Tuple[List[Document], List[tuple]]:
+        """
+        Splits documents into representatives and (entry, duplicate) pairs to fan out later.
+        """
+        unique = []
+        duplicates = []
+        for document in documents:
+            entry = self.match(document)
+            if entry is None:
+                unique.append(document)
+            else:
+                duplicates.append((entry, document))
+        return unique, duplicates
+
+    def log(self) -> None:
+        duplicates = self.exact_duplicates + self.near_duplicate_count
+        ratio = duplicates / self.documents if self.documents > 0 else 0.0
+        logger.info(
+            f"Deduplicated {self.documents} documents to {self.documents - duplicates} unique notices "
+            f"({self.exact_duplicates} exact and {self.near_duplicate_count} near duplicates, dedup ratio {ratio:.1%})"
+        )
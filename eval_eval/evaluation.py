@@ -1,20 +1,112 @@
+import ast
+import asyncio
+import contextlib
+import contextvars
+import functools
 import inspect
+import multiprocessing
+import os
 import time
 from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from importlib import import_module
 from pathlib import Path
-from typing import List
+from typing import (
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
 
+from pydantic import BaseModel, TypeAdapter
+
+from eval_eval.cache import ResultCache, cache_key
+from eval_eval.checkpoint import Checkpoint, has_results
+from eval_eval.dedup import NoticeIndex
+from eval_eval.instrumentation import measure
+from eval_eval.judges import close_http_clients, close_loop_clients
 from eval_eval.logger import logger
-from eval_eval.schema import Analysis, EvaluationResult, Manifest
+from eval_eval.preprocessing import prepare_notice, set_context_chunks
+from eval_eval.sampling import (
+    DEFAULT_SAMPLE_TOLERANCE,
+    SAMPLE_ROUND,
+    combine_samples,
+    is_settled,
+)
+from eval_eval.schema import Analysis, Document, EvaluationResult, Manifest
 
 """
 Utilities for running evaluation experiments.
 """
 
+# The default number of (document, analysis, experiment) units evaluated at once.
+DEFAULT_CONCURRENCY = 4
+# Batch scopes an experiment can declare. See MetricExperimentBase.BATCH_SCOPE.
+BATCH_DOCUMENT = "document"
+BATCH_MANIFEST = "manifest"
+
+
+class EvaluationItem(NamedTuple):
+    """
+    The arguments for evaluating one analysis, as passed to run_eval_batch.
+    """
+
+    analysis: Analysis
+    notice_text: str
+    notice_path: str
+
+
+class IncompleteResults(list):
+    """
+    The results of an analysis that some of its parts are missing from.
+
+    Experiments return these when the judge failed on part of an analysis without raising,
+    for example when it scored a sample as NaN. The runner keeps the results in the output
+    but doesn't cache or checkpoint them, so the analysis is evaluated again next run.
+    """
+
+
+def is_complete(results: List[EvaluationResult]) -> bool:
+    """
+    Whether an analysis's results can be reused. Empty results never can.
+    """
+    return len(results) > 0 and not isinstance(results, IncompleteResults)
+
+
+def _as_list(
+    results: EvaluationResult | List[EvaluationResult],
+) -> List[EvaluationResult]:
+    return results if isinstance(results, list) else [results]
+
 
 class MetricExperimentBase(ABC):
     METRIC_NAME = ""
+    # Caps how many evaluations of this experiment may run at once, regardless of the
+    # runner's overall concurrency. Leave as None for no experiment-specific limit.
+    MAX_CONCURRENCY: Optional[int] = None
+    # The judge model behind the metric. It's part of the result cache key, so changing
+    # the judge invalidates cached results.
+    JUDGE_MODEL = ""
+    # Set to BATCH_DOCUMENT to have every analysis of a document scored by one
+    # run_eval_batch call, or BATCH_MANIFEST for one call covering the whole manifest.
+    # Leave as None to score analyses one at a time with run_eval.
+    BATCH_SCOPE: Optional[str] = None
+    # Set to False for experiments that only run when their metric is named with --metrics,
+    # such as experimental metrics whose scores aren't comparable with the rest of the suite.
+    DEFAULT_SUITE = True
+    # Set to True for local metrics that spend their time computing rather than waiting on a
+    # judge. Their analyses are scored on a process pool, one run_eval_batch call per
+    # document unless BATCH_SCOPE says otherwise, so they can use every core.
+    CPU_BOUND = False
+    # Set to True for LLM-judged metrics whose scores vary between calls. When a run asks for
+    # more than one sample, each analysis is scored repeatedly until its scores settle, and
+    # the results hold the mean score. Only applies to experiments without a BATCH_SCOPE.
+    SAMPLEABLE = False
 
     @staticmethod
     @abstractmethod
@@ -23,28 +115,115 @@ class MetricExperimentBase(ABC):
     ) -> EvaluationResult | List[EvaluationResult]:
         pass
 
+    @classmethod
+    async def a_run_eval(
+        cls, analysis: Analysis, notice_text: str, notice_path: str
+    ) -> EvaluationResult | List[EvaluationResult]:
+        """
+        Coroutine version of run_eval, which is what the runner calls.
+
+        By default it calls run_eval on one of the runner's worker threads. Experiments
+        whose judges have async clients should override this so their calls overlap on
+        the runner's event loop instead.
+        """
+        return await asyncio.to_thread(cls.run_eval, analysis, notice_text, notice_path)
+
+    @classmethod
+    def run_eval_batch(
+        cls, items: List[EvaluationItem]
+    ) -> List[EvaluationResult | List[EvaluationResult]]:
+        """
+        Scores several analyses in one pass. Called instead of run_eval when BATCH_SCOPE is set.
+
+        Experiments override this to share work across items, for example by sending a
+        notice to the judge once for all of its analyses. The default scores each item with
+        run_eval.
+
+        Returns
+        -------
+        results: list
+          The results for each item, in the same order as the items. Items with missing
+          parts should be returned as IncompleteResults.
+        """
+        return [
+            cls.run_eval(item.analysis, item.notice_text, item.notice_path)
+            for item in items
+        ]
 
-def get_experiments(experiment_dir: str) -> List[MetricExperimentBase]:
+
+def get_experiment_modules(experiment_dir: str) -> List[str]:
+    return [
+        f.stem
+        for f in sorted(Path(experiment_dir).glob(f"*.py"))
+        if (not f.stem.startswith("_")) and (f.stem not in globals())
+    ]
+
+
+def get_experiments(
+    experiment_dir: str, module_names: Optional[Iterable[str]] = None
+) -> List[MetricExperimentBase]:
+    """
+    Imports experiment modules and collects their experiment classes.
+
+    Imports every module in the directory unless module_names picks some of them.
+    """
+    if module_names is None:
+        module_names = get_experiment_modules(experiment_dir)
     experiments: List[MetricExperimentBase] = []
-    for f in Path(experiment_dir).glob(f"*.py"):
-        module_name = f.stem
-        if (not module_name.startswith("_")) and (module_name not in globals()):
-            module = import_module(f"{experiment_dir}.{module_name}")
-            for name, obj in inspect.getmembers(module):
+    for module_name in module_names:
+        module = import_module(f"{experiment_dir}.{module_name}")
+        for name, obj in inspect.getmembers(module):
+            if (
+                inspect.isclass(obj)
+                and issubclass(obj, MetricExperimentBase)
+                and obj != MetricExperimentBase
+                and obj not in experiments
+            ):
+                experiments.append(obj)
+    return experiments
+
+
+def index_experiments(experiment_dir: str) -> Dict[str, str]:
+    """
+    Maps each METRIC_NAME in the experiment modules to the module defining it, without
+    importing them.
+
+    Experiment modules import heavy evaluation frameworks, so reading class definitions from
+    source lets a run import only the modules for the metrics it needs. Only metric names
+    assigned as string literals in a class body are indexed.
+    """
+    index = {}
+    for module_name in get_experiment_modules(experiment_dir):
+        path = Path(experiment_dir) / f"{module_name}.py"
+        tree = ast.parse(path.read_text(encoding="utf-8"), filename=str(path))
+        for node in tree.body:
+            if not isinstance(node, ast.ClassDef):
+                continue
+            for statement in node.body:
                 if (
-                    inspect.isclass(obj)
-                    and issubclass(obj, MetricExperimentBase)
-                    and obj != MetricExperimentBase
+                    isinstance(statement, ast.Assign)
+                    and any(
+                        isinstance(target, ast.Name) and target.id == "METRIC_NAME"
+                        for target in statement.targets
+                    )
+                    and isinstance(statement.value, ast.Constant)
+                    and isinstance(statement.value.value, str)
                 ):
-                    experiments.append(obj)
-    return experiments
+                    index.setdefault(statement.value.value, module_name)
+    return index
 
 
-def run_experiments_from_manifest(
-    hydrated_manifest: Manifest, metrics: list, **kwargs
-) -> Manifest:
-    experiment_classes = get_experiments(kwargs.get("experiment_path", "experiments"))
+def select_experiments(
+    metrics: list, experiment_path: str = "experiments"
+) -> List[MetricExperimentBase]:
     if len(metrics) > 0:
+        index = index_experiments(experiment_path)
+        if all(metric in index for metric in metrics):
+            module_names = dict.fromkeys(index[metric] for metric in metrics)
+            experiment_classes = get_experiments(experiment_path, module_names)
+        else:
+            # A metric name the index can't see may still be defined dynamically.
+            experiment_classes = get_experiments(experiment_path)
         filtered_experiment_classes = []
         for metric in metrics:
             experiment_class = next(
@@ -56,20 +235,548 @@ def run_experiments_from_manifest(
                 )
             filtered_experiment_classes.append(experiment_class)
         experiment_classes = filtered_experiment_classes
-        logger.info(f"Evaluating metrics: {",".join(metrics)}")
+        logger.info(f"Evaluating metrics: {','.join(metrics)}")
     else:
+        experiment_classes = [
+            experiment
+            for experiment in get_experiments(experiment_path)
+            if experiment.DEFAULT_SUITE
+        ]
         logger.info(f"Evaluating metrics: All")
+    return experiment_classes
+
+
+def evaluate_documents(
+    documents: Iterable[Document], metrics: list, **kwargs
+) -> Iterator[Document]:
+    """
+    Evaluates documents one at a time as they are pulled from the iterable.
+
+    Each document is yielded once all of its analyses are evaluated, so a streamed
+    manifest never needs to be held in memory. Takes the same keyword arguments as
+    run_experiments_from_manifest. When deduplicating, the first document with each notice
+    and analyses is kept, so memory grows with the number of unique notices.
+    """
+    experiment_classes = select_experiments(
+        metrics, kwargs.get("experiment_path", "experiments")
+    )
+    options = _run_options(kwargs)
+    index = _notice_index(kwargs)
+    # One event loop serves the whole stream so judges' async connections stay warm, and
+    # one process pool so CPU-bound experiments don't start new workers for each document.
+    with (
+        asyncio.Runner() as runner,
+        _process_pool(experiment_classes, options["processes"]) as process_executor,
+    ):
+        try:
+            for document in documents:
+                entry = index.match(document) if index is not None else None
+                if entry is not None:
+                    index.fan_out(entry, document)
+                else:
+                    runner.run(
+                        a_run_experiments_from_manifest(
+                            Manifest(documents=[document]),
+                            experiment_classes,
+                            process_executor=process_executor,
+                            **options,
+                        )
+                    )
+                yield document
+        finally:
+            runner.run(close_loop_clients())
+            close_http_clients()
+        if index is not None:
+            index.log()
+
+
+def run_experiments_from_manifest(
+    hydrated_manifest: Manifest, metrics: list, **kwargs
+) -> Manifest:
+    """
+    Evaluates a manifest in place.
+
+    With dedupe, documents with the same notice and analyses as an earlier document are
+    not evaluated; they get copies of its results. With near_duplicates as well, notices
+    that differ only slightly, such as in names and dates, count as the same.
+    """
+    experiment_classes = kwargs.get("experiment_classes")
+    if experiment_classes is None:
+        experiment_classes = select_experiments(
+            metrics, kwargs.get("experiment_path", "experiments")
+        )
+    options = _run_options(kwargs)
+    index = _notice_index(kwargs)
+    documents, duplicates = hydrated_manifest.documents, []
+    if index is not None:
+        documents, duplicates = index.split(hydrated_manifest.documents)
+    with _process_pool(experiment_classes, options["processes"]) as process_executor:
+        try:
+            asyncio.run(
+                _closing_clients(
+                    a_run_experiments_from_manifest(
+                        Manifest(documents=documents),
+                        experiment_classes,
+                        process_executor=process_executor,
+                        **options,
+                    )
+                )
+            )
+        finally:
+            close_http_clients()
+    if index is not None:
+        for entry, document in duplicates:
+            index.fan_out(entry, document)
+        index.log()
+    return hydrated_manifest
+
+
+async def _closing_clients(run: Awaitable) -> None:
+    """
+    Awaits a run, then closes the pooled async clients of its event loop.
+    """
+    try:
+        await run
+    finally:
+        await close_loop_clients()
+
+
+def _notice_index(kwargs: dict) -> Optional[NoticeIndex]:
+    if not kwargs.get("dedupe", False):
+        return None
+    # Results can only be copied between documents whose analyses are the same.
+    return NoticeIndex(kwargs.get("near_duplicates", False), match_analyses=True)
+
+
+def _run_options(kwargs: dict) -> dict:
+    """
+    Picks the options for a_run_experiments_from_manifest out of run keyword arguments.
+    """
+    return {
+        "concurrency": kwargs.get("concurrency") or DEFAULT_CONCURRENCY,
+        "cache": kwargs.get("cache"),
+        "refresh_cache": kwargs.get("refresh_cache", False),
+        "checkpoint": kwargs.get("checkpoint"),
+        "resume": kwargs.get("resume", False),
+        "processes": kwargs.get("processes") or os.cpu_count() or 1,
+        "preprocess": kwargs.get("preprocess", False),
+        "context_chunks": kwargs.get("context_chunks"),
+        "samples": kwargs.get("samples") or 1,
+        "sample_tolerance": kwargs.get("sample_tolerance") or DEFAULT_SAMPLE_TOLERANCE,
+    }
+
+
+@contextlib.contextmanager
+def _process_pool(
+    experiment_classes: List[MetricExperimentBase], processes: int
+) -> Iterator[Optional[ProcessPoolExecutor]]:
+    """
+    Starts a process pool for the run's CPU-bound experiments, if it has any.
+
+    Workers are spawned rather than forked, since the runner's threads make forking unsafe,
+    and import the CPU-bound experiment modules once when they start.
+    """
+    module_names = sorted(
+        {
+            experiment.__module__
+            for experiment in experiment_classes
+            if experiment.CPU_BOUND
+        }
+    )
+    if len(module_names) == 0:
+        yield None
+        return
+    logger.info(f"Running CPU-bound experiments on {processes} processes")
+    with ProcessPoolExecutor(
+        max_workers=processes,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_import_modules,
+        initargs=(module_names,),
+    ) as executor:
+        yield executor
+
+
+def _import_modules(module_names: List[str]) -> None:
+    for module_name in module_names:
+        import_module(module_name)
+
+
+async def a_run_experiments_from_manifest(
+    hydrated_manifest: Manifest,
+    experiment_classes: List[MetricExperimentBase],
+    concurrency: int = DEFAULT_CONCURRENCY,
+    cache: Optional[ResultCache] = None,
+    refresh_cache: bool = False,
+    checkpoint: Optional[Checkpoint] = None,
+    resume: bool = False,
+    process_executor: Optional[ProcessPoolExecutor] = None,
+    processes: int = 1,
+    preprocess: bool = False,
+    context_chunks: Optional[int] = None,
+    samples: int = 1,
+    sample_tolerance: float = DEFAULT_SAMPLE_TOLERANCE,
+) -> Manifest:
+    """
+    Evaluates every (document, analysis, experiment) unit with bounded concurrency.
+
+    Experiments implementing a_run_eval run on the event loop; the rest run on a
+    thread pool of the same size. CPU-bound experiments run on the process executor
+    when one is given, with up to processes batches in flight. When a cache is provided,
+    units whose inputs were already judged reuse the stored results; refresh_cache
+    recomputes and overwrites them.
+    Completed units are appended to the checkpoint as they finish. With resume, units
+    whose analysis already holds results for the experiment are skipped.
+
+    With preprocess, judges get notice text with whitespace normalized and boilerplate
+    stripped. With context_chunks, analysis_contexts gives questions without context that
+    many of the notice chunks most relevant to them, in place of the whole notice.
+
+    With more than one sample, sampleable experiments score each analysis up to that many
+    times, stopping once the 95% confidence interval of every score is within sample_tolerance.
+    """
+    logger.info(f"Running evaluation with concurrency {concurrency}")
+    set_context_chunks(context_chunks)
+    units = []
+    skipped = 0
     for document in hydrated_manifest.documents:
-        for analysis in document.notice_analysis:
+        for analysis_index, analysis in enumerate(document.notice_analysis):
             for experiment in experiment_classes:
+                if resume and has_results(analysis, experiment.METRIC_NAME):
+                    skipped += 1
+                    continue
+                units.append((document, analysis_index, experiment))
+    if resume:
+        logger.info(
+            f"Resuming: skipping {skipped} completed evaluations, {len(units)} remaining"
+        )
+    groups = _group_units(units)
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        # run_eval runs on the default executor, so bound it to the run's concurrency.
+        asyncio.get_running_loop().set_default_executor(executor)
+        run = _EvaluationRun(
+            executor,
+            process_executor,
+            processes,
+            concurrency,
+            experiment_classes,
+            cache,
+            refresh_cache,
+            checkpoint,
+            preprocess,
+            context_chunks,
+            samples,
+            sample_tolerance,
+        )
+        group_results = await asyncio.gather(
+            *(run.run_units([units[i] for i in group]) for group in groups)
+        )
+    unit_results = [None] * len(units)
+    for group, results in zip(groups, group_results):
+        for i, result in zip(group, results):
+            unit_results[i] = result
+    for (document, analysis_index, experiment), results in zip(units, unit_results):
+        document.notice_analysis[analysis_index].evaluation_results.extend(results)
+    return hydrated_manifest
+
+
+def _group_units(units: List[tuple]) -> List[List[int]]:
+    """
+    Groups unit indexes into the batches they are evaluated in.
+
+    Units of experiments without a BATCH_SCOPE each get a batch of their own, except for
+    CPU-bound experiments, which are batched per document so each notice is sent to a
+    worker process once.
+    """
+    groups = {}
+    for i, (document, analysis_index, experiment) in enumerate(units):
+        if experiment.BATCH_SCOPE == BATCH_MANIFEST:
+            key = (experiment,)
+        elif experiment.BATCH_SCOPE == BATCH_DOCUMENT or experiment.CPU_BOUND:
+            key = (experiment, id(document))
+        else:
+            key = (experiment, id(document), analysis_index)
+        groups.setdefault(key, []).append(i)
+    return list(groups.values())
+
+
+class _EvaluationRun:
+    """
+    Shared state for scheduling the units of one evaluation run.
+    """
+
+    def __init__(
+        self,
+        executor: ThreadPoolExecutor,
+        process_executor: Optional[ProcessPoolExecutor],
+        processes: int,
+        concurrency: int,
+        experiment_classes: List[MetricExperimentBase],
+        cache: Optional[ResultCache],
+        refresh_cache: bool,
+        checkpoint: Optional[Checkpoint],
+        preprocess: bool,
+        context_chunks: Optional[int],
+        samples: int,
+        sample_tolerance: float,
+    ):
+        self.executor = executor
+        self.process_executor = process_executor
+        self.run_limit = asyncio.Semaphore(concurrency)
+        # CPU-bound batches don't hold judge slots; they're bounded by the process count.
+        self.process_limit = asyncio.Semaphore(processes)
+        self.experiment_limits = {
+            experiment: asyncio.Semaphore(experiment.MAX_CONCURRENCY)
+            for experiment in experiment_classes
+            if experiment.MAX_CONCURRENCY is not None
+        }
+        self.cache = cache
+        self.refresh_cache = refresh_cache
+        self.checkpoint = checkpoint
+        self.preprocess = preprocess
+        self.context_chunks = context_chunks
+        self.samples = samples
+        self.sample_tolerance = sample_tolerance
+
+    def notice_text(self, document: Document) -> str:
+        """
+        Gets the notice text judges are given for a document.
+        """
+        if self.preprocess:
+            return prepare_notice(document.text).text
+        return document.text
+
+    def is_sampled(self, experiment: MetricExperimentBase) -> bool:
+        return (
+            self.samples > 1
+            and experiment.SAMPLEABLE
+            and experiment.BATCH_SCOPE is None
+            and not experiment.CPU_BOUND
+        )
+
+    def judge_key(self, experiment: MetricExperimentBase) -> str:
+        """
+        Gets the judge part of an experiment's cache keys.
+
+        Sampled results are kept apart from single samples, and from those sampled differently.
+        Results judged against relevant chunks are kept apart from those judged against the
+        whole notice.
+        """
+        key = experiment.JUDGE_MODEL
+        if self.context_chunks:
+            key = f"{key}|context_chunks={self.context_chunks}"
+        if self.is_sampled(experiment):
+            key = f"{key}|samples={self.samples}|tolerance={self.sample_tolerance}"
+        return key
+
+    async def run_units(self, units: List[tuple]) -> List[List[EvaluationResult]]:
+        """
+        Evaluates a batch of units of one experiment, reusing cached results where possible.
+        """
+        results = [None] * len(units)
+        keys = [None] * len(units)
+        for i, (document, analysis_index, experiment) in enumerate(units):
+            if self.cache is None:
+                continue
+            analysis = document.notice_analysis[analysis_index]
+            keys[i] = cache_key(
+                experiment.METRIC_NAME,
+                self.judge_key(experiment),
+                self.notice_text(document),
+                analysis,
+            )
+            if not self.refresh_cache:
+                results[i] = self.cache.get(keys[i])
+            if results[i] is not None:
+                for result in results[i]:
+                    result.cached = True
                 logger.info(
-                    f"Beginning: {experiment.METRIC_NAME} evaluating analysis of {document.path} produced by {analysis.llm_model_name} with {analysis.prompt_name}"
+                    f"Cached: {experiment.METRIC_NAME} evaluating analysis of {document.path} produced by {analysis.llm_model_name} with {analysis.prompt_name}"
                 )
-                start = time.time()
-                results = experiment.run_eval(analysis, document.text, document.path)
-                duration = time.time() - start
-                if type(results) is not list:
-                    results = [results]
-                for result in results:
-                    result.duration = duration
-                analysis.evaluation_results.extend(results)
+        pending = [i for i, unit_results in enumerate(results) if unit_results is None]
+        if len(pending) > 0:
+            evaluated = await self._evaluate([units[i] for i in pending])
+            for i, unit_results in zip(pending, evaluated):
+                results[i] = unit_results
+                if not is_complete(unit_results):
+                    document, analysis_index, experiment = units[i]
+                    logger.warning(
+                        f"Incomplete: {experiment.METRIC_NAME} left parts of the analysis of {document.path} produced by {document.notice_analysis[analysis_index].llm_model_name} unscored, so it won't be cached or checkpointed"
+                    )
+                elif self.cache is not None:
+                    self.cache.put(keys[i], units[i][2].METRIC_NAME, unit_results)
+        if self.checkpoint is not None:
+            for (document, analysis_index, experiment), unit_results in zip(
+                units, results
+            ):
+                if not is_complete(unit_results):
+                    continue
+                self.checkpoint.append(
+                    document, analysis_index, experiment.METRIC_NAME, unit_results
+                )
+        return results
+
+    async def _evaluate(self, units: List[tuple]) -> List[List[EvaluationResult]]:
+        experiment = units[0][2]
+        queued = time.perf_counter()
+        # Wait on the experiment's own cap first so a throttled experiment doesn't hold
+        # run slots that other experiments could be using.
+        experiment_limit = self.experiment_limits.get(
+            experiment, contextlib.nullcontext()
+        )
+        in_process = experiment.CPU_BOUND and self.process_executor is not None
+        run_limit = self.process_limit if in_process else self.run_limit
+        async with experiment_limit:
+            async with run_limit:
+                queue_wait = time.perf_counter() - queued
+                with measure() as measurement:
+                    if in_process:
+                        logger.info(
+                            f"Beginning: {experiment.METRIC_NAME} evaluating {len(units)} analyses in a worker process"
+                        )
+                        batch_results = await self._run_in_process(experiment, units)
+                    elif experiment.BATCH_SCOPE is not None or experiment.CPU_BOUND:
+                        logger.info(
+                            f"Beginning: {experiment.METRIC_NAME} evaluating {len(units)} analyses in one batch"
+                        )
+                        items = [
+                            EvaluationItem(
+                                document.notice_analysis[analysis_index],
+                                self.notice_text(document),
+                                document.path,
+                            )
+                            for document, analysis_index, _ in units
+                        ]
+                        batch_results = await self._run_in_executor(
+                            experiment.run_eval_batch, items
+                        )
+                    else:
+                        document, analysis_index, _ = units[0]
+                        batch_results = [
+                            await self._evaluate_one(
+                                document,
+                                document.notice_analysis[analysis_index],
+                                experiment,
+                            )
+                        ]
+        unit_results = [_as_list(results) for results in batch_results]
+        flat_results = [result for results in unit_results for result in results]
+        # The batch waited once, so its results share the wait like they share the
+        # measurement, and run totals add up to the time actually spent queued.
+        for result in flat_results:
+            result.queue_wait = queue_wait / len(flat_results)
+        # Results the experiment didn't measure itself share the unit's measurement.
+        measurement.apply_shared(flat_results)
+        return unit_results
+
+    async def _evaluate_one(
+        self, document: Document, analysis: Analysis, experiment: MetricExperimentBase
+    ) -> EvaluationResult | List[EvaluationResult]:
+        logger.info(
+            f"Beginning: {experiment.METRIC_NAME} evaluating analysis of {document.path} produced by {analysis.llm_model_name} with {analysis.prompt_name}"
+        )
+        if self.is_sampled(experiment):
+            return await self._evaluate_sampled(document, analysis, experiment)
+        return await self._run_eval(document, analysis, experiment)
+
+    async def _evaluate_sampled(
+        self, document: Document, analysis: Analysis, experiment: MetricExperimentBase
+    ) -> List[EvaluationResult]:
+        """
+        Scores an analysis a round of concurrent samples at a time until its scores settle.
+        """
+        samples = []
+        while len(samples) < self.samples:
+            round_size = min(SAMPLE_ROUND, self.samples - len(samples))
+            round_results = await asyncio.gather(
+                *(
+                    self._run_eval(document, analysis, experiment)
+                    for _ in range(round_size)
+                )
+            )
+            samples.extend(_as_list(results) for results in round_results)
+            if is_settled(samples, self.sample_tolerance):
+                break
+        logger.info(
+            f"Sampled: {experiment.METRIC_NAME} scored analysis of {document.path} {len(samples)} times"
+        )
+        combined = combine_samples(samples)
+        # Positions no sample scored are dropped from the combined results.
+        if len(combined) < max(len(sample) for sample in samples) or any(
+            isinstance(sample, IncompleteResults) for sample in samples
+        ):
+            return IncompleteResults(combined)
+        return combined
+
+    async def _run_eval(
+        self, document: Document, analysis: Analysis, experiment: MetricExperimentBase
+    ) -> EvaluationResult | List[EvaluationResult]:
+        return await experiment.a_run_eval(
+            analysis, self.notice_text(document), document.path
+        )
+
+    async def _run_in_executor(self, func: Callable, *args):
+        # Copy the context so measurements active here see judge calls made on the thread.
+        context = contextvars.copy_context()
+        return await asyncio.get_running_loop().run_in_executor(
+            self.executor, functools.partial(context.run, func, *args)
+        )
+
+    async def _run_in_process(
+        self, experiment: MetricExperimentBase, units: List[tuple]
+    ) -> List[List[EvaluationResult]]:
+        # Each notice is serialized once per batch, however many of its analyses are scored.
+        batch = _ProcessBatch(
+            notices={
+                document.path: self.notice_text(document) for document, _, _ in units
+            },
+            notice_paths=[document.path for document, _, _ in units],
+            analyses=[
+                document.notice_analysis[analysis_index]
+                for document, analysis_index, _ in units
+            ],
+            context_chunks=self.context_chunks,
+        )
+        payload = await asyncio.get_running_loop().run_in_executor(
+            self.process_executor,
+            _run_batch_in_process,
+            experiment.__module__,
+            experiment.__name__,
+            batch.model_dump_json(),
+        )
+        return [
+            results if complete else IncompleteResults(results)
+            for results, complete in _BATCH_RESULTS.validate_json(payload)
+        ]
+
+
+class _ProcessBatch(BaseModel):
+    """
+    The analyses of a batch sent to a worker process, with each notice included once.
+    """
+
+    notices: Dict[str, str]
+    notice_paths: List[str]
+    analyses: List[Analysis]
+    context_chunks: Optional[int] = None
+
+
+# Each item's results, and whether they were complete, which a plain list can't carry.
+_BATCH_RESULTS = TypeAdapter(List[Tuple[List[EvaluationResult], bool]])
+
+
+def _run_batch_in_process(module_name: str, class_name: str, payload: str) -> bytes:
+    """
+    Scores a batch in a worker process. Runs at module level so the pool can pickle it.
+    """
+    experiment = getattr(import_module(module_name), class_name)
+    batch = _ProcessBatch.model_validate_json(payload)
+    set_context_chunks(batch.context_chunks)
+    items = [
+        EvaluationItem(analysis, batch.notices[notice_path], notice_path)
+        for analysis, notice_path in zip(batch.analyses, batch.notice_paths)
+    ]
+    batch_results = [
+        (results, not isinstance(results, IncompleteResults))
+        for results in map(_as_list, experiment.run_eval_batch(items))
+    ]
+    return _BATCH_RESULTS.dump_json(batch_results)
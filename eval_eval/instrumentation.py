@@ -0,0 +1,190 @@
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from eval_eval.logger import logger
+from eval_eval.schema import Document, EvaluationResult
+
+"""
+Instrumentation for where evaluation time and money go.
+
+The runner measures each evaluation unit, and experiments can measure each item they score.
+Judge calls, tokens and cost recorded while a measurement is active are added to it and to
+any measurement it's nested in, then copied onto the EvaluationResults it produced.
+"""
+
+
+class Measurement:
+    def __init__(self):
+        self.duration: Optional[float] = None
+        self.judge_calls = 0
+        self.prompt_tokens: Optional[int] = None
+        self.completion_tokens: Optional[int] = None
+        self.cost: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def add(
+        self,
+        judge_calls: int = 0,
+        prompt_tokens: Optional[int] = None,
+        completion_tokens: Optional[int] = None,
+        cost: Optional[float] = None,
+    ) -> None:
+        with self._lock:
+            self.judge_calls += judge_calls
+            if prompt_tokens is not None:
+                self.prompt_tokens = (self.prompt_tokens or 0) + prompt_tokens
+            if completion_tokens is not None:
+                self.completion_tokens = (
+                    self.completion_tokens or 0
+                ) + completion_tokens
+            if cost is not None:
+                self.cost = (self.cost or 0) + cost
+
+    def apply(self, result: EvaluationResult) -> EvaluationResult:
+        """
+        Records the measurement on a result.
+        """
+        result.duration = self.duration
+        result.judge_calls = self.judge_calls
+        result.prompt_tokens = self.prompt_tokens
+        result.completion_tokens = self.completion_tokens
+        result.cost = self.cost
+        return result
+
+    def apply_shared(self, results: List[EvaluationResult]) -> None:
+        """
+        Splits the measurement evenly across results that weren't measured individually.
+
+        Splitting keeps run totals correct when an experiment only reports on a whole unit.
+        """
+        unmeasured = [result for result in results if result.judge_calls is None]
+        if len(unmeasured) == 0:
+            return
+        share = len(unmeasured)
+        for i, result in enumerate(unmeasured):
+            result.duration = self.duration / share
+            result.judge_calls = _split(self.judge_calls, share, i)
+            if self.prompt_tokens is not None:
+                result.prompt_tokens = _split(self.prompt_tokens, share, i)
+            if self.completion_tokens is not None:
+                result.completion_tokens = _split(self.completion_tokens, share, i)
+            if self.cost is not None:
+                result.cost = self.cost / share
+
+
+def _split(total: int, share: int, i: int) -> int:
+    """
+    Splits a count into whole shares, giving the remainder to the first shares.
+    """
+    return total // share + (1 if i < total % share else 0)
+
+
+_active: ContextVar[Tuple[Measurement, ...]] = ContextVar(
+    "active_measurements", default=()
+)
+
+
+@contextmanager
+def measure() -> Iterator[Measurement]:
+    """
+    Measures the wall time and judge usage of the enclosed block.
+    """
+    measurement = Measurement()
+    token = _active.set(_active.get() + (measurement,))
+    start = time.perf_counter()
+    try:
+        yield measurement
+    finally:
+        measurement.duration = time.perf_counter() - start
+        _active.reset(token)
+
+
+def record_judge_calls(count: int = 1) -> None:
+    for measurement in _active.get():
+        measurement.add(judge_calls=count)
+
+
+def record_usage(
+    prompt_tokens: Optional[int] = None,
+    completion_tokens: Optional[int] = None,
+    cost: Optional[float] = None,
+) -> None:
+    """
+    Records token usage and cost reported by a judge framework.
+    """
+    for measurement in _active.get():
+        measurement.add(
+            prompt_tokens=prompt_tokens, completion_tokens=completion_tokens, cost=cost
+        )
+
+
+class RunSummary:
+    """
+    Totals instrumentation across a run, per metric.
+
+    Results a document already had before the run, from the input manifest or restored
+    from a checkpoint, are excluded so only this run's work is totalled.
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.metrics: Dict[str, Dict[str, float]] = {}
+        self.durations: Dict[str, List[float]] = {}
+        self._excluded: Set[int] = set()
+
+    def exclude(self, document: Document) -> None:
+        """
+        Excludes the results a document has now from the totals.
+        """
+        for analysis in document.notice_analysis:
+            for result in analysis.evaluation_results:
+                self._excluded.add(id(result))
+
+    def add(self, document: Document) -> None:
+        for analysis in document.notice_analysis:
+            for result in analysis.evaluation_results:
+                if id(result) not in self._excluded:
+                    self.add_result(result)
+
+    def add_result(self, result: EvaluationResult) -> None:
+        totals = self.metrics.setdefault(
+            result.metric_name,
+            {
+                "results": 0,
+                "cached": 0,
+                "queue_wait": 0.0,
+                "judge_calls": 0,
+                "prompt_tokens": 0,
+                "completion_tokens": 0,
+                "cost": 0.0,
+            },
+        )
+        totals["results"] += 1
+        # Cached results didn't cost anything this run.
+        if result.cached:
+            totals["cached"] += 1
+            return
+        if result.duration is not None:
+            self.durations.setdefault(result.metric_name, []).append(result.duration)
+        totals["queue_wait"] += result.queue_wait or 0
+        totals["judge_calls"] += result.judge_calls or 0
+        totals["prompt_tokens"] += result.prompt_tokens or 0
+        totals["completion_tokens"] += result.completion_tokens or 0
+        totals["cost"] += result.cost or 0
+
+    def log(self) -> None:
+        wall_time = time.perf_counter() - self.start
+        logger.info(f"Run summary ({wall_time:.1f}s wall time):")
+        for metric_name, totals in sorted(self.metrics.items()):
+            durations = sorted(self.durations.get(metric_name, []))
+            p50 = durations[len(durations) // 2] if durations else 0
+            logger.info(
+                f"  {metric_name}: {totals['results']} results ({totals['cached']} cached), "
+                f"{sum(durations):.1f}s judging (p50 {p50:.2f}s), "
+                f"{totals['queue_wait']:.1f}s queued, {totals['judge_calls']} judge calls, "
+                f"{totals['prompt_tokens']} prompt / {totals['completion_tokens']} completion tokens, "
+                f"${totals['cost']:.4f}"
+            )
@@ -0,0 +1,152 @@
+import asyncio
+import threading
+import weakref
+from typing import Any, Callable, Dict, Tuple
+
+import httpx
+
+from eval_eval.logger import logger
+
+"""
+A process-wide registry of long-lived judge clients shared by every experiment.
+
+Experiments register a factory for their provider once, then ask for judges by provider and
+model. Each judge is built on first use and reused for the rest of the process, so warm HTTP
+connections are shared across analyses instead of being rebuilt for every run_eval call.
+"""
+
+# Limits for the pooled HTTP clients handed to judge SDKs that accept one.
+HTTP_LIMITS = httpx.Limits(
+    max_connections=64, max_keepalive_connections=32, keepalive_expiry=120
+)
+HTTP_TIMEOUT = httpx.Timeout(600, connect=10)
+
+# Re-entrant so factories can ask for the pooled HTTP clients while a judge is being built.
+_lock = threading.RLock()
+_factories: Dict[str, Tuple[Callable[[str], Any], bool]] = {}
+_judges: Dict[Tuple[str, str], Any] = {}
+# Judges holding async connections are kept per event loop, since connections opened on one
+# loop can't be used from another.
+_loop_judges: (
+    "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Tuple[str, str], Any]]"
+) = weakref.WeakKeyDictionary()
+_http_client: httpx.Client | None = None
+_async_http_clients: (
+    "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]"
+) = weakref.WeakKeyDictionary()
+
+
+def register_judge_provider(
+    provider: str, factory: Callable[[str], Any], per_event_loop: bool = False
+) -> None:
+    """
+    Registers how to build judges for a provider.
+
+    Parameters
+    ----------
+    provider: str
+      The provider name judges are requested by.
+    factory: Callable[[str], Any]
+      Builds a judge for a model name.
+    per_event_loop: bool
+      Whether judges hold async connections and must be built once per event loop.
+    """
+    with _lock:
+        _factories[provider] = (factory, per_event_loop)
+
+
+def get_judge(provider: str, model: str) -> Any:
+    """
+    Gets the shared judge for a provider and model, building it on first use.
+    """
+    factory, per_event_loop = _factories.get(provider, (None, False))
+    if factory is None:
+        raise ValueError(f"No judge provider registered for {provider}")
+    judges = _judges
+    loop = _running_loop()
+    if per_event_loop and loop is not None:
+        with _lock:
+            judges = _loop_judges.setdefault(loop, {})
+    key = (provider, model)
+    judge = judges.get(key)
+    if judge is None:
+        with _lock:
+            judge = judges.get(key)
+            if judge is None:
+                logger.info(f"Building {provider} judge for {model}")
+                judge = factory(model)
+                judges[key] = judge
+    return judge
+
+
+def get_http_client() -> httpx.Client:
+    """
+    Gets the process-wide pooled HTTP client for judge SDKs that accept one.
+    """
+    global _http_client
+    with _lock:
+        if _http_client is None:
+            _http_client = httpx.Client(limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT)
+        return _http_client
+
+
+def get_async_http_client() -> httpx.AsyncClient | None:
+    """
+    Gets the pooled async HTTP client for the running event loop.
+
+    Returns None outside an event loop, leaving the SDK to manage its own async client.
+    """
+    loop = _running_loop()
+    if loop is None:
+        return None
+    with _lock:
+        client = _async_http_clients.get(loop)
+        if client is None:
+            client = httpx.AsyncClient(limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT)
+            _async_http_clients[loop] = client
+        return client
+
+
+def clear_judges() -> None:
+    """
+    Drops every cached judge so the next request builds a fresh one.
+    """
+    with _lock:
+        _judges.clear()
+        _loop_judges.clear()
+
+
+async def close_loop_clients() -> None:
+    """
+    Closes the running event loop's pooled async client and drops the judges built on it.
+
+    Runners call this before their event loop closes, since async connections can only be
+    closed on the loop that opened them.
+    """
+    loop = asyncio.get_running_loop()
+    with _lock:
+        client = _async_http_clients.pop(loop, None)
+        _loop_judges.pop(loop, None)
+    if client is not None:
+        await client.aclose()
+
+
+def close_http_clients() -> None:
+    """
+    Closes the pooled HTTP client and drops every judge, since judges may hold it.
+
+    Called when a run shuts down. A later request opens a new client.
+    """
+    global _http_client
+    with _lock:
+        client, _http_client = _http_client, None
+        clear_judges()
+    if client is not None:
+        client.close()
+
+
+def _running_loop() -> asyncio.AbstractEventLoop | None:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
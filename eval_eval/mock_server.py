@@ -0,0 +1,476 @@
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, List, Optional
+
+from eval_eval.logger import logger
+from eval_eval.schema import Analysis
+
+"""
+A local stand-in for the OpenAI chat completions and Ollama generate APIs.
+
+It serves deterministic canned responses after a configurable latency and fails a configurable
+share of requests, so the analyze and evaluate commands can be load tested and benchmarked
+offline without spending quota. Point clients at it with OPENAI_BASE_URL and OLLAMA_HOST:
+
+    python -m eval_eval.mock_server --port 8765 --latency lognormal:0.8,0.4 --error_rate 0.02
+    OPENAI_BASE_URL=http://localhost:8765/v1 OPENAI_API_KEY=mock OLLAMA_HOST=http://localhost:8765 \\
+        python main.py evaluate manifest_with_analysis.json --output_path results.json
+
+Responses to requests carrying a JSON schema (OpenAI's response_format, or Ollama's format) are
+filled from that schema. Ollama generate requests without one get an analysis that fits
+Analysis.model_json_schema(), since that's what the analyze command asks for. The same request
+always gets the same content.
+
+Ollama models are loaded on their first request, which waits out the load latency, and stay
+loaded until a request with a keep_alive of 0 unloads them. Requests without a prompt only
+load or unload their model, as in Ollama, and skip the response latency and errors.
+"""
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+# The models listed by the Ollama tags endpoint, so the analyze command's model check passes.
+DEFAULT_OLLAMA_MODELS = ["llama3.1:8b", "qwen3:8b"]
+# Status codes returned for failed requests. 429s carry a Retry-After header.
+ERROR_STATUSES = [429, 500, 503]
+OLLAMA_ROUTES = ["/api/generate", "/api/chat"]
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """
+    Parses a latency distribution in seconds.
+
+    Supported specs are "fixed:S", "uniform:LOW,HIGH", "normal:MEAN,STDEV" and
+    "lognormal:MEDIAN,SIGMA". Samples are never negative.
+    """
+    name, _, params = spec.partition(":")
+    values = [float(value) for value in params.split(",")] if params else []
+    if name == "fixed" and len(values) == 1:
+        return lambda rng: values[0]
+    if name == "uniform" and len(values) == 2:
+        return lambda rng: rng.uniform(values[0], values[1])
+    if name == "normal" and len(values) == 2:
+        return lambda rng: max(0.0, rng.gauss(values[0], values[1]))
+    if name == "lognormal" and len(values) == 2:
+        return lambda rng: values[0] * rng.lognormvariate(0, values[1])
+    raise ValueError(f"Unsupported latency distribution: {spec}")
+
+
+def fill_schema(schema: dict, rng: random.Random, defs: Optional[dict] = None) -> Any:
+    """
+    Builds a value that fits a JSON schema, choosing values from the random generator.
+    """
+    if defs is None:
+        defs = schema.get("$defs", schema.get("definitions", {}))
+    if "$ref" in schema:
+        return fill_schema(defs[schema["$ref"].split("/")[-1]], rng, defs)
+    if "const" in schema:
+        return schema["const"]
+    if "enum" in schema:
+        return rng.choice(schema["enum"])
+    for key in ("anyOf", "oneOf", "allOf"):
+        if key in schema:
+            options = [option for option in schema[key] if option.get("type") != "null"]
+            return fill_schema((options or schema[key])[0], rng, defs)
+    schema_type = schema.get("type", "object")
+    if isinstance(schema_type, list):
+        schema_type = next((t for t in schema_type if t != "null"), "null")
+    if schema_type == "object":
+        return {
+            name: fill_schema(property_schema, rng, defs)
+            for name, property_schema in schema.get("properties", {}).items()
+        }
+    if schema_type == "array":
+        low = schema.get("minItems", 1)
+        high = schema.get("maxItems", max(low, 3))
+        return [
+            fill_schema(schema.get("items", {}), rng, defs)
+            for _ in range(rng.randint(low, high))
+        ]
+    if schema_type == "string":
+        title = schema.get("title") or schema.get("description") or "text"
+        return f"Mock {title.lower()} {rng.randint(1000, 9999)}."
+    if schema_type == "integer":
+        return rng.randint(
+            int(schema.get("minimum", 0)), int(schema.get("maximum", 10))
+        )
+    if schema_type == "number":
+        return round(rng.uniform(schema.get("minimum", 0), schema.get("maximum", 1)), 3)
+    if schema_type == "boolean":
+        return rng.random() < 0.5
+    return None
+
+
+def _estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+class MockLLMServer:
+    """
+    A mock server running on a background thread, for use from benchmarks and scripts.
+    """
+
+    def __init__(
+        self,
+        host: str = DEFAULT_HOST,
+        port: int = DEFAULT_PORT,
+        latency: str = "fixed:0",
+        error_rate: float = 0.0,
+        seed: int = 0,
+        ollama_models: Optional[list] = None,
+        load_latency: str = "fixed:0",
+    ):
+        self.latency = parse_latency(latency)
+        self.load_latency = parse_latency(load_latency)
+        self.loaded_models: List[str] = []
+        self.error_rate = error_rate
+        self.ollama_models = ollama_models or DEFAULT_OLLAMA_MODELS
+        self.requests = 0
+        self.errors = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.httpd = ThreadingHTTPServer((host, port), _handler(self))
+        self.httpd.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "MockLLMServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self) -> "MockLLMServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def next_request(self) -> tuple:
+        """
+        Draws the latency and whether to fail for a request.
+
+        Draws come from one seeded generator, so a run with the same requests in the same
+        order sees the same latencies and failures.
+        """
+        with self._lock:
+            self.requests += 1
+            delay = self.latency(self._rng)
+            failed = self._rng.random() < self.error_rate
+            status = self._rng.choice(ERROR_STATUSES) if failed else 200
+            if failed:
+                self.errors += 1
+        return delay, status
+
+    def load(self, model: str, keep_alive: Any) -> float:
+        """
+        Loads or unloads an Ollama model for a request, returning the seconds spent loading.
+        """
+        with self._lock:
+            if keep_alive == 0 or keep_alive == "0":
+                if model in self.loaded_models:
+                    self.loaded_models.remove(model)
+                return 0.0
+            if model in self.loaded_models:
+                return 0.0
+            self.loaded_models.append(model)
+            delay = self.load_latency(self._rng)
+        time.sleep(delay)
+        return delay
+
+
+def _handler(server: MockLLMServer) -> type:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format: str, *args) -> None:
+            # A line per request would drown out the client's logs under load.
+            pass
+
+        def do_GET(self) -> None:
+            if self.path.rstrip("/") == "/api/tags":
+                self._send_json(
+                    200,
+                    {
+                        "models": [
+                            {"name": model, "model": model}
+                            for model in server.ollama_models
+                        ]
+                    },
+                )
+            elif self.path.rstrip("/") == "/api/ps":
+                self._send_json(
+                    200,
+                    {
+                        "models": [
+                            {"name": model, "model": model}
+                            for model in list(server.loaded_models)
+                        ]
+                    },
+                )
+            elif self.path.rstrip("/") == "/v1/models":
+                self._send_json(200, {"object": "list", "data": []})
+            else:
+                self._send_json(404, {"error": f"Unknown path {self.path}"})
+
+        def do_POST(self) -> None:
+            length = int(self.headers.get("Content-Length", 0))
+            raw_body = self.rfile.read(length)
+            try:
+                body = json.loads(raw_body or b"{}")
+            except json.JSONDecodeError:
+                self._send_json(400, {"error": "Request body is not JSON"})
+                return
+            routes = {
+                "/v1/chat/completions": self._chat_completion,
+                "/chat/completions": self._chat_completion,
+                "/api/generate": self._ollama_generate,
+                "/api/chat": self._ollama_chat,
+            }
+            route = routes.get(self.path.rstrip("/"))
+            if route is None:
+                self._send_json(404, {"error": f"Unknown path {self.path}"})
+                return
+            if self.path.rstrip("/") in OLLAMA_ROUTES:
+                self.load_seconds = server.load(
+                    body.get("model", "mock"), body.get("keep_alive")
+                )
+                if not body.get("prompt") and not body.get("messages"):
+                    self._ollama_load(body)
+                    return
+            delay, status = server.next_request()
+            self.delay = delay
+            time.sleep(delay)
+            if status != 200:
+                headers = {"Retry-After": "1"} if status == 429 else {}
+                self._send_json(
+                    status,
+                    {
+                        "error": {
+                            "message": f"Mock error {status}",
+                            "type": "mock_error",
+                            "code": status,
+                        }
+                    },
+                    headers,
+                )
+                return
+            # Seeding from the request makes the content the same for the same request.
+            rng = random.Random(hashlib.sha256(raw_body).hexdigest())
+            route(body, rng)
+
+        def _chat_completion(self, body: dict, rng: random.Random) -> None:
+            prompt = " ".join(
+                (
+                    message["content"]
+                    if isinstance(message.get("content"), str)
+                    else json.dumps(message.get("content"))
+                )
+                for message in body.get("messages", [])
+            )
+            response_format = body.get("response_format") or {}
+            schema = response_format.get("json_schema", {}).get("schema")
+            if schema is not None:
+                content = json.dumps(fill_schema(schema, rng))
+            elif response_format.get("type") == "json_object":
+                content = json.dumps(
+                    {"score": rng.randint(0, 10) / 10, "reason": "Mock reason."}
+                )
+            else:
+                content = f"Mock response {rng.randint(1000, 9999)}."
+            prompt_tokens = _estimate_tokens(prompt)
+            completion_tokens = _estimate_tokens(content)
+            self._send_json(
+                200,
+                {
+                    "id": f"chatcmpl-mock-{rng.randint(0, 10**9)}",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": body.get("model", "mock"),
+                    "choices": [
+                        {
+                            "index": 0,
+                            "message": {"role": "assistant", "content": content},
+                            "finish_reason": "stop",
+                            "logprobs": None,
+                        }
+                    ],
+                    "usage": {
+                        "prompt_tokens": prompt_tokens,
+                        "completion_tokens": completion_tokens,
+                        "total_tokens": prompt_tokens + completion_tokens,
+                    },
+                },
+            )
+
+        def _ollama_content(self, body: dict, rng: random.Random) -> str:
+            schema = body.get("format")
+            if not isinstance(schema, dict):
+                schema = Analysis.model_json_schema()
+            return json.dumps(fill_schema(schema, rng))
+
+        def _ollama_generate(self, body: dict, rng: random.Random) -> None:
+            content = self._ollama_content(body, rng)
+            self._send_ollama(
+                body, {"response": content}, body.get("prompt", ""), content
+            )
+
+        def _ollama_chat(self, body: dict, rng: random.Random) -> None:
+            content = self._ollama_content(body, rng)
+            prompt = " ".join(
+                message.get("content", "") for message in body.get("messages", [])
+            )
+            self._send_ollama(
+                body,
+                {"message": {"role": "assistant", "content": content}},
+                prompt,
+                content,
+            )
+
+        def _ollama_load(self, body: dict) -> None:
+            unload = body.get("keep_alive") in (0, "0")
+            self._send_json(
+                200,
+                {
+                    "model": body.get("model", "mock"),
+                    "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                    "response": "",
+                    "done": True,
+                    "done_reason": "unload" if unload else "load",
+                    "total_duration": int(self.load_seconds * 1e9),
+                    "load_duration": int(self.load_seconds * 1e9),
+                },
+            )
+
+        def _send_ollama(
+            self, body: dict, payload: dict, prompt: str, content: str
+        ) -> None:
+            final = {
+                "model": body.get("model", "mock"),
+                "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                **payload,
+                "done": True,
+                "done_reason": "stop",
+                "prompt_eval_count": _estimate_tokens(prompt),
+                "eval_count": _estimate_tokens(content),
+                # Durations are in nanoseconds. The response latency stands in for generation.
+                "total_duration": int((self.load_seconds + self.delay) * 1e9),
+                "load_duration": int(self.load_seconds * 1e9),
+                "prompt_eval_duration": 0,
+                "eval_duration": int(self.delay * 1e9),
+            }
+            # Ollama streams newline-delimited JSON unless asked not to.
+            if body.get("stream", True):
+                chunks = [
+                    (
+                        {**final, "done": False, "response": piece}
+                        if "response" in payload
+                        else {
+                            **final,
+                            "done": False,
+                            "message": {"role": "assistant", "content": piece},
+                        }
+                    )
+                    for piece in re.findall(r".{1,32}", content, re.DOTALL)
+                ]
+                empty = (
+                    {"response": ""}
+                    if "response" in payload
+                    else {"message": {"role": "assistant", "content": ""}}
+                )
+                lines = [json.dumps(chunk) for chunk in chunks] + [
+                    json.dumps({**final, **empty})
+                ]
+                self._send(
+                    200,
+                    "application/x-ndjson",
+                    ("\n".join(lines) + "\n").encode("utf-8"),
+                )
+            else:
+                self._send_json(200, final)
+
+        def _send_json(
+            self, status: int, payload: dict, headers: Optional[dict] = None
+        ) -> None:
+            self._send(
+                status, "application/json", json.dumps(payload).encode("utf-8"), headers
+            )
+
+        def _send(
+            self,
+            status: int,
+            content_type: str,
+            data: bytes,
+            headers: Optional[dict] = None,
+        ) -> None:
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+    return Handler
+
+
+def get_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", type=str, default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument(
+        "--latency",
+        type=str,
+        default="fixed:0",
+        help='Seconds to wait before each response, as "fixed:S", "uniform:LOW,HIGH", "normal:MEAN,STDEV" or "lognormal:MEDIAN,SIGMA".',
+    )
+    parser.add_argument(
+        "--error_rate",
+        type=float,
+        default=0.0,
+        help="The share of requests answered with a 429, 500 or 503 error.",
+    )
+    parser.add_argument(
+        "--load_latency",
+        type=str,
+        default="fixed:0",
+        help="Seconds to load an Ollama model that isn't loaded, in the same format as --latency.",
+    )
+    parser.add_argument(
+        "--seed", type=int, default=0, help="Seeds the latencies and errors."
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = get_args()
+    server = MockLLMServer(
+        args.host,
+        args.port,
+        args.latency,
+        args.error_rate,
+        args.seed,
+        load_latency=args.load_latency,
+    )
+    logger.info(f"Mock LLM server listening on {server.url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+        logger.info(
+            f"Served {server.requests} requests, {server.errors} of them errors"
+        )
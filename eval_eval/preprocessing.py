@@ -0,0 +1,196 @@
+import functools
+import math
+import re
+from collections import Counter
+from contextvars import ContextVar
+from typing import List, Optional
+
+from eval_eval.schema import Analysis
+from eval_eval.text import tokens
+
+"""
+Preprocessing of notice text before it's sent to judges.
+
+Notices are normalized, stripped of boilerplate such as repeated page headers, and split into
+chunks once, then cached. A BM25 index over the chunks picks the passages relevant to each
+analysis question, so judges can be given those instead of the whole notice.
+"""
+
+# Chunks are built from whole paragraphs up to about this many words.
+CHUNK_WORDS = 120
+# The default number of chunks kept as context for each question.
+DEFAULT_CONTEXT_CHUNKS = 3
+# Lines repeated at least this many times are treated as page headers or footers.
+REPEATED_LINE_MIN = 3
+BOILERPLATE_PATTERNS = [
+    re.compile(r"^page\s+\d+(\s+of\s+\d+)?$", re.IGNORECASE),
+    re.compile(r"^\d+\s*/\s*\d+$"),
+    # Rules and underlines used as separators or blank form fields.
+    re.compile(r"^[\W_]+$"),
+]
+
+# How many relevant chunks questions without their own context are judged against, or None to
+# judge them against the whole notice. Set per evaluation run with set_context_chunks.
+_context_chunks: ContextVar[Optional[int]] = ContextVar("context_chunks", default=None)
+
+
+def normalize_whitespace(text: str) -> str:
+    text = text.replace("\r\n", "\n").replace("\r", "\n").replace("\u00a0", " ")
+    text = re.sub(r"[ \t\f\v]+", " ", text)
+    text = re.sub(r" *\n *", "\n", text)
+    text = re.sub(r"\n{3,}", "\n\n", text)
+    return text.strip()
+
+
+def strip_boilerplate(text: str) -> str:
+    """
+    Drops page numbers, separator lines and lines repeated across pages.
+    """
+    lines = text.split("\n")
+    counts = Counter(line for line in lines if line)
+    kept = [
+        line
+        for line in lines
+        if not line
+        or (
+            counts[line] < REPEATED_LINE_MIN
+            and not any(pattern.match(line) for pattern in BOILERPLATE_PATTERNS)
+        )
+    ]
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(kept)).strip()
+
+
+def chunk_text(text: str, chunk_words: int = CHUNK_WORDS) -> List[str]:
+    """
+    Packs whole paragraphs into chunks of about chunk_words words.
+
+    Paragraphs longer than a chunk are split between sentences.
+    """
+    chunks = []
+    current: List[str] = []
+    current_words = 0
+    for paragraph in text.split("\n\n"):
+        for piece in _split_paragraph(paragraph, chunk_words):
+            piece_words = len(piece.split())
+            if current and current_words + piece_words > chunk_words:
+                chunks.append("\n\n".join(current))
+                current, current_words = [], 0
+            current.append(piece)
+            current_words += piece_words
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
+
+
+def _split_paragraph(paragraph: str, chunk_words: int) -> List[str]:
+    if len(paragraph.split()) <= chunk_words:
+        return [paragraph] if paragraph.strip() else []
+    pieces = []
+    current = ""
+    for sentence in re.split(r"(?<=[.!?])\s+", paragraph):
+        if current and len(current.split()) + len(sentence.split()) > chunk_words:
+            pieces.append(current)
+            current = ""
+        current = f"{current} {sentence}".strip()
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+class BM25:
+    """
+    A small Okapi BM25 index over a list of texts.
+    """
+
+    def __init__(self, texts: List[str], k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.term_counts = [Counter(tokens(text)) for text in texts]
+        self.lengths = [sum(counts.values()) for counts in self.term_counts]
+        self.average_length = sum(self.lengths) / len(self.lengths) if texts else 0
+        document_frequency = Counter(
+            term for counts in self.term_counts for term in counts
+        )
+        self.idf = {
+            term: math.log(1 + (len(texts) - frequency + 0.5) / (frequency + 0.5))
+            for term, frequency in document_frequency.items()
+        }
+
+    def scores(self, query: str) -> List[float]:
+        query_terms = set(tokens(query))
+        scores = []
+        for counts, length in zip(self.term_counts, self.lengths):
+            score = 0.0
+            for term in query_terms:
+                frequency = counts.get(term, 0)
+                if frequency == 0:
+                    continue
+                norm = self.k1 * (1 - self.b + self.b * length / self.average_length)
+                score += self.idf[term] * frequency * (self.k1 + 1) / (frequency + norm)
+            scores.append(score)
+        return scores
+
+
+class PreparedNotice:
+    """
+    A notice's cleaned text, its chunks and their BM25 index.
+    """
+
+    def __init__(self, text: str):
+        self.text = strip_boilerplate(normalize_whitespace(text))
+        self.chunks = chunk_text(self.text)
+        self.index = BM25(self.chunks)
+
+    def relevant_chunks(
+        self, query: str, top_k: int = DEFAULT_CONTEXT_CHUNKS
+    ) -> List[str]:
+        """
+        Gets the top_k chunks most relevant to the query, in the order they appear in the notice.
+        """
+        if len(self.chunks) <= top_k:
+            return list(self.chunks)
+        scores = self.index.scores(query)
+        ranked = sorted(range(len(self.chunks)), key=lambda i: scores[i], reverse=True)
+        return [self.chunks[i] for i in sorted(ranked[:top_k])]
+
+
+@functools.lru_cache(maxsize=256)
+def prepare_notice(text: str) -> PreparedNotice:
+    """
+    Prepares a notice once, however many analyses and experiments use it.
+    """
+    return PreparedNotice(text)
+
+
+def set_context_chunks(top_k: Optional[int]) -> None:
+    """
+    Sets how many relevant notice chunks analysis_contexts gives questions without context.
+
+    The setting applies to the current context, so an evaluation run sets it for the tasks and
+    threads it starts without touching the analyses.
+    """
+    _context_chunks.set(top_k)
+
+
+def analysis_contexts(analysis: Analysis, notice_text: str) -> List[List[str]]:
+    """
+    Gets the context to judge each part of an analysis against, summary first, then answers.
+
+    The summary is judged against the whole notice. Answers use their question's context
+    when it has one, or else the notice chunks most relevant to the question when the run
+    sets context chunks, or else the whole notice.
+    """
+    top_k = _context_chunks.get()
+    contexts = [[notice_text]]
+    for question in analysis.questions:
+        if question.context:
+            contexts.append(question.context)
+        elif top_k:
+            contexts.append(
+                prepare_notice(notice_text).relevant_chunks(
+                    f"{question.question} {question.answer}", top_k
+                )
+            )
+        else:
+            contexts.append([notice_text])
+    return contexts
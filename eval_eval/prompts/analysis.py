@@ -1,30 +1,47 @@
 import textwrap
 
+"""
+Analysis prompts.
 
-def prompt_1(notice: str) -> str:
-    return textwrap.dedent(
-        f"""
-        The following document is a sample California Supplemental Nutrition Assistance Program (SNAP) notice of benefits approval. 
+Every prompt starts with the same document prefix and ends with its own instructions. Keeping
+the long notice text first means the prompts for a notice share a token prefix, which Ollama
+can reuse from its KV cache instead of encoding the notice again for each prompt.
 
+A prompt's function name is recorded as each analysis' prompt_name, so reworded prompts get a
+new version suffix to keep their analyses apart from those of earlier wordings.
+"""
+
+
+def document_prefix(notice: str) -> str:
+    """
+    The start shared by every analysis prompt for a notice.
+    """
+    return (
+        "The following document is a sample California Supplemental Nutrition Assistance "
+        "Program (SNAP) notice of benefits approval.\n\n"
+        f"**Document to Analyze:**\n{notice}\n"
+    )
+
+
+def prompt_1_v2(notice: str) -> str:
+    return document_prefix(notice) + textwrap.dedent(
+        """
         **Instructions:**
-        Write a 2-3 sentence summary of the notice and evaluate the document's quality by answering questions about it in 2-3 sentences. 
+        Write a 2-3 sentence summary of the notice above and evaluate the document's quality by answering questions about it in 2-3 sentences.
 
         **Questions:**
         - What actions are required by the recipient?
         - Is the document primarily informational or is action required?
         - Is this notice written in plain language, at 6th-grade reading level or lower?
         - How could this document be more effective for the recipient?
-
-        **Document to Analyze:**
-        {notice}
-    """
+        """
     )
 
 
-def prompt_2(notice: str) -> str:
-    return textwrap.dedent(
-        f"""
-        You are analyzing a California Supplemental Nutrition Assistance Program (SNAP) notice of benefits approval. Your goal is to provide a clear summary and thorough evaluation of the document's effectiveness for the recipient.
+def prompt_2_v2(notice: str) -> str:
+    return document_prefix(notice) + textwrap.dedent(
+        """
+        You are analyzing the notice above. Your goal is to provide a clear summary and thorough evaluation of the document's effectiveness for the recipient.
 
         **Document Summary:**
         Write a 2-3 sentence summary that captures the key information and purpose of this notice.
@@ -39,8 +56,5 @@ def prompt_2(notice: str) -> str:
         - **Plain Language Assessment**: Evaluate whether this notice uses plain language appropriate for a 6th-grade reading level. Consider vocabulary complexity, sentence structure, and use of jargon or technical terms.
 
         - **Effectiveness Improvements**: Identify the most significant changes that would make this document more effective for the recipient, focusing on clarity, accessibility, and actionability.
-
-        **Document to Analyze:**
-        {notice}
-    """
+        """
     )
@@ -0,0 +1,255 @@
+import asyncio
+import random
+import re
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, TypeVar
+
+from eval_eval.instrumentation import record_judge_calls
+from eval_eval.logger import logger
+
+"""
+Provider-aware rate limiting for judge calls.
+
+Each judge model gets a limiter with requests-per-minute and tokens-per-minute budgets. Calls
+reserve their share up front and wait only as long as the budgets require. When a provider
+still answers with a 429, the call backs off exponentially and the limiter slows down, then
+speeds back up as calls succeed again.
+
+429s are only seen when the provider's exception reaches the wrapped call. Don't wrap a
+framework that retries rate limited requests itself or turns failures into scores, such as a
+whole evaluation run in a subprocess: its 429s never get here, and its reservation is made up
+front however the framework paces its requests.
+"""
+
+T = TypeVar("T")
+
+# (requests per minute, tokens per minute) for each judge model. Defaults follow OpenAI's
+# tier 1 limits; raise them to match your account's tier.
+RATE_LIMITS = {
+    "gpt-4.1": (500, 30_000),
+    "gpt-4.1-mini": (500, 200_000),
+}
+# Used for judge models missing from RATE_LIMITS.
+DEFAULT_RATE_LIMIT = (500, 30_000)
+MAX_RETRIES = 6
+# Seconds before the first retry. Doubles with each further retry.
+BASE_BACKOFF = 2.0
+MAX_BACKOFF = 60.0
+
+
+class TokenBucket:
+    """
+    A bucket that refills continuously up to its capacity.
+
+    Takers may overdraw the bucket; they are told how long to wait for the balance to become
+    non-negative again, which serves waiters in the order they arrived. A reservation larger
+    than the capacity is clamped to it, so it waits for a full bucket and takes all of it
+    instead of overdrawing the bucket for longer than a minute.
+    """
+
+    def __init__(self, capacity: float, refill_per_second: float):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self._balance = capacity
+        self._updated = time.monotonic()
+
+    def reserve(self, amount: float, rate_factor: float) -> float:
+        """
+        Takes an amount from the bucket and returns the seconds to wait before using it.
+        """
+        amount = min(amount, self.capacity)
+        now = time.monotonic()
+        refill_rate = self.refill_per_second * rate_factor
+        self._balance = min(
+            self.capacity, self._balance + (now - self._updated) * refill_rate
+        )
+        self._updated = now
+        self._balance -= amount
+        if self._balance >= 0:
+            return 0.0
+        return -self._balance / refill_rate
+
+
+class RateLimiter:
+    """
+    Requests-per-minute and tokens-per-minute budgets for one judge model.
+    """
+
+    def __init__(self, model: str, requests_per_minute: int, tokens_per_minute: int):
+        self.model = model
+        self.requests = TokenBucket(requests_per_minute, requests_per_minute / 60)
+        self.tokens = TokenBucket(tokens_per_minute, tokens_per_minute / 60)
+        # Scales the refill rates down after 429s and back up after successes.
+        self.rate_factor = 1.0
+        self._lock = threading.Lock()
+
+    def _reserve(self, requests: int, tokens: int) -> float:
+        with self._lock:
+            return max(
+                self.requests.reserve(requests, self.rate_factor),
+                self.tokens.reserve(tokens, self.rate_factor),
+            )
+
+    def acquire(self, requests: int = 1, tokens: int = 0) -> None:
+        wait = self._reserve(requests, tokens)
+        if wait > 0:
+            time.sleep(wait)
+
+    async def a_acquire(self, requests: int = 1, tokens: int = 0) -> None:
+        wait = self._reserve(requests, tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.rate_factor = min(1.0, self.rate_factor + 0.05)
+
+    def record_rate_limited(self) -> None:
+        with self._lock:
+            self.rate_factor = max(0.1, self.rate_factor / 2)
+        logger.warning(
+            f"Rate limited by {self.model}; slowing to {self.rate_factor:.0%} of its budget"
+        )
+
+
+_lock = threading.Lock()
+_limiters: Dict[str, RateLimiter] = {}
+
+
+def normalize_model_name(model: str) -> str:
+    """
+    Strips provider prefixes such as "openai:" and "openai:/" so one model shares one budget.
+    """
+    return re.sub(r"^openai:/?", "", model)
+
+
+def get_rate_limiter(model: str) -> RateLimiter:
+    model = normalize_model_name(model)
+    with _lock:
+        limiter = _limiters.get(model)
+        if limiter is None:
+            requests_per_minute, tokens_per_minute = RATE_LIMITS.get(
+                model, DEFAULT_RATE_LIMIT
+            )
+            limiter = RateLimiter(model, requests_per_minute, tokens_per_minute)
+            _limiters[model] = limiter
+        return limiter
+
+
+def items_per_minute(model: str, requests_per_item: int, tokens_per_item: int) -> float:
+    """
+    How many items a minute of the model's budgets covers.
+
+    Frameworks that make their own judge calls for a whole batch, such as promptfoo and
+    MLflow, can't be throttled call by call. They should be run once for the batch and
+    paced with their own concurrency settings, sized so they score about this many items a
+    minute.
+    """
+    requests_per_minute, tokens_per_minute = RATE_LIMITS.get(
+        normalize_model_name(model), DEFAULT_RATE_LIMIT
+    )
+    items = requests_per_minute / max(requests_per_item, 1)
+    if tokens_per_item > 0:
+        items = min(items, tokens_per_minute / tokens_per_item)
+    return items
+
+
+def estimate_tokens(*texts: str) -> int:
+    """
+    Roughly estimates prompt tokens at four characters per token.
+    """
+    return sum(len(text) for text in texts) // 4
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    status_code = getattr(error, "status_code", None)
+    response = getattr(error, "response", None)
+    if status_code is None and response is not None:
+        status_code = getattr(response, "status_code", None)
+    if status_code == 429:
+        return True
+    if "ratelimit" in type(error).__name__.lower():
+        return True
+    message = str(error).lower()
+    return re.search(r"\b429\b", message) is not None or "rate limit" in message
+
+
+def _backoff(error: Exception, attempt: int) -> float:
+    delay = min(MAX_BACKOFF, BASE_BACKOFF * 2**attempt)
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    retry_after = headers.get("retry-after")
+    if retry_after is not None:
+        try:
+            delay = max(delay, float(retry_after))
+        except ValueError:
+            pass
+    # Jitter keeps concurrent callers from retrying in lock-step.
+    return delay * random.uniform(0.8, 1.2)
+
+
+def call_with_rate_limit(
+    model: str,
+    call: Callable[[], T],
+    requests: int = 1,
+    tokens: int = 0,
+) -> T:
+    """
+    Runs a judge call within the model's budgets, retrying with backoff when rate limited.
+
+    The call must raise the provider's rate limit errors for the backoff to work. A call
+    needing more than a minute's budget waits for the whole budget, and may still be rate
+    limited by the provider. Frameworks scoring a whole batch should instead be paced with
+    items_per_minute.
+
+    Parameters
+    ----------
+    model: str
+      The judge model whose budgets the call uses.
+    call: Callable
+      Makes the judge call.
+    requests: int
+      How many provider requests the call makes.
+    tokens: int
+      About how many tokens the call uses. See estimate_tokens.
+    """
+    limiter = get_rate_limiter(model)
+    for attempt in range(MAX_RETRIES + 1):
+        limiter.acquire(requests, tokens)
+        record_judge_calls(requests)
+        try:
+            result = call()
+        except Exception as e:
+            if attempt == MAX_RETRIES or not is_rate_limit_error(e):
+                raise
+            limiter.record_rate_limited()
+            time.sleep(_backoff(e, attempt))
+            continue
+        limiter.record_success()
+        return result
+
+
+async def a_call_with_rate_limit(
+    model: str,
+    call: Callable[[], Awaitable[Any]],
+    requests: int = 1,
+    tokens: int = 0,
+) -> Any:
+    """
+    The async version of call_with_rate_limit. The call must return a new awaitable each time.
+    """
+    limiter = get_rate_limiter(model)
+    for attempt in range(MAX_RETRIES + 1):
+        await limiter.a_acquire(requests, tokens)
+        record_judge_calls(requests)
+        try:
+            result = await call()
+        except Exception as e:
+            if attempt == MAX_RETRIES or not is_rate_limit_error(e):
+                raise
+            limiter.record_rate_limited()
+            await asyncio.sleep(_backoff(e, attempt))
+            continue
+        limiter.record_success()
+        return result
@@ -0,0 +1,147 @@
+import time
+from typing import Dict, List
+
+import ollama
+
+from eval_eval.logger import logger
+
+"""
+Keeps Ollama analysis models loaded while their work drains.
+
+Each model is loaded once with an empty warm-up request, then every request for it carries an
+explicit keep-alive so Ollama doesn't unload it between requests. Work is ordered so models
+that are already loaded go first, and models are released once they have no work left. Load
+time is reported separately from generation time, since slowness from swapping models needs a
+different fix than slow generation.
+"""
+
+# How long Ollama keeps a pinned model loaded after each request.
+PINNED_KEEP_ALIVE = "30m"
+# Ollama's default keep-alive, restored when a run releases a model it may soon need again.
+DEFAULT_KEEP_ALIVE = "5m"
+# Ollama reports durations in nanoseconds.
+NANOSECONDS = 1e9
+
+
+class ModelStats:
+    """
+    Load, prompt encoding and generation time for one model over a run.
+    """
+
+    def __init__(self):
+        self.loads = 0
+        self.load_seconds = 0.0
+        self.requests = 0
+        # Encoding prompts, which is most of the time to first token.
+        self.prompt_seconds = 0.0
+        self.generation_seconds = 0.0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        # Streamed responses rejected for breaking their schema.
+        self.aborted = 0
+
+
+class ModelResidency:
+    """
+    Tracks which models are loaded in Ollama and pins them while they have work.
+    """
+
+    def __init__(self, client: ollama.AsyncClient, keep_alive: str = PINNED_KEEP_ALIVE):
+        self.client = client
+        self.keep_alive = keep_alive
+        self.stats: Dict[str, ModelStats] = {}
+        # Loaded models, least recently used first.
+        self._loaded: List[str] = []
+
+    def _stats(self, model: str) -> ModelStats:
+        return self.stats.setdefault(model, ModelStats())
+
+    async def discover(self) -> None:
+        """
+        Finds the models Ollama already has loaded, so they're used first and not warmed again.
+        """
+        response = await self.client.ps()
+        for process in response.models:
+            if process.model not in self._loaded:
+                self._loaded.append(process.model)
+
+    def order(self, models: list) -> list:
+        """
+        Orders models so the most recently used loaded model goes first and unloaded ones last.
+
+        Working through documents one at a time, this alternates the order of two models so
+        each document starts with the model the previous one finished with.
+        """
+        return sorted(
+            models,
+            key=lambda model: (
+                -self._loaded.index(model) if model in self._loaded else 1
+            ),
+        )
+
+    async def warm(self, model: str) -> None:
+        """
+        Loads and pins a model before its work starts, unless it's already loaded.
+        """
+        if model in self._loaded:
+            self._loaded.remove(model)
+            self._loaded.append(model)
+            return
+        logger.info(f"Loading {model} with keep-alive {self.keep_alive}")
+        start = time.perf_counter()
+        response = await self.client.generate(
+            model=model, prompt="", keep_alive=self.keep_alive
+        )
+        stats = self._stats(model)
+        stats.loads += 1
+        if response.load_duration is not None:
+            stats.load_seconds += response.load_duration / NANOSECONDS
+        else:
+            stats.load_seconds += time.perf_counter() - start
+        self._loaded.append(model)
+
+    def record(self, model: str, response: ollama.GenerateResponse) -> None:
+        """
+        Records a request's timings. Any load time means Ollama had to reload the model.
+        """
+        stats = self._stats(model)
+        stats.requests += 1
+        if response.load_duration:
+            stats.load_seconds += response.load_duration / NANOSECONDS
+        stats.prompt_seconds += (response.prompt_eval_duration or 0) / NANOSECONDS
+        stats.generation_seconds += (response.eval_duration or 0) / NANOSECONDS
+        stats.prompt_tokens += response.prompt_eval_count or 0
+        stats.completion_tokens += response.eval_count or 0
+
+    def record_abort(self, model: str) -> None:
+        self._stats(model).aborted += 1
+
+    async def release(self, model: str, keep_alive: int | str = 0) -> None:
+        """
+        Unpins a model. By default it's unloaded at once to free memory for the next model.
+        """
+        if model not in self._loaded:
+            return
+        logger.info(f"Releasing {model} with keep-alive {keep_alive}")
+        await self.client.generate(model=model, prompt="", keep_alive=keep_alive)
+        if keep_alive == 0:
+            self._loaded.remove(model)
+
+    async def close(self) -> None:
+        """
+        Hands loaded models back to Ollama's default keep-alive and logs their timings.
+        """
+        for model in list(self._loaded):
+            if model in self.stats:
+                await self.release(model, DEFAULT_KEEP_ALIVE)
+        self.log()
+
+    def log(self) -> None:
+        for model, stats in self.stats.items():
+            logger.info(
+                f"{model}: {stats.loads} loads in {stats.load_seconds:.1f}s, "
+                f"{stats.requests} requests with {stats.prompt_seconds:.1f}s encoding prompts "
+                f"and {stats.generation_seconds:.1f}s generating "
+                f"({stats.prompt_tokens} prompt / {stats.completion_tokens} completion tokens), "
+                f"{stats.aborted} streamed responses rejected"
+            )
@@ -0,0 +1,102 @@
+import json
+from typing import List, Optional
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from eval_eval.logger import logger
+from eval_eval.schema import Document
+
+"""
+A columnar store of evaluation results, written alongside the output manifest.
+
+Each evaluation result becomes a row of a Parquet file, so results from many runs can be
+aggregated by reading only the columns and metrics needed, without hydrating manifests.
+"""
+
+RESULTS_SCHEMA = pa.schema(
+    [
+        ("document_path", pa.string()),
+        ("analysis_index", pa.int32()),
+        ("analysis_llm", pa.string()),
+        ("analysis_prompt", pa.string()),
+        ("metric_name", pa.string()),
+        ("score", pa.float64()),
+        ("reason", pa.string()),
+        ("llm_model_name", pa.string()),
+        ("related_analysis", pa.string()),
+        # JSON encoded, since details differ between metrics.
+        ("details", pa.string()),
+        ("duration", pa.float64()),
+        ("queue_wait", pa.float64()),
+        ("judge_calls", pa.int64()),
+        ("prompt_tokens", pa.int64()),
+        ("completion_tokens", pa.int64()),
+        ("cost", pa.float64()),
+        ("cached", pa.bool_()),
+    ]
+)
+# Rows buffered before they're written as a row group.
+ROW_GROUP_SIZE = 10_000
+
+
+def result_rows(document: Document) -> List[dict]:
+    """
+    Flattens a document's evaluation results into rows matching RESULTS_SCHEMA.
+    """
+    rows = []
+    for analysis_index, analysis in enumerate(document.notice_analysis):
+        for result in analysis.evaluation_results:
+            row = result.model_dump()
+            row["details"] = (
+                json.dumps(row["details"]) if row["details"] is not None else None
+            )
+            rows.append(
+                {
+                    "document_path": document.path,
+                    "analysis_index": analysis_index,
+                    "analysis_llm": analysis.llm_model_name,
+                    "analysis_prompt": analysis.prompt_name,
+                    **row,
+                }
+            )
+    return rows
+
+
+class ResultsWriter:
+    """
+    Writes evaluation results to a Parquet file a row group at a time.
+
+    Documents can be added as they are evaluated, so streamed runs don't hold every result.
+    """
+
+    def __init__(self, path: str, row_group_size: int = ROW_GROUP_SIZE):
+        self.path = path
+        self.row_group_size = row_group_size
+        self.rows_written = 0
+        self._rows: List[dict] = []
+        self._writer: Optional[pq.ParquetWriter] = None
+
+    def add(self, document: Document) -> None:
+        self._rows.extend(result_rows(document))
+        if len(self._rows) >= self.row_group_size:
+            self._flush()
+
+    def _flush(self) -> None:
+        if len(self._rows) == 0:
+            return
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(self.path, RESULTS_SCHEMA)
+        self._writer.write_table(
+            pa.Table.from_pylist(self._rows, schema=RESULTS_SCHEMA)
+        )
+        self.rows_written += len(self._rows)
+        self._rows = []
+
+    def close(self) -> None:
+        self._flush()
+        if self._writer is None:
+            # Write an empty file so readers still find the schema.
+            self._writer = pq.ParquetWriter(self.path, RESULTS_SCHEMA)
+        self._writer.close()
+        logger.info(f"Wrote {self.rows_written} evaluation results to {self.path}")
@@ -0,0 +1,143 @@
+import math
+import statistics
+from typing import List
+
+from eval_eval.schema import EvaluationResult
+
+"""
+Self-consistency sampling of LLM judges.
+
+A sampleable experiment is run several times on the same analysis, a round of samples at a
+time, until the 95% confidence interval of every score it produces is narrower than the
+tolerance or the sample limit is reached. The samples of each score are then combined into
+one result whose score is their mean, with the spread recorded in its details.
+"""
+
+# Samples taken at once before the confidence intervals are checked.
+SAMPLE_ROUND = 3
+# The default half width of the 95% confidence interval at which sampling stops.
+DEFAULT_SAMPLE_TOLERANCE = 0.05
+# Two-sided 95% critical values of Student's t by degrees of freedom. Larger samples use
+# the normal value.
+T_CRITICAL = {
+    1: 12.706,
+    2: 4.303,
+    3: 3.182,
+    4: 2.776,
+    5: 2.571,
+    6: 2.447,
+    7: 2.365,
+    8: 2.306,
+    9: 2.262,
+    10: 2.228,
+    15: 2.131,
+    20: 2.086,
+    30: 2.042,
+}
+Z_CRITICAL = 1.96
+
+
+def t_critical(degrees_of_freedom: int) -> float:
+    if degrees_of_freedom > max(T_CRITICAL):
+        return Z_CRITICAL
+    # Round down to the nearest tabulated value, which errs on the wide side.
+    return T_CRITICAL[max(df for df in T_CRITICAL if df <= degrees_of_freedom)]
+
+
+def confidence_half_width(scores: List[float]) -> float:
+    """
+    The half width of the 95% confidence interval of the mean score.
+    """
+    if len(scores) < 2:
+        return math.inf
+    return (
+        t_critical(len(scores) - 1) * statistics.stdev(scores) / math.sqrt(len(scores))
+    )
+
+
+def _is_scored(result: EvaluationResult) -> bool:
+    return result.score is not None and not math.isnan(result.score)
+
+
+def _group_samples(
+    samples: List[List[EvaluationResult]],
+) -> List[List[EvaluationResult]]:
+    """
+    Groups the results of the samples by their position.
+
+    Each sample of an analysis produces its results in the same order, while metric names
+    and parts can repeat within a sample.
+    """
+    groups: List[List[EvaluationResult]] = []
+    for sample in samples:
+        for position, result in enumerate(sample):
+            if position == len(groups):
+                groups.append([])
+            groups[position].append(result)
+    return groups
+
+
+def is_settled(samples: List[List[EvaluationResult]], tolerance: float) -> bool:
+    """
+    Whether every score's confidence interval is within the tolerance.
+
+    Positions no sample has scored can't settle, so they're left out.
+    """
+    return all(
+        confidence_half_width(scores) <= tolerance
+        for scores in (
+            [result.score for result in results if _is_scored(result)]
+            for results in _group_samples(samples)
+        )
+        if len(scores) > 0
+    )
+
+
+def _total(values: list):
+    values = [value for value in values if value is not None]
+    return sum(values) if len(values) > 0 else None
+
+
+def combine_samples(samples: List[List[EvaluationResult]]) -> List[EvaluationResult]:
+    """
+    Combines the samples' results position by position into one result each.
+
+    The score is the samples' mean and the reason is that of the sample closest to it. The
+    samples' time, judge calls, tokens and cost are added up, since all of them were paid for.
+    Samples without a score are left out of the mean, and positions no sample scored are
+    dropped.
+    """
+    combined = []
+    for results in _group_samples(samples):
+        scored = [result for result in results if _is_scored(result)]
+        if len(scored) == 0:
+            continue
+        scores = [result.score for result in scored]
+        mean = statistics.fmean(scores)
+        closest = min(scored, key=lambda result: abs(result.score - mean))
+        result = closest.model_copy(deep=True)
+        result.score = mean
+        result.details = {
+            **(result.details or {}),
+            "samples": {
+                "n": len(scores),
+                "mean": mean,
+                "variance": statistics.variance(scores) if len(scores) > 1 else 0.0,
+                "ci_half_width": (
+                    confidence_half_width(scores) if len(scores) > 1 else None
+                ),
+                "scores": scores,
+            },
+        }
+        for field in [
+            "duration",
+            "judge_calls",
+            "prompt_tokens",
+            "completion_tokens",
+            "cost",
+        ]:
+            setattr(
+                result, field, _total([getattr(sample, field) for sample in results])
+            )
+        combined.append(result)
+    return combined
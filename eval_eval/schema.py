@@ -32,6 +32,26 @@ class EvaluationResult(BaseModel):
     duration: Optional[float] = Field(
         default=None, description="The duration of the evaluation."
     )
+    queue_wait: Optional[float] = Field(
+        default=None,
+        description="Seconds the evaluation waited for a free slot before it started, split evenly across the results of its batch.",
+    )
+    judge_calls: Optional[int] = Field(
+        default=None, description="The number of judge requests made for the result."
+    )
+    prompt_tokens: Optional[int] = Field(
+        default=None, description="Prompt tokens used, when the framework reports them."
+    )
+    completion_tokens: Optional[int] = Field(
+        default=None,
+        description="Completion tokens used, when the framework reports them.",
+    )
+    cost: Optional[float] = Field(
+        default=None, description="Cost in USD, when the framework reports it."
+    )
+    cached: Optional[bool] = Field(
+        default=None, description="Whether the result was reused from the result cache."
+    )
 
 
 class AnalysisQuestion(BaseModel):
@@ -0,0 +1,230 @@
+from typing import List, Optional
+
+"""
+Incremental validation of streamed structured output.
+
+StreamingJSONValidator is fed a JSON response as it's generated and checks it against a JSON
+schema as far as it has got, so a generation that has gone wrong can be stopped at the first
+bad token instead of after the model spends its whole token budget. It checks keys, value
+types, required keys, array lengths and string lengths; the complete response is still
+validated with the pydantic model once it finishes.
+"""
+
+# The longest string value allowed, in characters. Analysis answers are meant to be 2-3
+# sentences, so anything much longer is a runaway generation.
+MAX_STRING_CHARS = 1500
+# The longest response allowed, in characters.
+MAX_RESPONSE_CHARS = 10_000
+
+_WHITESPACE = " \t\n\r"
+_JSON_TYPES = {"{": "object", "[": "array", '"': "string"}
+
+
+class StreamViolation(ValueError):
+    """
+    Raised when a streamed response can no longer match its schema.
+    """
+
+
+class _Frame:
+    """
+    An open object or array and what it expects next.
+    """
+
+    def __init__(self, schema: dict):
+        self.schema = schema
+        self.type = schema["type"]
+        # "key", "colon", "value" or "comma". Arrays never expect keys or colons.
+        self.expect = "key" if self.type == "object" else "value"
+        self.key: Optional[str] = None
+        self.keys: List[str] = []
+        self.items = 0
+        self.empty = True
+
+
+class StreamingJSONValidator:
+    """
+    Validates a JSON document against a JSON schema a chunk at a time.
+
+    Only the subset of JSON schema pydantic produces for plain models is supported: objects
+    with properties and required keys, arrays with items, minItems and maxItems, strings and $defs references. Numbers,
+    booleans and nulls aren't expected in these responses, so they're violations.
+    """
+
+    def __init__(
+        self,
+        schema: dict,
+        max_string_chars: int = MAX_STRING_CHARS,
+        max_response_chars: int = MAX_RESPONSE_CHARS,
+    ):
+        self.defs = schema.get("$defs", {})
+        self.root = self._resolve(schema)
+        self.max_string_chars = max_string_chars
+        self.max_response_chars = max_response_chars
+        self.chars = 0
+        self.done = False
+        self._stack: List[_Frame] = []
+        self._in_string = False
+        self._string_is_key = False
+        self._escaped = False
+        self._string: List[str] = []
+
+    def _resolve(self, schema: dict) -> dict:
+        ref = schema.get("$ref")
+        if ref is not None:
+            return self.defs[ref.split("/")[-1]]
+        return schema
+
+    def _path(self, inside: bool = True) -> str:
+        """
+        Names where the response has got to, or with inside False, the innermost open container.
+        """
+        parts = []
+        for i, frame in enumerate(self._stack):
+            if not inside and i == len(self._stack) - 1:
+                break
+            if frame.type == "object" and frame.key is not None:
+                parts.append(frame.key)
+            elif frame.type == "array":
+                parts.append(str(frame.items))
+        return ".".join(parts) or "response"
+
+    def _child_schema(self) -> dict:
+        if len(self._stack) == 0:
+            return self.root
+        frame = self._stack[-1]
+        if frame.type == "object":
+            return self._resolve(frame.schema["properties"][frame.key])
+        return self._resolve(frame.schema["items"])
+
+    def feed(self, chunk: str) -> None:
+        """
+        Checks the next chunk of the response. Raises StreamViolation at the first problem.
+        """
+        self.chars += len(chunk)
+        if self.chars > self.max_response_chars:
+            raise StreamViolation(
+                f"Response is longer than {self.max_response_chars} characters"
+            )
+        for char in chunk:
+            if self._in_string:
+                self._feed_string(char)
+            else:
+                self._feed_structure(char)
+
+    def _feed_string(self, char: str) -> None:
+        if self._escaped:
+            self._escaped = False
+        elif char == "\\":
+            self._escaped = True
+        elif char == '"':
+            self._in_string = False
+            self._end_string("".join(self._string))
+            return
+        self._string.append(char)
+        if not self._string_is_key and len(self._string) > self.max_string_chars:
+            raise StreamViolation(
+                f"{self._path()} is longer than {self.max_string_chars} characters"
+            )
+
+    def _end_string(self, text: str) -> None:
+        if not self._string_is_key:
+            self._end_value()
+            return
+        frame = self._stack[-1]
+        if text not in frame.schema.get("properties", {}):
+            raise StreamViolation(
+                f"Unexpected key {text!r} in {self._path(inside=False)}"
+            )
+        frame.key = text
+        frame.keys.append(text)
+        frame.expect = "colon"
+
+    def _feed_structure(self, char: str) -> None:
+        if char in _WHITESPACE:
+            return
+        if self.done:
+            raise StreamViolation(f"Unexpected {char!r} after the response")
+        frame = self._stack[-1] if self._stack else None
+        expect = frame.expect if frame is not None else "value"
+        if char in "}]" and frame is not None:
+            closes = "object" if char == "}" else "array"
+            # Objects may close instead of a key only when empty, arrays instead of a value.
+            if frame.type != closes or not (
+                expect == "comma" or (frame.empty and expect in ("key", "value"))
+            ):
+                raise StreamViolation(
+                    f"Unexpected {char!r} in {self._path(inside=False)}"
+                )
+            missing = [
+                key for key in frame.schema.get("required", []) if key not in frame.keys
+            ]
+            if len(missing) > 0:
+                raise StreamViolation(
+                    f"{self._path(inside=False)} is missing {', '.join(missing)}"
+                )
+            min_items = frame.schema.get("minItems")
+            if (
+                frame.type == "array"
+                and min_items is not None
+                and frame.items < min_items
+            ):
+                raise StreamViolation(
+                    f"{self._path(inside=False)} has fewer than {min_items} items"
+                )
+            self._stack.pop()
+            self._end_value()
+        elif expect == "key":
+            if char != '"':
+                raise StreamViolation(f"Expected a key in {self._path()}, got {char!r}")
+            self._start_string(is_key=True)
+        elif expect == "colon":
+            if char != ":":
+                raise StreamViolation(f"Expected ':' in {self._path()}, got {char!r}")
+            frame.expect = "value"
+        elif expect == "comma":
+            if char != ",":
+                raise StreamViolation(f"Expected ',' in {self._path()}, got {char!r}")
+            if frame.type == "object":
+                frame.expect = "key"
+                frame.key = None
+            else:
+                frame.expect = "value"
+        else:
+            self._start_value(char)
+
+    def _start_value(self, char: str) -> None:
+        schema = self._child_schema()
+        found = _JSON_TYPES.get(char, "scalar")
+        if found != schema.get("type"):
+            raise StreamViolation(
+                f"Expected {schema.get('type')} for {self._path()}, got {found}"
+            )
+        if self._stack and self._stack[-1].type == "array":
+            array = self._stack[-1]
+            max_items = array.schema.get("maxItems")
+            if max_items is not None and array.items >= max_items:
+                raise StreamViolation(
+                    f"{self._path(inside=False)} has more than {max_items} items"
+                )
+        if self._stack:
+            self._stack[-1].empty = False
+        if found == "string":
+            self._start_string(is_key=False)
+        else:
+            self._stack.append(_Frame(schema))
+
+    def _start_string(self, is_key: bool) -> None:
+        self._in_string = True
+        self._string_is_key = is_key
+        self._escaped = False
+        self._string = []
+
+    def _end_value(self) -> None:
+        if len(self._stack) == 0:
+            self.done = True
+            return
+        frame = self._stack[-1]
+        if frame.type == "array":
+            frame.items += 1
+        frame.expect = "comma"
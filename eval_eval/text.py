@@ -0,0 +1,127 @@
+import re
+from typing import List, Set, Tuple
+
+"""
+Lightweight text statistics for local metrics that don't need an LLM.
+"""
+
+WORD_PATTERN = re.compile(r"[A-Za-z]+(?:'[A-Za-z]+)?|\d+(?:[.,]\d+)*")
+SENTENCE_END_PATTERN = re.compile(r"[.!?]+(?:\s+|$)|\n\s*\n")
+VOWEL_GROUP_PATTERN = re.compile(r"[aeiouy]+")
+MONTHS = {
+    "january": 1,
+    "jan": 1,
+    "february": 2,
+    "feb": 2,
+    "march": 3,
+    "mar": 3,
+    "april": 4,
+    "apr": 4,
+    "may": 5,
+    "june": 6,
+    "jun": 6,
+    "july": 7,
+    "jul": 7,
+    "august": 8,
+    "aug": 8,
+    "september": 9,
+    "sep": 9,
+    "sept": 9,
+    "october": 10,
+    "oct": 10,
+    "november": 11,
+    "nov": 11,
+    "december": 12,
+    "dec": 12,
+}
+_MONTH_NAMES = "|".join(sorted(MONTHS, key=len, reverse=True))
+# "March 5, 2024", "Mar. 5th" and "5 March 2024".
+MONTH_DAY_PATTERN = re.compile(
+    rf"\b({_MONTH_NAMES})\.?\s+(\d{{1,2}})(?:st|nd|rd|th)?(?:,?\s+(\d{{4}}))?\b",
+    re.IGNORECASE,
+)
+DAY_MONTH_PATTERN = re.compile(
+    rf"\b(\d{{1,2}})(?:st|nd|rd|th)?\s+({_MONTH_NAMES})\.?(?:,?\s+(\d{{4}}))?\b",
+    re.IGNORECASE,
+)
+# "03/05/2024" and "3-5-24", read month first as US notices are.
+NUMERIC_DATE_PATTERN = re.compile(r"\b(\d{1,2})[/-](\d{1,2})[/-](\d{2}|\d{4})\b")
+NUMBER_WORDS = {
+    "one": "1",
+    "two": "2",
+    "three": "3",
+    "four": "4",
+    "five": "5",
+    "six": "6",
+    "seven": "7",
+    "eight": "8",
+    "nine": "9",
+    "ten": "10",
+    "fifteen": "15",
+    "twenty": "20",
+    "thirty": "30",
+    "sixty": "60",
+    "ninety": "90",
+}
+# Relative deadlines such as "within 10 days".
+RELATIVE_DEADLINE_PATTERN = re.compile(
+    r"\bwithin\s+(\d+|[a-z]+)\s+(day|week|month)s?\b", re.IGNORECASE
+)
+
+
+def words(text: str) -> List[str]:
+    return WORD_PATTERN.findall(text)
+
+
+def sentence_count(text: str) -> int:
+    """
+    Counts sentences by their terminal punctuation, treating trailing text as a sentence.
+    """
+    count = len(SENTENCE_END_PATTERN.findall(text.strip()))
+    if text.strip() and not re.search(r"[.!?]\s*$", text.strip()):
+        count += 1
+    return max(count, 1)
+
+
+def syllable_count(word: str) -> int:
+    """
+    Estimates syllables from vowel groups, dropping a silent final "e".
+    """
+    word = word.lower()
+    if not word.isalpha():
+        return 1
+    if word.endswith("e") and not word.endswith(("le", "ee", "ye")) and len(word) > 2:
+        word = word[:-1]
+    return max(len(VOWEL_GROUP_PATTERN.findall(word)), 1)
+
+
+def tokens(text: str) -> List[str]:
+    """
+    Lowercased words, for comparing texts.
+    """
+    return [word.lower() for word in words(text)]
+
+
+def ngrams(text_tokens: List[str], n: int) -> List[Tuple[str, ...]]:
+    return [tuple(text_tokens[i : i + n]) for i in range(len(text_tokens) - n + 1)]
+
+
+def extract_dates(text: str) -> Set[str]:
+    """
+    Finds dates and relative deadlines, normalized so the same date written differently
+    compares equal. Dates become "MM-DD", since answers often leave out the year, and
+    deadlines become "within N unit".
+    """
+    dates = set()
+    for month, day, _ in MONTH_DAY_PATTERN.findall(text):
+        dates.add(f"{MONTHS[month.lower()]:02d}-{int(day):02d}")
+    for day, month, _ in DAY_MONTH_PATTERN.findall(text):
+        dates.add(f"{MONTHS[month.lower()]:02d}-{int(day):02d}")
+    for month, day, _ in NUMERIC_DATE_PATTERN.findall(text):
+        if 1 <= int(month) <= 12:
+            dates.add(f"{int(month):02d}-{int(day):02d}")
+    for amount, unit in RELATIVE_DEADLINE_PATTERN.findall(text):
+        amount = NUMBER_WORDS.get(amount.lower(), amount.lower())
+        if amount.isdigit():
+            dates.add(f"within {amount} {unit.lower()}")
+    return dates
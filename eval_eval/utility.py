@@ -1,4 +1,5 @@
 import json
+from typing import Iterable, Iterator, TextIO
 
 from eval_eval.schema import Document, Manifest
 
@@ -7,15 +8,57 @@ Reusable utilities for preprocessing and evaluation.
 """
 
 
+def is_jsonl_manifest(manifest_path: str) -> bool:
+    """
+    JSONL manifests hold one document per line instead of a single manifest object.
+    """
+    return manifest_path.endswith(".jsonl")
+
+
+def hydrate_document(document: dict) -> Document:
+    if "text" not in document.keys() or document["text"] is None:
+        with open(document["path"], "r") as fp:
+            document["text"] = fp.read()
+    return Document.model_validate(document)
+
+
 def hydrate_document_manifest(manifest_path: str) -> Manifest:
     # @todo assert manifest exists
+    if is_jsonl_manifest(manifest_path):
+        return Manifest(documents=list(iter_document_manifest(manifest_path)))
     with open(manifest_path, "r") as mf:
         manifest = json.loads(mf.read())
     document_models = []
     for document in manifest["documents"]:
-        if "text" not in document.keys() or document["text"] is None:
-            with open(document["path"], "r") as fp:
-                document["text"] = fp.read()
-        document_model = Document.model_validate(document)
-        document_models.append(document_model)
+        document_models.append(hydrate_document(document))
     return Manifest(documents=document_models)
+
+
+def iter_document_manifest(manifest_path: str) -> Iterator[Document]:
+    """
+    Lazily hydrates the documents of a JSONL manifest one line at a time.
+
+    Notice text is only read from disk when its document is reached, so memory is bounded
+    by a single document rather than the whole manifest.
+    """
+    with open(manifest_path, "r") as mf:
+        for line in mf:
+            if line.strip():
+                yield hydrate_document(json.loads(line))
+
+
+def write_documents(documents: Iterable[Document], output: TextIO) -> int:
+    """
+    Writes documents to a JSONL manifest as they are produced.
+
+    Returns
+    -------
+    count: int
+      The number of documents written.
+    """
+    count = 0
+    for document in documents:
+        output.write(document.model_dump_json() + "\n")
+        output.flush()
+        count += 1
+    return count
@@ -1,13 +1,35 @@
-from typing import List
+import asyncio
+import textwrap
+from typing import List, Optional
 
-from deepeval.metrics import AnswerRelevancyMetric, FaithfulnessMetric, GEval
+from deepeval.metrics import (
+    AnswerRelevancyMetric,
+    BaseMetric,
+    FaithfulnessMetric,
+    GEval,
+)
 from deepeval.models import DeepEvalBaseLLM, GPTModel, OllamaModel
 from deepeval.test_case import LLMTestCase, LLMTestCaseParams
 from deepeval.tracing import observe
+from openai import AsyncOpenAI, OpenAI
+from pydantic import BaseModel, Field
 
-from eval_eval.evaluation import MetricExperimentBase
+from eval_eval.evaluation import BATCH_DOCUMENT, EvaluationItem, MetricExperimentBase
+from eval_eval.instrumentation import Measurement, measure, record_usage
+from eval_eval.judges import (
+    get_async_http_client,
+    get_http_client,
+    get_judge,
+    register_judge_provider,
+)
 from eval_eval.logger import logger
-from eval_eval.schema import Analysis, EvaluationResult
+from eval_eval.preprocessing import analysis_contexts
+from eval_eval.rate_limit import (
+    a_call_with_rate_limit,
+    call_with_rate_limit,
+    estimate_tokens,
+)
+from eval_eval.schema import Analysis, AnalysisQuestion, EvaluationResult
 
 """
 Implements metrics from the DeepEval framework.
@@ -25,15 +47,113 @@ Resources:
 EVAL_MODEL = "gpt-4.1"
 
 
-def _get_model(model_name: str) -> DeepEvalBaseLLM:
+class _PooledGPTModel(GPTModel):
+    """
+    A GPTModel whose OpenAI clients send requests over the shared pooled HTTP clients, and
+    which records the tokens each request uses.
+
+    DeepEval builds a new OpenAI client for every judge call, so without a shared HTTP client
+    each call would open its own connections.
+    """
+
+    def calculate_cost(self, input_tokens: int, output_tokens: int) -> float:
+        # DeepEval prices every completion from its usage, but only reports the cost.
+        record_usage(prompt_tokens=input_tokens, completion_tokens=output_tokens)
+        return super().calculate_cost(input_tokens, output_tokens)
+
+    def load_model(self, async_mode: bool = False):
+        if async_mode:
+            return AsyncOpenAI(
+                api_key=self._openai_api_key,
+                base_url=self.base_url,
+                http_client=get_async_http_client(),
+            )
+        return OpenAI(
+            api_key=self._openai_api_key,
+            base_url=self.base_url,
+            http_client=get_http_client(),
+        )
+
+
+def _build_model(model_name: str) -> DeepEvalBaseLLM:
     if "gpt" in model_name:
-        return GPTModel(model=model_name)
+        return _PooledGPTModel(model=model_name)
     else:
         return OllamaModel(model=model_name)
 
 
+# The shared judge is the model wrapper, which DeepEval asks for provider clients.
+register_judge_provider("deepeval", _build_model)
+
+
+def _get_model(model_name: str) -> DeepEvalBaseLLM:
+    return get_judge("deepeval", model_name)
+
+
+def _estimate_tokens(test_case: LLMTestCase) -> int:
+    return estimate_tokens(
+        test_case.input or "",
+        test_case.actual_output or "",
+        *(test_case.retrieval_context or []),
+    )
+
+
+def _measure(metric: BaseMetric, test_case: LLMTestCase, requests: int) -> Measurement:
+    """
+    Measures a test case within the judge's rate limits, recording its time and cost.
+
+    DeepEval metrics make several judge requests per measurement, so callers pass how many.
+    """
+    with measure() as measurement:
+        call_with_rate_limit(
+            EVAL_MODEL,
+            lambda: metric.measure(test_case),
+            requests=requests,
+            tokens=_estimate_tokens(test_case),
+        )
+        record_usage(cost=metric.evaluation_cost)
+    return measurement
+
+
+async def _a_measure(
+    metric: BaseMetric, test_case: LLMTestCase, requests: int
+) -> Measurement:
+    with measure() as measurement:
+        await a_call_with_rate_limit(
+            EVAL_MODEL,
+            lambda: metric.a_measure(test_case),
+            requests=requests,
+            tokens=_estimate_tokens(test_case),
+        )
+        record_usage(cost=metric.evaluation_cost)
+    return measurement
+
+
+def _get_text_to_evaluate(analysis: Analysis) -> List[tuple]:
+    text_to_evaluate = [("summary", analysis.summary)]
+    for item in analysis.questions:
+        text_to_evaluate.append((item.question, item.answer))
+    return text_to_evaluate
+
+
 class DeepEvalFaithfulnessExperiment(MetricExperimentBase):
     METRIC_NAME = "deep_eval_faithfulness"
+    JUDGE_MODEL = EVAL_MODEL
+    # Truths, claims, verdicts and reason.
+    JUDGE_REQUESTS = 4
+
+    @staticmethod
+    def _to_result(
+        metric: FaithfulnessMetric, related_analysis: str
+    ) -> EvaluationResult:
+        logger.info(f"DeepEval reports cost of {metric.evaluation_cost}")
+        return EvaluationResult(
+            metric_name=DeepEvalFaithfulnessExperiment.METRIC_NAME,
+            score=metric.score,
+            reason=metric.reason,
+            llm_model_name=metric.model.model_name,
+            related_analysis=related_analysis,
+        )
 
     @staticmethod
     @observe
@@ -42,37 +162,75 @@ class DeepEvalFaithfulnessExperiment(MetricExperimentBase):
     ) -> EvaluationResult | List[EvaluationResult]:
         # Add an ID to analysis parts.
         model = _get_model(EVAL_MODEL)
-        text_to_evaluate = [("summary", analysis.summary)]
-        for item in analysis.questions:
-            text_to_evaluate.append((item.question, item.answer))
+        text_to_evaluate = _get_text_to_evaluate(analysis)
+        contexts = analysis_contexts(analysis, notice_text)
         metric = FaithfulnessMetric(model=model, truths_extraction_limit=10)
 
         results = []
-        for i, text in enumerate(text_to_evaluate):
+        for i, (text, context) in enumerate(zip(text_to_evaluate, contexts)):
             logger.info(
                 f"DeepEval Faithfulness: Evaluating step {i + 1} of {len(text_to_evaluate)}"
             )
             test_case = LLMTestCase(
                 input="",
-                retrieval_context=[notice_text],
+                retrieval_context=context,
                 actual_output=text[1],
             )
-            metric.measure(test_case)
-            logger.info(f"DeepEval reports cost of {metric.evaluation_cost}")
+            measurement = _measure(
+                metric, test_case, DeepEvalFaithfulnessExperiment.JUDGE_REQUESTS
+            )
             results.append(
-                EvaluationResult(
-                    metric_name=DeepEvalFaithfulnessExperiment.METRIC_NAME,
-                    score=metric.score,
-                    reason=metric.reason,
-                    llm_model_name=model.model_name,
-                    related_analysis=text[0],
+                measurement.apply(
+                    DeepEvalFaithfulnessExperiment._to_result(metric, text[0])
                 )
             )
         return results
 
+    @staticmethod
+    @observe
+    async def a_run_eval(
+        analysis: Analysis, notice_text: str, notice_path: str
+    ) -> EvaluationResult | List[EvaluationResult]:
+        model = _get_model(EVAL_MODEL)
+        text_to_evaluate = _get_text_to_evaluate(analysis)
+        contexts = analysis_contexts(analysis, notice_text)
+        # Metrics hold the state of their last measurement, so each part gets its own.
+        metrics = [
+            FaithfulnessMetric(model=model, truths_extraction_limit=10)
+            for _ in text_to_evaluate
+        ]
+        logger.info(
+            f"DeepEval Faithfulness: Evaluating {len(text_to_evaluate)} steps concurrently"
+        )
+        measurements = await asyncio.gather(
+            *(
+                _a_measure(
+                    metric,
+                    LLMTestCase(
+                        input="",
+                        retrieval_context=context,
+                        actual_output=text[1],
+                    ),
+                    DeepEvalFaithfulnessExperiment.JUDGE_REQUESTS,
+                )
+                for metric, text, context in zip(metrics, text_to_evaluate, contexts)
+            )
+        )
+        return [
+            measurement.apply(
+                DeepEvalFaithfulnessExperiment._to_result(metric, text[0])
+            )
+            for measurement, metric, text in zip(
+                measurements, metrics, text_to_evaluate
+            )
+        ]
+
 
 class DeepEvalAnswerRelevancyExperiment(MetricExperimentBase):
     METRIC_NAME = "deep_eval_answer_relevancy"
+    JUDGE_MODEL = EVAL_MODEL
+    # Statements, verdicts and reason.
+    JUDGE_REQUESTS = 3
 
     QUESTION_MAP = {
         "Required Actions": "**Required Actions**: What specific actions, if any, must the recipient take after receiving this notice? Include deadlines and consequences of inaction.",
@@ -81,6 +239,30 @@ class DeepEvalAnswerRelevancyExperiment(MetricExperimentBase):
         "Effectiveness Improvements": "**Effectiveness Improvements**: Identify the most significant changes that would make this document more effective for the recipient, focusing on clarity, accessibility, and actionability.",
     }
 
+    @staticmethod
+    def _get_question(analysis: Analysis, item: AnalysisQuestion) -> str:
+        question = item.question.strip()
+        if (
+            analysis.prompt_name in ("prompt_2", "prompt_2_v2")
+            and question in DeepEvalAnswerRelevancyExperiment.QUESTION_MAP.keys()
+        ):
+            logger.info("Using expanded question for prompt_2.")
+            question = DeepEvalAnswerRelevancyExperiment.QUESTION_MAP[question]
+        return question
+
+    @staticmethod
+    def _to_result(
+        metric: AnswerRelevancyMetric, item: AnalysisQuestion
+    ) -> EvaluationResult:
+        logger.info(f"DeepEval reports cost of {metric.evaluation_cost}")
+        return EvaluationResult(
+            metric_name=DeepEvalAnswerRelevancyExperiment.METRIC_NAME,
+            score=metric.score,
+            reason=metric.reason,
+            llm_model_name=metric.model.model_name,
+            related_analysis=item.question,
+        )
+
     @staticmethod
     @observe
     def run_eval(
@@ -94,33 +276,74 @@ class DeepEvalAnswerRelevancyExperiment(MetricExperimentBase):
             logger.info(
                 f"DeepEval Answer Relevancy: Evaluating step {i + 1} of {len(analysis.questions)}"
             )
-            question = item.question.strip()
-            if (
-                analysis.prompt_name == "prompt_2"
-                and question in DeepEvalAnswerRelevancyExperiment.QUESTION_MAP.keys()
-            ):
-                logger.info("Using expanded question for prompt_2.")
-                question = DeepEvalAnswerRelevancyExperiment.QUESTION_MAP[question]
             test_case = LLMTestCase(
-                input=question,
+                input=DeepEvalAnswerRelevancyExperiment._get_question(analysis, item),
                 actual_output=item.answer,
             )
-            metric.measure(test_case)
-            logger.info(f"DeepEval reports cost of {metric.evaluation_cost}")
+            measurement = _measure(
+                metric, test_case, DeepEvalAnswerRelevancyExperiment.JUDGE_REQUESTS
+            )
             results.append(
-                EvaluationResult(
-                    metric_name=DeepEvalAnswerRelevancyExperiment.METRIC_NAME,
-                    score=metric.score,
-                    reason=metric.reason,
-                    llm_model_name=model.model_name,
-                    related_analysis=item.question,
+                measurement.apply(
+                    DeepEvalAnswerRelevancyExperiment._to_result(metric, item)
                 )
             )
         return results
 
+    @staticmethod
+    @observe
+    async def a_run_eval(
+        analysis: Analysis, notice_text: str, notice_path: str
+    ) -> EvaluationResult | List[EvaluationResult]:
+        model = _get_model(EVAL_MODEL)
+        metrics = [AnswerRelevancyMetric(model=model) for _ in analysis.questions]
+        logger.info(
+            f"DeepEval Answer Relevancy: Evaluating {len(analysis.questions)} steps concurrently"
+        )
+        measurements = await asyncio.gather(
+            *(
+                _a_measure(
+                    metric,
+                    LLMTestCase(
+                        input=DeepEvalAnswerRelevancyExperiment._get_question(
+                            analysis, item
+                        ),
+                        actual_output=item.answer,
+                    ),
+                    DeepEvalAnswerRelevancyExperiment.JUDGE_REQUESTS,
+                )
+                for metric, item in zip(metrics, analysis.questions)
+            )
+        )
+        return [
+            measurement.apply(
+                DeepEvalAnswerRelevancyExperiment._to_result(metric, item)
+            )
+            for measurement, metric, item in zip(
+                measurements, metrics, analysis.questions
+            )
+        ]
+
 
 class DeepEvalGEvalExperiment(MetricExperimentBase):
     METRIC_NAME = "deep_eval_g_eval"
+    JUDGE_MODEL = EVAL_MODEL
+    # Single judge samples vary, so runs with --samples score analyses repeatedly.
+    SAMPLEABLE = True
+    # Evaluation steps are provided, so each measurement is a single scoring request.
+    JUDGE_REQUESTS = 1
+
+    @staticmethod
+    def _to_result(metric: GEval, related_analysis: str) -> EvaluationResult:
+        logger.info(f"DeepEval reports cost of {metric.evaluation_cost}")
+        metric_name = metric.name.lower().replace(" ", "_")
+        return EvaluationResult(
+            metric_name=f"{DeepEvalGEvalExperiment.METRIC_NAME}:{metric_name}",
+            score=metric.score,
+            reason=metric.reason,
+            llm_model_name=metric.model.model_name,
+            related_analysis=related_analysis,
+        )
 
     @staticmethod
     def _run_g_eval_metrics(
@@ -129,26 +352,21 @@ class DeepEvalGEvalExperiment(MetricExperimentBase):
         results = []
         for metric in metrics:
             logger.info(f"DeepEval GEval {metric.name}: Evaluating {related_analysis}")
-            metric.measure(test_case)
-            logger.info(f"DeepEval reports cost of {metric.evaluation_cost}")
+            measurement = _measure(
+                metric, test_case, DeepEvalGEvalExperiment.JUDGE_REQUESTS
+            )
             results.append(
-                EvaluationResult(
-                    metric_name=f"{DeepEvalGEvalExperiment.METRIC_NAME}:{metric.name.lower().replace(" ", "_")}",
-                    score=metric.score,
-                    reason=metric.reason,
-                    llm_model_name=metric.model.model_name,
-                    related_analysis=related_analysis,
+                measurement.apply(
+                    DeepEvalGEvalExperiment._to_result(metric, related_analysis)
                 )
             )
         return results
 
     @staticmethod
-    @observe
-    def run_eval(
-        analysis: Analysis, notice_text: str, notice_path: str
-    ) -> EvaluationResult | List[EvaluationResult]:
-        # Add an ID to analysis parts.
-        model = _get_model(EVAL_MODEL)
+    def _build_metrics(model: DeepEvalBaseLLM) -> tuple[List[GEval], GEval]:
+        """
+        Builds fresh GEval metrics for the analysis parts and the summary-only metric.
+        """
         summary_metric = GEval(
             model=model,
             name="Summarization Correctness",
@@ -205,6 +423,34 @@ class DeepEvalGEvalExperiment(MetricExperimentBase):
                 ],
             ),
         ]
+        return metrics, summary_metric
+
+    @staticmethod
+    async def _a_run_g_eval_metrics(
+        metrics: List[GEval], test_case: LLMTestCase, related_analysis: str
+    ) -> List[EvaluationResult]:
+        logger.info(f"DeepEval GEval: Evaluating {related_analysis} concurrently")
+        measurements = await asyncio.gather(
+            *(
+                _a_measure(metric, test_case, DeepEvalGEvalExperiment.JUDGE_REQUESTS)
+                for metric in metrics
+            )
+        )
+        return [
+            measurement.apply(
+                DeepEvalGEvalExperiment._to_result(metric, related_analysis)
+            )
+            for measurement, metric in zip(measurements, metrics)
+        ]
+
+    @staticmethod
+    @observe
+    def run_eval(
+        analysis: Analysis, notice_text: str, notice_path: str
+    ) -> EvaluationResult | List[EvaluationResult]:
+        # Add an ID to analysis parts.
+        model = _get_model(EVAL_MODEL)
+        metrics, summary_metric = DeepEvalGEvalExperiment._build_metrics(model)
         results = []
         test_case = LLMTestCase(
             input=notice_text,
@@ -226,3 +472,161 @@ class DeepEvalGEvalExperiment(MetricExperimentBase):
                 )
             )
         return results
+
+    @staticmethod
+    @observe
+    async def a_run_eval(
+        analysis: Analysis, notice_text: str, notice_path: str
+    ) -> EvaluationResult | List[EvaluationResult]:
+        model = _get_model(EVAL_MODEL)
+        # Metrics hold the state of their last measurement, so each part gets its own.
+        metrics, summary_metric = DeepEvalGEvalExperiment._build_metrics(model)
+        part_runs = [
+            DeepEvalGEvalExperiment._a_run_g_eval_metrics(
+                metrics + [summary_metric],
+                LLMTestCase(input=notice_text, actual_output=analysis.summary),
+                "summary",
+            )
+        ]
+        for item in analysis.questions:
+            metrics, _ = DeepEvalGEvalExperiment._build_metrics(model)
+            part_runs.append(
+                DeepEvalGEvalExperiment._a_run_g_eval_metrics(
+                    metrics,
+                    LLMTestCase(input=notice_text, actual_output=item.answer),
+                    item.question,
+                )
+            )
+        results = []
+        for part_results in await asyncio.gather(*part_runs):
+            results.extend(part_results)
+        return results
+
+
+class PartVerdict(BaseModel):
+    id: str = Field(description="The ID of the statement being judged")
+    score: float = Field(
+        description="The fraction of the statement's claims supported by the notice, from 0 to 1"
+    )
+    reason: str = Field(description="A one sentence justification for the score")
+
+
+class BatchVerdicts(BaseModel):
+    verdicts: List[PartVerdict]
+
+
+class DeepEvalBatchFaithfulnessExperiment(MetricExperimentBase):
+    """
+    Judges the faithfulness of every part of every analysis of a notice in one request.
+
+    The per-part metrics above send the notice once per summary and question. Here the notice
+    is sent once per document and the judge scores all parts against it together, which cuts
+    prompt tokens and round trips by roughly the number of parts.
+
+    Its prompt is our own rather than DeepEval's, and its scores haven't been checked against
+    deep_eval_faithfulness, so it's left out of the default suite. Run it by name.
+    """
+
+    METRIC_NAME = "deep_eval_batch_faithfulness"
+    JUDGE_MODEL = EVAL_MODEL
+    BATCH_SCOPE = BATCH_DOCUMENT
+    DEFAULT_SUITE = False
+
+    @staticmethod
+    def _format_part(
+        part_id: str, related_analysis: str, text: str, context: Optional[List[str]]
+    ) -> str:
+        statement = f"[{part_id}] ({related_analysis})\n{text}"
+        if context is None:
+            return statement
+        excerpts = "\n\n".join(context)
+        return f"{statement}\nJudge this statement against only these excerpts:\n{excerpts}"
+
+    @staticmethod
+    def _build_prompt(notice_text: str, parts: List[tuple]) -> str:
+        statements = "\n\n".join(
+            DeepEvalBatchFaithfulnessExperiment._format_part(*part) for part in parts
+        )
+        return textwrap.dedent(
+            """
+            You are judging whether statements written about a SNAP notice are faithful to it.
+
+            For each statement below, break it into its factual claims and score it with the
+            fraction of those claims the notice supports, from 0 to 1. Claims that contradict the
+            notice or that it doesn't mention are unsupported. Opinions about the notice, such as
+            its reading level, count as supported when the notice's text reasonably backs them.
+            Statements given excerpts of the notice are judged against those excerpts alone.
+
+            Return one verdict for every statement ID, with a one sentence reason.
+
+            **Notice:**
+            {notice}
+
+            **Statements:**
+            {statements}
+            """
+        ).format(notice=notice_text, statements=statements)
+
+    @staticmethod
+    def run_eval(
+        analysis: Analysis, notice_text: str, notice_path: str
+    ) -> EvaluationResult | List[EvaluationResult]:
+        return DeepEvalBatchFaithfulnessExperiment.run_eval_batch(
+            [EvaluationItem(analysis, notice_text, notice_path)]
+        )[0]
+
+    @classmethod
+    def run_eval_batch(
+        cls, items: List[EvaluationItem]
+    ) -> List[EvaluationResult | List[EvaluationResult]]:
+        # Every item of a document-scoped batch shares the same notice.
+        notice_text = items[0].notice_text
+        parts = []
+        for i, item in enumerate(items):
+            contexts = analysis_contexts(item.analysis, notice_text)
+            for j, ((related_analysis, text), context) in enumerate(
+                zip(_get_text_to_evaluate(item.analysis), contexts)
+            ):
+                # Parts judged against the whole notice don't repeat it.
+                if context == [notice_text]:
+                    context = None
+                parts.append((f"{i}.{j}", related_analysis, text, context))
+        logger.info(
+            f"DeepEval Batch Faithfulness: Evaluating {len(parts)} parts of {len(items)} analyses of {items[0].notice_path}"
+        )
+        model = _get_model(EVAL_MODEL)
+        prompt = cls._build_prompt(notice_text, parts)
+        output = call_with_rate_limit(
+            EVAL_MODEL,
+            lambda: model.generate(prompt, schema=BatchVerdicts),
+            tokens=estimate_tokens(prompt),
+        )
+        # Native models also report the cost of the call.
+        if isinstance(output, tuple):
+            output, cost = output
+            logger.info(f"DeepEval reports cost of {cost}")
+            record_usage(cost=cost)
+        if isinstance(output, str):
+            output = BatchVerdicts.model_validate_json(output)
+        elif isinstance(output, dict):
+            output = BatchVerdicts.model_validate(output)
+        verdicts = {verdict.id.strip("[] "): verdict for verdict in output.verdicts}
+        missing = [part_id for part_id, _, _, _ in parts if part_id not in verdicts]
+        if len(missing) > 0:
+            raise ValueError(
+                f"{EVAL_MODEL} returned no verdict for parts {', '.join(missing)} of {items[0].notice_path}"
+            )
+
+        results = [[] for _ in items]
+        for part_id, related_analysis, _, _ in parts:
+            verdict = verdicts[part_id]
+            results[int(part_id.split(".")[0])].append(
+                EvaluationResult(
+                    metric_name=cls.METRIC_NAME,
+                    score=min(max(verdict.score, 0.0), 1.0),
+                    reason=verdict.reason,
+                    llm_model_name=model.model_name,
+                    related_analysis=related_analysis,
+                )
+            )
+        return results
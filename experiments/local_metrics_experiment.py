@@ -0,0 +1,190 @@
+from typing import Dict, List
+
+from eval_eval.evaluation import EvaluationItem, MetricExperimentBase
+from eval_eval.schema import Analysis, EvaluationResult
+from eval_eval.text import (
+    extract_dates,
+    ngrams,
+    sentence_count,
+    syllable_count,
+    tokens,
+    words,
+)
+
+"""
+Local, deterministic metrics that don't call an LLM judge.
+
+They score a whole manifest in moments, so they make a free smoke test and a fast pre-filter
+before running expensive judges. They're CPU-bound, so each document's analyses are scored in
+one batch on a worker process and every notice is tokenized once.
+"""
+
+# The grade level the analysis prompts ask notices to be written at.
+TARGET_GRADE_LEVEL = 6
+# Overlap is measured on word bigrams.
+OVERLAP_N = 2
+
+
+def _get_parts(analysis: Analysis) -> List[tuple]:
+    parts = [("summary", analysis.summary)]
+    for item in analysis.questions:
+        parts.append((item.question, item.answer))
+    return parts
+
+
+class LocalReadabilityExperiment(MetricExperimentBase):
+    METRIC_NAME = "local_readability"
+    CPU_BOUND = True
+
+    @staticmethod
+    def run_eval(
+        analysis: Analysis, notice_text: str, notice_path: str
+    ) -> EvaluationResult | List[EvaluationResult]:
+        return LocalReadabilityExperiment.run_eval_batch(
+            [EvaluationItem(analysis, notice_text, notice_path)]
+        )[0]
+
+    @classmethod
+    def run_eval_batch(
+        cls, items: List[EvaluationItem]
+    ) -> List[List[EvaluationResult]]:
+        """
+        Scores the summary and every answer with the Flesch-Kincaid grade, Flesch reading
+        ease and Gunning fog formulas, computed part by part.
+        """
+        results: List[List[EvaluationResult]] = []
+        for item in items:
+            item_results = []
+            for related_analysis, text in _get_parts(item.analysis):
+                for name, score in cls._scores(text).items():
+                    item_results.append(
+                        EvaluationResult(
+                            metric_name=f"{cls.METRIC_NAME}:{name}",
+                            score=round(score, 2),
+                            related_analysis=related_analysis,
+                            details=(
+                                {"target_grade_level": TARGET_GRADE_LEVEL}
+                                if name == "flesch_kincaid_grade"
+                                else None
+                            ),
+                        )
+                    )
+            results.append(item_results)
+        return results
+
+    @staticmethod
+    def _scores(text: str) -> Dict[str, float]:
+        """
+        Computes each readability formula from the text's words, sentences and syllables.
+        """
+        syllables = [syllable_count(word) for word in words(text)]
+        word_count = max(len(syllables), 1)
+        words_per_sentence = word_count / sentence_count(text)
+        syllables_per_word = sum(syllables) / word_count
+        complex_word_rate = sum(1 for count in syllables if count >= 3) / word_count
+        return {
+            "flesch_kincaid_grade": (
+                0.39 * words_per_sentence + 11.8 * syllables_per_word - 15.59
+            ),
+            "flesch_reading_ease": (
+                206.835 - 1.015 * words_per_sentence - 84.6 * syllables_per_word
+            ),
+            "gunning_fog": 0.4 * (words_per_sentence + 100 * complex_word_rate),
+        }
+
+
+class LocalOverlapExperiment(MetricExperimentBase):
+    METRIC_NAME = "local_overlap"
+    CPU_BOUND = True
+
+    @staticmethod
+    def run_eval(
+        analysis: Analysis, notice_text: str, notice_path: str
+    ) -> EvaluationResult | List[EvaluationResult]:
+        return LocalOverlapExperiment.run_eval_batch(
+            [EvaluationItem(analysis, notice_text, notice_path)]
+        )[0]
+
+    @classmethod
+    def run_eval_batch(
+        cls, items: List[EvaluationItem]
+    ) -> List[List[EvaluationResult]]:
+        """
+        Measures how much of each part is grounded in the notice's wording: the share of its
+        bigrams that appear in the notice, and the share of its words that don't.
+        """
+        notices: Dict[str, tuple] = {}
+        results: List[List[EvaluationResult]] = []
+        for item in items:
+            if item.notice_path not in notices:
+                notice_tokens = tokens(item.notice_text)
+                notices[item.notice_path] = (
+                    set(notice_tokens),
+                    set(ngrams(notice_tokens, OVERLAP_N)),
+                )
+            vocabulary, notice_ngrams = notices[item.notice_path]
+            item_results = []
+            for related_analysis, text in _get_parts(item.analysis):
+                part_tokens = tokens(text)
+                part_ngrams = ngrams(part_tokens, OVERLAP_N)
+                overlap = sum(1 for ngram in part_ngrams if ngram in notice_ngrams)
+                novel = sum(1 for token in part_tokens if token not in vocabulary)
+                item_results.append(
+                    EvaluationResult(
+                        metric_name=f"{cls.METRIC_NAME}:bigram_precision",
+                        score=overlap / len(part_ngrams) if part_ngrams else 0.0,
+                        related_analysis=related_analysis,
+                    )
+                )
+                item_results.append(
+                    EvaluationResult(
+                        metric_name=f"{cls.METRIC_NAME}:novel_token_rate",
+                        score=novel / len(part_tokens) if part_tokens else 0.0,
+                        related_analysis=related_analysis,
+                    )
+                )
+            results.append(item_results)
+        return results
+
+
+class LocalDateCoverageExperiment(MetricExperimentBase):
+    METRIC_NAME = "local_date_coverage"
+    CPU_BOUND = True
+
+    @staticmethod
+    def run_eval(
+        analysis: Analysis, notice_text: str, notice_path: str
+    ) -> EvaluationResult | List[EvaluationResult]:
+        return LocalDateCoverageExperiment.run_eval_batch(
+            [EvaluationItem(analysis, notice_text, notice_path)]
+        )[0]
+
+    @classmethod
+    def run_eval_batch(cls, items: List[EvaluationItem]) -> List[EvaluationResult]:
+        """
+        Scores the share of the notice's dates and deadlines that the analysis mentions.
+        """
+        notice_dates: Dict[str, set] = {}
+        results = []
+        for item in items:
+            if item.notice_path not in notice_dates:
+                notice_dates[item.notice_path] = extract_dates(item.notice_text)
+            dates = notice_dates[item.notice_path]
+            mentioned = set()
+            for _, text in _get_parts(item.analysis):
+                mentioned |= extract_dates(text)
+            covered = dates & mentioned
+            results.append(
+                EvaluationResult(
+                    metric_name=cls.METRIC_NAME,
+                    # A notice without dates has nothing to miss.
+                    score=len(covered) / len(dates) if dates else 1.0,
+                    reason=f"Mentions {len(covered)} of {len(dates)} dates and deadlines in the notice.",
+                    details={
+                        "covered": sorted(covered),
+                        "missing": sorted(dates - covered),
+                        "not_in_notice": sorted(mentioned - dates),
+                    },
+                )
+            )
+        return results
@@ -1,70 +1,162 @@
-from typing import List
+import math
+import os
+from pathlib import Path
+from typing import List, Optional
 
 import mlflow
 from mlflow.metrics.genai import faithfulness
 import pandas as pd
 
-from eval_eval.evaluation import MetricExperimentBase
+from eval_eval.evaluation import (
+    BATCH_MANIFEST,
+    EvaluationItem,
+    IncompleteResults,
+    MetricExperimentBase,
+)
+from eval_eval.instrumentation import record_judge_calls
+from eval_eval.logger import logger
+from eval_eval.preprocessing import analysis_contexts
+from eval_eval.rate_limit import estimate_tokens, get_rate_limiter, items_per_minute
 from eval_eval.schema import Analysis, EvaluationResult
 
+# Where runs are tracked when MLFLOW_TRACKING_URI isn't set.
+DEFAULT_TRACKING_DIR = "mlruns"
+
+
 class MLFlowFaithfulnessExperiment(MetricExperimentBase):
     METRIC_NAME = "mlflow_faithfulness"
     MODEL_NAME = "openai:/gpt-4.1-mini"
+    JUDGE_MODEL = MODEL_NAME
+    # Every analysis in the manifest is scored by one mlflow.evaluate call under one run,
+    # rather than paying run and tracking store overhead for every five rows.
+    BATCH_SCOPE = BATCH_MANIFEST
+    # MLflow tracks the active run globally, so evaluations run one at a time.
+    MAX_CONCURRENCY = 1
+    # The most rows the metric's judge scores at once, which is MLflow's own default.
+    MAX_WORKERS = 10
+    # Roughly how long the judge takes to score one row. Turns its budget into workers.
+    SECONDS_PER_ROW = 4
 
     @staticmethod
-    def run_eval(
-            analysis: Analysis, notice_text: str, notice_path: str
-    ) -> EvaluationResult | List[EvaluationResult]:
-
-        faithfulness_metric = faithfulness(model=MLFlowFaithfulnessExperiment.MODEL_NAME)
-
-        # MLFlow expects to evaluate "live"; that is, it expects a set of inputs and an "LLM".
-        # We can simulate the LLM using a simply python function that returns the pre-computed outputs.
-        #
-        # Construct the input data and the input-to-ouput function
-        input_data = {
-            "inputs": [],
-            "context": []
-        }
-        output_data = []
+    def _build_rows(items: List[EvaluationItem]) -> pd.DataFrame:
+        """
+        Builds one row per analysis part. The item and related_analysis columns map each
+        scored row back to the analysis it came from.
+        """
+        rows = []
+        for item_index, item in enumerate(items):
+            contexts = analysis_contexts(item.analysis, item.notice_text)
+            rows.append(
+                {
+                    "item": item_index,
+                    "related_analysis": "summary",
+                    "inputs": "summary",
+                    "context": "\n\n".join(contexts[0]),
+                    "outputs": item.analysis.summary,
+                }
+            )
+            for question, context in zip(item.analysis.questions, contexts[1:]):
+                rows.append(
+                    {
+                        "item": item_index,
+                        "related_analysis": question.question,
+                        "inputs": question.question,
+                        "context": "\n\n".join(context),
+                        "outputs": question.answer,
+                    }
+                )
+        return pd.DataFrame(rows)
 
-        input_data["inputs"].append("summary")
-        input_data["context"].append(notice_text)
-        output_data.append(analysis.summary)
+    @staticmethod
+    def _set_tracking_uri() -> None:
+        # Track to a local file store unless the environment points somewhere else.
+        if os.getenv("MLFLOW_TRACKING_URI") is None:
+            mlflow.set_tracking_uri(Path(DEFAULT_TRACKING_DIR).absolute().as_uri())
 
-        for item in analysis.questions:
-            input_data["inputs"].append(item.question)
-            input_data["context"].append(notice_text)
-            output_data.append(item.answer)
+    @staticmethod
+    def run_eval(
+        analysis: Analysis, notice_text: str, notice_path: str
+    ) -> EvaluationResult | List[EvaluationResult]:
+        return MLFlowFaithfulnessExperiment.run_eval_batch(
+            [EvaluationItem(analysis, notice_text, notice_path)]
+        )[0]
 
-        simulated_llm = lambda inputs: output_data
+    @classmethod
+    def run_eval_batch(
+        cls, items: List[EvaluationItem]
+    ) -> List[List[EvaluationResult]]:
+        """
+        Scores every analysis with one mlflow.evaluate call under one MLflow run.
 
-        with mlflow.start_run() as run:
+        mlflow.evaluate makes its judge calls itself and turns their errors, 429s included,
+        into missing scores, so it can't be throttled or retried call by call. Instead the
+        metric's judge workers are sized to the judge's budgets, and its judge calls are
+        reserved on the shared limiter before it starts. Analyses with rows the judge failed
+        to score are returned as IncompleteResults, so they're scored again next run.
+        """
+        # MLflow can evaluate a static dataset whose outputs were already produced, so the
+        # pre-computed analysis parts are passed as the predictions column.
+        data = cls._build_rows(items)
+        tokens = sum(
+            estimate_tokens(context, outputs)
+            for context, outputs in zip(data["context"], data["outputs"])
+        )
+        # The faithfulness metric makes one judge request per row.
+        rows_per_minute = items_per_minute(
+            cls.MODEL_NAME, 1, math.ceil(tokens / max(len(data), 1))
+        )
+        workers = max(
+            1, min(cls.MAX_WORKERS, int(rows_per_minute * cls.SECONDS_PER_ROW / 60))
+        )
+        faithfulness_metric = faithfulness(model=cls.MODEL_NAME, max_workers=workers)
+        cls._set_tracking_uri()
+        logger.info(
+            f"MLflow Faithfulness: evaluating {len(data)} parts of {len(items)} analyses "
+            f"in one run with {workers} workers"
+        )
+        get_rate_limiter(cls.MODEL_NAME).acquire(requests=len(data), tokens=tokens)
+        record_judge_calls(len(data))
+        with mlflow.start_run(run_name=f"{cls.METRIC_NAME} ({len(items)} analyses)"):
             mlflow_results = mlflow.evaluate(
-                simulated_llm,
-                pd.DataFrame(input_data),
-                evaluators=None,
+                data=data,
+                predictions="outputs",
                 extra_metrics=[faithfulness_metric],
                 evaluator_config={
-                    "col_mapping": {
-                        "inputs": "inputs",
-                        "context": "context"
-                    }
-                }
+                    "col_mapping": {"inputs": "inputs", "context": "context"}
+                },
             )
 
-        mlflow.end_run()
+        results: List[List[EvaluationResult]] = [[] for _ in items]
+        complete = [True for _ in items]
+        for row in mlflow_results.tables["eval_results_table"].to_dict("records"):
+            result = cls._to_result(row, items)
+            if result is None:
+                complete[row["item"]] = False
+            else:
+                results[row["item"]].append(result)
+        return [
+            item_results if item_complete else IncompleteResults(item_results)
+            for item_results, item_complete in zip(results, complete)
+        ]
 
-        outputs = mlflow_results.tables['eval_results_table'].to_dict()
-        results = []
-        for i in range(0, len(outputs)):
-            results.append(
-                EvaluationResult(
-                    metric_name=MLFlowFaithfulnessExperiment.METRIC_NAME,
-                    score=outputs['faithfulness/v1/score'][i],
-                    reason=outputs['faithfulness/v1/justification'][i],
-                    related_analysis=outputs['inputs'][i],
-                    llm_model_name=MLFlowFaithfulnessExperiment.MODEL_NAME,
-                )
+    @classmethod
+    def _to_result(
+        cls, row: dict, items: List[EvaluationItem]
+    ) -> Optional[EvaluationResult]:
+        """
+        Converts a scored row to a result, or logs and returns None when the judge failed.
+        """
+        score = row.get("faithfulness/v1/score")
+        if score is None or math.isnan(score):
+            logger.warning(
+                f"MLflow Faithfulness: no score for {row['related_analysis']} of "
+                f"{items[row['item']].notice_path}: {row.get('faithfulness/v1/justification')}"
             )
-        return results
+            return None
+        return EvaluationResult(
+            metric_name=cls.METRIC_NAME,
+            score=score,
+            reason=row["faithfulness/v1/justification"],
+            related_analysis=row["related_analysis"],
+            llm_model_name=cls.MODEL_NAME,
+        )
@@ -1,10 +1,15 @@
-from typing import List
-import time
+import asyncio
+from typing import Any, List
 
 from opik.evaluation.metrics import Hallucination
+from opik.evaluation.models import LiteLLMChatModel
 
 from eval_eval.evaluation import MetricExperimentBase
+from eval_eval.instrumentation import measure, record_usage
+from eval_eval.judges import get_judge, register_judge_provider
 from eval_eval.logger import logger
+from eval_eval.preprocessing import analysis_contexts
+from eval_eval.rate_limit import a_call_with_rate_limit, call_with_rate_limit, estimate_tokens
 from eval_eval.schema import Analysis, EvaluationResult
 
 """
@@ -19,32 +24,105 @@ Resources:
 EVALUATION_MODEL = "gpt-4.1"
 
 
+class _UsageRecordingChatModel(LiteLLMChatModel):
+    """
+    A LiteLLMChatModel that records the tokens LiteLLM reports for each completion.
+    """
+
+    def generate_provider_response(self, messages: List[dict], **kwargs) -> Any:
+        response = super().generate_provider_response(messages, **kwargs)
+        _record_usage(response)
+        return response
+
+    async def agenerate_provider_response(self, messages: List[dict], **kwargs) -> Any:
+        response = await super().agenerate_provider_response(messages, **kwargs)
+        _record_usage(response)
+        return response
+
+
+def _record_usage(response: Any) -> None:
+    usage = getattr(response, "usage", None)
+    if usage is not None:
+        record_usage(
+            prompt_tokens=usage.prompt_tokens,
+            completion_tokens=usage.completion_tokens,
+        )
+
+
+register_judge_provider(
+    "opik", lambda model_name: _UsageRecordingChatModel(model_name=model_name)
+)
+
+
 class OpikHallucinationExperiment(MetricExperimentBase):
     METRIC_NAME = "opik_eval_hallucination"
+    JUDGE_MODEL = EVALUATION_MODEL
+    # Single judge samples vary, so runs with --samples score analyses repeatedly.
+    SAMPLEABLE = True
+
+    @staticmethod
+    def _get_text_to_evaluate(analysis: Analysis, notice_text: str) -> List[tuple]:
+        # Add an ID and the context to judge against to analysis parts.
+        contexts = analysis_contexts(analysis, notice_text)
+        text_to_evaluate = [("summary", analysis.summary, contexts[0])]
+        for item, context in zip(analysis.questions, contexts[1:]):
+            text_to_evaluate.append((item.question, item.answer, context))
+        return text_to_evaluate
+
+    @staticmethod
+    def _to_result(result, related_analysis: str) -> EvaluationResult:
+        return EvaluationResult(
+            metric_name=OpikHallucinationExperiment.METRIC_NAME,
+            score=result.value,
+            reason=result.reason,
+            llm_model_name=EVALUATION_MODEL,
+            related_analysis=related_analysis
+        )
+
+    @staticmethod
+    def _score(metric: Hallucination, text: tuple) -> EvaluationResult:
+        with measure() as measurement:
+            result = call_with_rate_limit(
+                EVALUATION_MODEL,
+                lambda: metric.score(input=text[0], output=text[1], context=text[2]),
+                tokens=estimate_tokens(text[0], text[1], *text[2]),
+            )
+        return measurement.apply(OpikHallucinationExperiment._to_result(result, text[0]))
+
+    @staticmethod
+    async def _a_score(metric: Hallucination, text: tuple) -> EvaluationResult:
+        with measure() as measurement:
+            result = await a_call_with_rate_limit(
+                EVALUATION_MODEL,
+                lambda: metric.ascore(input=text[0], output=text[1], context=text[2]),
+                tokens=estimate_tokens(text[0], text[1], *text[2]),
+            )
+        return measurement.apply(OpikHallucinationExperiment._to_result(result, text[0]))
 
     @staticmethod
     def run_eval(
             analysis: Analysis, notice_text: str, notice_path: str
     ) -> EvaluationResult | List[EvaluationResult]:
-        # Add an ID to analysis parts.
-        text_to_evaluate = [("summary", analysis.summary)]
-        for item in analysis.questions:
-            text_to_evaluate.append((item.question, item.answer))
-        metric = Hallucination(model=EVALUATION_MODEL)
+        text_to_evaluate = OpikHallucinationExperiment._get_text_to_evaluate(analysis, notice_text)
+        metric = Hallucination(model=get_judge("opik", EVALUATION_MODEL))
 
-        time.sleep(10)
         results = []
         for i, text in enumerate(text_to_evaluate):
             logger.info(f"Opik Hallucination: Evaluating step {i + 1} of {len(text_to_evaluate)}")
-            result = metric.score(input=text[0], output=text[1], context=[notice_text])
-            results.append(
-                EvaluationResult(
-                    metric_name=OpikHallucinationExperiment.METRIC_NAME,
-                    score=result.value,
-                    reason=result.reason,
-                    llm_model_name=EVALUATION_MODEL,
-                    related_analysis=text[0]
-                )
-            )
+            results.append(OpikHallucinationExperiment._score(metric, text))
 
         return results
+
+    @staticmethod
+    async def a_run_eval(
+            analysis: Analysis, notice_text: str, notice_path: str
+    ) -> EvaluationResult | List[EvaluationResult]:
+        text_to_evaluate = OpikHallucinationExperiment._get_text_to_evaluate(analysis, notice_text)
+        metric = Hallucination(model=get_judge("opik", EVALUATION_MODEL))
+
+        logger.info(f"Opik Hallucination: Evaluating {len(text_to_evaluate)} steps concurrently")
+        return list(
+            await asyncio.gather(
+                *(OpikHallucinationExperiment._a_score(metric, text) for text in text_to_evaluate)
+            )
+        )
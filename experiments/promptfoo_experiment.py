@@ -1,59 +1,53 @@
+import math
 import os
 import yaml
 import subprocess
 import json
+import tempfile
 from typing import List
 
 # Import the necessary components from the eval_eval package
-from eval_eval.evaluation import MetricExperimentBase
+from eval_eval.evaluation import BATCH_MANIFEST, EvaluationItem, IncompleteResults, MetricExperimentBase
+from eval_eval.instrumentation import Measurement
 from eval_eval.logger import logger
+from eval_eval.preprocessing import analysis_contexts
+from eval_eval.rate_limit import estimate_tokens, get_rate_limiter, items_per_minute
 from eval_eval.schema import Analysis, EvaluationResult, Manifest, Document, AnalysisQuestion
 
 
 # --- Promptfoo Evaluation Class ---
 class PromptfooFaithfulnessExperiment(MetricExperimentBase):
     METRIC_NAME = "promptfoo_faithfulness"
-    # These files will be dynamically named based on analysis properties to avoid conflicts
-    # when processing multiple analyses.
-    CONFIG_FILE_BASE = "promptfooconfig"
-    OUTPUT_FILE_BASE = "promptfoo_output"
+    JUDGE_MODEL = "openai:gpt-4.1"
+    # Every analysis in the manifest is scored by a single promptfoo run, which is far
+    # cheaper than starting a Node process per analysis.
+    BATCH_SCOPE = BATCH_MANIFEST
+    # The most tests promptfoo evaluates at once within its run.
+    PROMPTFOO_CONCURRENCY = 8
+    # Context faithfulness extracts claims, then judges them, for each test.
+    JUDGE_REQUESTS_PER_TEST = 2
+    # Roughly how long grading one test takes. Turns the judge's budget into a concurrency.
+    SECONDS_PER_TEST = 8
+    # Exit code promptfoo uses when the run completed but some tests failed their threshold.
+    EXIT_CODE_TEST_FAILURES = 100
+    PROVIDER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "promptfoo_provider.py")
 
     @staticmethod
-    def _generate_promptfoo_config(
-            analysis: Analysis, notice_text: str, model_name: str, config_output_filename: str
-    ) -> dict:
-        """Generates the promptfoo config dictionary for a single analysis."""
-        tests = []
-
-        # Evaluate summary
-        tests.append({
-            "vars": {
-                "query": "Write a 2-3 sentence summary of the notice.",
-                "context": notice_text,
-                "prompt": analysis.summary,
-            },
-            "assert": [
-                {
-                    "type": "context-faithfulness",
-                    "threshold": 0.5,  # Default threshold
-                    "provider": model_name,
-                }
-            ],
-            "description": f"Summary Faithfulness for {analysis.llm_model_name} with {analysis.prompt_name}",
-            "metadata": {
-                "related_analysis_part": "summary",
-                "llm_model_name": analysis.llm_model_name,
-                "prompt_name": analysis.prompt_name,
-            }
-        })
+    def _generate_tests(item_index: int, item: EvaluationItem, model_name: str) -> List[dict]:
+        """Generates the promptfoo tests for a single analysis."""
+        analysis = item.analysis
+        contexts = analysis_contexts(analysis, item.notice_text)
+        parts = [("summary", "Write a 2-3 sentence summary of the notice.", analysis.summary, "Summary")]
+        for i, question in enumerate(analysis.questions):
+            parts.append((question.question, question.question, question.answer, f"Question {i + 1}"))
 
-        # Evaluate questions and answers
-        for i, item in enumerate(analysis.questions):
+        tests = []
+        for (related_analysis_part, query, response, label), context in zip(parts, contexts):
             tests.append({
                 "vars": {
-                    "query": item.question,
-                    "context": notice_text,
-                    "prompt": item.answer,
+                    "query": query,
+                    "context": "\n\n".join(context),
+                    "prompt": response,
                 },
                 "assert": [
                     {
@@ -62,21 +56,70 @@ class PromptfooFaithfulnessExperiment(MetricExperimentBase):
                         "provider": model_name,
                     }
                 ],
-                "description": f"Question {i + 1} Faithfulness for {analysis.llm_model_name} with {analysis.prompt_name}",
+                "description": f"{label} Faithfulness for {analysis.llm_model_name} with {analysis.prompt_name} on {item.notice_path}",
+                # Used to fan results back out to the analysis they belong to.
                 "metadata": {
-                    "related_analysis_part": item.question,
+                    "item_index": item_index,
+                    "related_analysis_part": related_analysis_part,
                     "llm_model_name": analysis.llm_model_name,
                     "prompt_name": analysis.prompt_name,
+                    "notice_path": item.notice_path,
                 }
             })
+        return tests
 
-        config = {
-            "description": f"Faithfulness Evaluation for {analysis.llm_model_name} ({analysis.prompt_name})",
-            "providers": [f"file://experiments/promptfoo_provider.py"],
+    @staticmethod
+    def _generate_promptfoo_config(items: List[EvaluationItem], model_name: str) -> dict:
+        """Generates one promptfoo config covering every analysis."""
+        tests = []
+        for item_index, item in enumerate(items):
+            tests.extend(PromptfooFaithfulnessExperiment._generate_tests(item_index, item, model_name))
+        return {
+            "description": f"Faithfulness Evaluation of {len(items)} analyses",
+            "providers": [f"file://{PromptfooFaithfulnessExperiment.PROVIDER_PATH}"],
             "tests": tests,
-            "outputPath": config_output_filename  # Use the passed dynamic output filename
         }
-        return config
+
+    @staticmethod
+    def _parse_results(full_json_output: dict, item_count: int, model_name: str) -> List[List[EvaluationResult]]:
+        """Fans the results of a promptfoo run back out to each analysis by test metadata."""
+        evaluation_results: List[List[EvaluationResult]] = [[] for _ in range(item_count)]
+        test_case_results_list = full_json_output.get("results", {}).get("results", [])
+
+        for test_case_result in test_case_results_list:
+            metadata = test_case_result.get("metadata") or test_case_result.get("testCase", {}).get("metadata", {})
+            item_index = metadata.get("item_index")
+            if item_index is None:
+                logger.warning("Skipping promptfoo result without an item_index in its metadata.")
+                continue
+            grading_result = test_case_result.get("gradingResult") or {}
+            for assertion_result in grading_result.get("componentResults", []):
+                if assertion_result.get("assertion", {}).get("type", None) == "context-faithfulness":
+                    result = EvaluationResult(
+                        metric_name=PromptfooFaithfulnessExperiment.METRIC_NAME,
+                        score=assertion_result.get("score", 0),
+                        reason=assertion_result.get("reason", "No reason provided."),
+                        llm_model_name=model_name,
+                        related_analysis=metadata.get("related_analysis_part", "unknown"),
+                    )
+                    evaluation_results[item_index].append(
+                        PromptfooFaithfulnessExperiment._measure_test(test_case_result, grading_result).apply(result)
+                    )
+        return evaluation_results
+
+    @staticmethod
+    def _measure_test(test_case_result: dict, grading_result: dict) -> Measurement:
+        """Builds a test's measurement from the latency and grading tokens promptfoo reports."""
+        measurement = Measurement()
+        latency_ms = test_case_result.get("latencyMs")
+        measurement.duration = latency_ms / 1000 if latency_ms is not None else None
+        tokens_used = grading_result.get("tokensUsed") or {}
+        measurement.add(
+            judge_calls=PromptfooFaithfulnessExperiment.JUDGE_REQUESTS_PER_TEST,
+            prompt_tokens=tokens_used.get("prompt"),
+            completion_tokens=tokens_used.get("completion"),
+        )
+        return measurement
 
     @staticmethod
     def run_eval(
@@ -85,134 +128,127 @@ class PromptfooFaithfulnessExperiment(MetricExperimentBase):
         """
         Runs the faithfulness evaluation using promptfoo for a single analysis object.
         """
-        # Determine model name from analysis, fall back to a default if not present
-        # model_name = analysis.llm_model_name if analysis.llm_model_name else "llama3.1:8b"
-        model_name = "openai:gpt-4.1"
-
-        # Sanitize model and prompt names for filenames
-        sanitized_model_name = analysis.llm_model_name.replace(':', '_').replace('/', '_').replace('\\', '_')
-        sanitized_prompt_name = analysis.prompt_name.replace(':', '_').replace('/', '_').replace('\\', '_')
-
-        config_filename = os.path.join("experiments",
-                                       f"{PromptfooFaithfulnessExperiment.CONFIG_FILE_BASE}_{sanitized_model_name}_{sanitized_prompt_name}.yaml")
-        output_filename = os.path.join("experiments",
-                                       f"{PromptfooFaithfulnessExperiment.OUTPUT_FILE_BASE}_{sanitized_model_name}_{sanitized_prompt_name}.json")
+        return PromptfooFaithfulnessExperiment.run_eval_batch(
+            [EvaluationItem(analysis, notice_text, notice_path)]
+        )[0]
+
+    @classmethod
+    def run_eval_batch(
+        cls, items: List[EvaluationItem]
+    ) -> List[List[EvaluationResult]]:
+        """
+        Runs the faithfulness evaluation for every analysis in a single promptfoo run.
 
-        logger.info(f"Generating promptfoo config for analysis by {model_name} (Prompt: {analysis.prompt_name})")
-        config_data = PromptfooFaithfulnessExperiment._generate_promptfoo_config(
-            analysis, notice_text, model_name, output_filename  # Pass output_filename to config generator
+        promptfoo makes its judge calls itself, so they can't be throttled one by one. Instead
+        the run is paced with promptfoo's own concurrency and delay flags to stay within the
+        judge's budgets, and its judge calls are reserved on the shared limiter before it
+        starts. promptfoo retries rate limited requests itself. The config and output live in
+        a temporary directory that's removed once the results are parsed.
+        """
+        model_name = cls.JUDGE_MODEL
+        config_data = cls._generate_promptfoo_config(items, model_name)
+        tests = config_data["tests"]
+        tokens = sum(
+            estimate_tokens(test["vars"]["context"], test["vars"]["prompt"])
+            for test in tests
+        )
+        pacing_args = cls._pacing_args(
+            items_per_minute(
+                model_name,
+                cls.JUDGE_REQUESTS_PER_TEST,
+                math.ceil(tokens / max(len(tests), 1)),
+            )
+        )
+        logger.info(
+            f"Running promptfoo eval of {len(tests)} tests for {len(items)} analyses "
+            f"with {' '.join(pacing_args)}..."
+        )
+        get_rate_limiter(model_name).acquire(
+            requests=len(tests) * cls.JUDGE_REQUESTS_PER_TEST, tokens=tokens
         )
+        with tempfile.TemporaryDirectory(prefix="promptfoo_") as run_dir:
+            output = cls._run_promptfoo(
+                config_data, os.path.join(run_dir, "run"), pacing_args
+            )
+        results = cls._parse_results(output, len(items), model_name)
+        # Tests promptfoo couldn't grade have no result, so their analyses are scored again
+        # next run.
+        return [
+            item_results
+            if len(item_results) == len(item.analysis.questions) + 1
+            else IncompleteResults(item_results)
+            for item, item_results in zip(items, results)
+        ]
+
+    @classmethod
+    def _pacing_args(cls, tests_per_minute: float) -> List[str]:
+        """
+        The promptfoo flags that keep its judge calls within the judge's budgets.
 
+        Each concurrent test takes about SECONDS_PER_TEST, so the concurrency is how many the
+        budget keeps busy. When even one at a time would be too fast, promptfoo waits between
+        tests instead.
+        """
+        concurrency = min(
+            cls.PROMPTFOO_CONCURRENCY,
+            int(tests_per_minute * cls.SECONDS_PER_TEST / 60),
+        )
+        if concurrency >= 1:
+            return ["--max-concurrency", str(concurrency)]
+        delay = 60 / tests_per_minute - cls.SECONDS_PER_TEST
+        return ["--max-concurrency", "1", "--delay", str(math.ceil(delay * 1000))]
+
+    @classmethod
+    def _run_promptfoo(
+        cls, config_data: dict, path_prefix: str, pacing_args: List[str]
+    ) -> dict:
+        """
+        Runs promptfoo on a config and returns its JSON output.
+        """
+        config_filename = f"{path_prefix}_promptfooconfig.yaml"
+        output_filename = f"{path_prefix}_promptfoo_output.json"
         with open(config_filename, "w") as f:
             yaml.dump(config_data, f, sort_keys=False)
 
-        logger.info(f"{config_filename} generated. Running promptfoo eval...")
-
-        evaluation_results: List[EvaluationResult] = []
+        command = [
+            "promptfoo",
+            "eval",
+            "-c",
+            config_filename,
+            "--output",
+            output_filename,
+            *pacing_args,
+            "--no-progress-bar",
+        ]
         try:
-            command = [
-                "promptfoo",
-                "eval",
-                "-c", config_filename,
-                "--output", output_filename,
-                # "--no-auto-open", # Prevent browser from opening if running in CI/headless
-                # "--max-concurrent-evaluations", "1" # Limit concurrency for local Ollama
-            ]
-
-            process = subprocess.run(command, capture_output=True, text=True, check=True)
-            logger.info("promptfoo eval completed successfully.")
-            logger.debug(f"promptfoo stdout:\n{process.stdout}")
-            if process.stderr:
-                logger.warning(f"promptfoo stderr:\n{process.stderr}")
-
-            # Parse results from the output JSON file
-            results_data = {}
-            if os.path.exists(output_filename):
-                with open(output_filename, "r") as f:
-                    full_json_output = json.load(f)
-                # os.remove(output_filename) # Clean up output file
-            else:
-                logger.error(f"promptfoo output file not found: {output_filename}")
-                return []
-
-            test_case_results_list = full_json_output.get("results", {}).get("results", [])
-
-            for test_case_result in test_case_results_list:
-                for assertion_result in test_case_result.get("gradingResult", {}).get("componentResults", {}):
-                    if assertion_result.get("assertion", {}).get("type", None) == "context-faithfulness":
-                        score = assertion_result.get("score", 0)
-                        reason = assertion_result.get("reason", "No reason provided.")
-
-                        # Extract metadata
-                        related_analysis_part = test_case_result.get("metadata", {}).get(
-                            "related_analysis_part", "unknown")
-
-                        evaluation_results.append(
-                            EvaluationResult(
-                                metric_name=PromptfooFaithfulnessExperiment.METRIC_NAME,
-                                score=score,
-                                reason=reason,
-                                llm_model_name=model_name,
-                                related_analysis=related_analysis_part,
-                            )
-                        )
-            return evaluation_results
-
-        except subprocess.CalledProcessError as e:
-            if e.returncode == 100:
-                logger.info(f"promptfoo eval completed with exit code 100 (expected success for some cases).")
-                logger.debug(f"promptfoo stdout:\n{e.stdout}")
-                if e.stderr:
-                    logger.warning(f"promptfoo stderr:\n{e.stderr}")
-
-                # If exit code is 100, proceed with parsing results as it's considered a success
-                results_data = {}
-                if os.path.exists(output_filename):
-                    with open(output_filename, "r") as f:
-                        full_json_output = json.load(f)
-                else:
-                    logger.error(f"promptfoo output file not found after exit code 100: {output_filename}")
-                    return []
-
-                test_case_results_list = full_json_output.get("results", {}).get("results", [])
-
-                for test_case_result in test_case_results_list:
-                    for assertion_result in test_case_result.get("gradingResult", {}).get("componentResults", {}):
-                        if assertion_result.get("assertion", {}).get("type", None) == "context-faithfulness":
-                            score = assertion_result.get("score", 0)
-                            reason = assertion_result.get("reason", "No reason provided.")
-
-                            # Extract metadata
-                            related_analysis_part = test_case_result.get("metadata", {}).get(
-                                "related_analysis_part", "unknown")
-
-                            evaluation_results.append(
-                                EvaluationResult(
-                                    metric_name=PromptfooFaithfulnessExperiment.METRIC_NAME,
-                                    score=score,
-                                    reason=reason,
-                                    llm_model_name=model_name,
-                                    related_analysis=related_analysis_part,
-                                )
-                            )
-                return evaluation_results
-            else:
-                logger.error(f"promptfoo eval failed with unexpected exit code {e.returncode}: {e}")
-                logger.error(f"Stdout: {e.stdout}")
-                logger.error(f"Stderr: {e.stderr}")
-                raise  # Re-raise for other actual errors
+            process = subprocess.run(command, capture_output=True, text=True)
         except FileNotFoundError:
-            logger.error("Error: 'promptfoo' command not found. Is promptfoo installed and in your PATH?")
-            logger.error("Install with: `npm install -g promptfoo` or `brew install promptfoo`.")
-            raise
-        except Exception as e:
-            logger.error(f"An unexpected error occurred: {e}")
+            logger.error(
+                "Error: 'promptfoo' command not found. Is promptfoo installed and in your PATH?"
+            )
+            logger.error(
+                "Install with: `npm install -g promptfoo` or `brew install promptfoo`."
+            )
             raise
-        finally:
-            # Clean up the generated config file even if an error occurs
-            if os.path.exists(config_filename):
-                # os.remove(config_filename) # Commented out to keep file for promptfoo view
-                logger.info(f"Kept {config_filename} for promptfoo view.")
+
+        if process.returncode not in (0, cls.EXIT_CODE_TEST_FAILURES):
+            logger.error(
+                f"promptfoo eval failed with unexpected exit code {process.returncode}"
+            )
+            logger.error(f"Stdout: {process.stdout}")
+            logger.error(f"Stderr: {process.stderr}")
+            raise subprocess.CalledProcessError(
+                process.returncode, command, process.stdout, process.stderr
+            )
+        logger.info(f"promptfoo eval completed with exit code {process.returncode}.")
+        logger.debug(f"promptfoo stdout:\n{process.stdout}")
+        if process.stderr:
+            logger.warning(f"promptfoo stderr:\n{process.stderr}")
+
+        if not os.path.exists(output_filename):
+            raise RuntimeError(f"promptfoo output file not found: {output_filename}")
+        with open(output_filename, "r") as f:
+            return json.load(f)
 
 
 # --- Main Execution Block ---
@@ -238,38 +274,20 @@ if __name__ == "__main__":
         logger.error(f"An error occurred while loading manifest: {e}")
         exit(1)
 
-    # Instantiate the experiment
-    experiment_instance = PromptfooFaithfulnessExperiment()
-
     # Iterate through documents and their analyses to run the evaluation
     updated_manifest = hydrated_manifest
+    items = [
+        EvaluationItem(analysis, document.text, document.path)
+        for document in updated_manifest.documents
+        for analysis in document.notice_analysis
+    ]
 
     logger.info("Starting promptfoo faithfulness evaluation across all analyses in the manifest...")
-    for i, document in enumerate(updated_manifest.documents):
-        logger.info(f"\n--- Evaluating Document: {document.path} ({i + 1}/{len(updated_manifest.documents)}) ---")
-        for j, analysis in enumerate(document.notice_analysis):
-            logger.info(
-                f"Processing analysis by model: {analysis.llm_model_name}, prompt: {analysis.prompt_name} "
-                f"({j + 1}/{len(document.notice_analysis)})"
-            )
-
-            try:
-                # Call run_eval for each analysis, providing the document text
-                results_for_analysis = experiment_instance.run_eval(
-                    analysis=analysis,
-                    notice_text=document.text,
-                    notice_path=document.path
-                )
-
-                # Append the results to the analysis's evaluation_results list
-                if not analysis.evaluation_results:
-                    analysis.evaluation_results = []  # Ensure it's a list
-                analysis.evaluation_results.extend(results_for_analysis)
-                logger.info(f"Successfully evaluated analysis. Added {len(results_for_analysis)} promptfoo results.")
-            except Exception as e:
-                logger.error(
-                    f"Failed to evaluate analysis for model {analysis.llm_model_name}, prompt {analysis.prompt_name}: {e}")
-                # Continue to next analysis even if one fails
+    # One promptfoo run scores every analysis in the manifest.
+    results_for_analyses = PromptfooFaithfulnessExperiment.run_eval_batch(items)
+    for item, results_for_analysis in zip(items, results_for_analyses):
+        item.analysis.evaluation_results.extend(results_for_analysis)
+    logger.info(f"Successfully evaluated {len(items)} analyses.")
 
     logger.info("\n--- All evaluations completed. Final Manifest structure: ---")
     # save the updated_manifest back to a new JSON file if needed, comment out for now
@@ -1,22 +1,129 @@
-from typing import List
+import asyncio
+import math
+from functools import partial
+from typing import List, Tuple
 
+from langchain_core.outputs import LLMResult
+from langchain_core.prompt_values import PromptValue
 from langchain_openai import ChatOpenAI
-from ragas.dataset_schema import SingleTurnSample
+from ragas import aevaluate
+from ragas.cost import CostCallbackHandler, get_token_usage_for_openai
+from ragas.dataset_schema import EvaluationDataset, SingleTurnSample
 from ragas.llms import LangchainLLMWrapper
 from ragas.metrics import Faithfulness
+from ragas.run_config import RunConfig
 
-from eval_eval.evaluation import MetricExperimentBase
+from eval_eval.evaluation import (
+    BATCH_MANIFEST,
+    EvaluationItem,
+    IncompleteResults,
+    MetricExperimentBase,
+)
+from eval_eval.instrumentation import Measurement, measure, record_usage
+from eval_eval.judges import (
+    close_loop_clients,
+    get_async_http_client,
+    get_http_client,
+    get_judge,
+    register_judge_provider,
+)
 from eval_eval.logger import logger
+from eval_eval.preprocessing import analysis_contexts
+from eval_eval.rate_limit import (
+    a_call_with_rate_limit,
+    call_with_rate_limit,
+    estimate_tokens,
+)
 from eval_eval.schema import Analysis, EvaluationResult
 
 MODEL_NAME = "gpt-4.1"
+# How many samples Ragas scores at once when evaluating a whole dataset.
+MAX_WORKERS = 16
 
-open_ai_model = ChatOpenAI(model=MODEL_NAME)
-ragas_llm = LangchainLLMWrapper(langchain_llm=open_ai_model)
+
+class _RateLimitedLLM(LangchainLLMWrapper):
+    """
+    A Ragas judge that waits for its model's rate limit before every request.
+
+    Ragas makes a varying number of requests per sample and retries failed ones itself, so
+    limiting each request, beneath Ragas' retries, lets the limiter see and back off on 429s.
+    """
+
+    def generate_text(self, prompt: PromptValue, *args, **kwargs) -> LLMResult:
+        return call_with_rate_limit(
+            self.langchain_llm.model_name,
+            partial(super().generate_text, prompt, *args, **kwargs),
+            tokens=estimate_tokens(prompt.to_string()),
+        )
+
+    async def agenerate_text(self, prompt: PromptValue, *args, **kwargs) -> LLMResult:
+        return await a_call_with_rate_limit(
+            self.langchain_llm.model_name,
+            partial(super().agenerate_text, prompt, *args, **kwargs),
+            tokens=estimate_tokens(prompt.to_string()),
+        )
+
+
+def _build_llm(model_name: str) -> LangchainLLMWrapper:
+    open_ai_model = ChatOpenAI(
+        model=model_name,
+        http_client=get_http_client(),
+        http_async_client=get_async_http_client(),
+    )
+    return _RateLimitedLLM(langchain_llm=open_ai_model)
+
+
+# The wrapped ChatOpenAI holds an async client, so it's built once per event loop.
+register_judge_provider("ragas", _build_llm, per_event_loop=True)
+
+
+def _usage_handler() -> CostCallbackHandler:
+    """
+    A callback collecting the token usage of the judge calls it's passed to.
+    """
+    return CostCallbackHandler(token_usage_parser=get_token_usage_for_openai)
+
+
+def _record_usage(handler: CostCallbackHandler) -> None:
+    if len(handler.usage_data) > 0:
+        record_usage(
+            prompt_tokens=sum(usage.input_tokens for usage in handler.usage_data),
+            completion_tokens=sum(usage.output_tokens for usage in handler.usage_data),
+        )
 
 
 class RagasFaithfulnessExperiment(MetricExperimentBase):
     METRIC_NAME = "ragas_faithfulness"
+    JUDGE_MODEL = MODEL_NAME
+    # Every sample in the manifest is scored as one Ragas dataset with MAX_WORKERS in
+    # flight. Set to None to score each analysis sample by sample with a_run_eval instead.
+    BATCH_SCOPE = BATCH_MANIFEST
+
+    @staticmethod
+    def _get_samples(analysis: Analysis, notice_text: str) -> List[tuple]:
+        contexts = analysis_contexts(analysis, notice_text)
+        samples = [
+            (
+                "summary",
+                SingleTurnSample(
+                    user_input="Write a 2-3 sentence summary of the notice.",
+                    response=analysis.summary,
+                    retrieved_contexts=contexts[0],
+                ),
+            )
+        ]
+        for q, context in zip(analysis.questions, contexts[1:]):
+            samples.append(
+                (
+                    q.question,
+                    SingleTurnSample(
+                        user_input=q.question,
+                        response=q.answer,
+                        retrieved_contexts=context,
+                    ),
+                )
+            )
+        return samples
 
     @staticmethod
     def run_eval(
@@ -26,39 +133,123 @@ class RagasFaithfulnessExperiment(MetricExperimentBase):
         Run RAGAS faithfulness evaluation on a given scenario.
         """
         results = []
-        logger.info(f"Ragas Faithfulness: evaluating summary")
-        sample = SingleTurnSample(
-            user_input="Write a 2-3 sentence summary of the notice.",
-            response=analysis.summary,
-            retrieved_contexts=[notice_text],
-        )
-        scorer = Faithfulness(llm=ragas_llm)
-        score = scorer.single_turn_score(sample)
-        results.append(
-            EvaluationResult(
-                metric_name=RagasFaithfulnessExperiment.METRIC_NAME,
-                score=score,
-                llm_model_name=MODEL_NAME,
-                related_analysis="summary",
-            )
-        )
-        for i, q in enumerate(analysis.questions):
+        samples = RagasFaithfulnessExperiment._get_samples(analysis, notice_text)
+        scorer = Faithfulness(llm=get_judge("ragas", MODEL_NAME))
+        for i, (related_analysis, sample) in enumerate(samples):
             logger.info(
-                f"Ragas Faithfulness: evaluating question {i + 1} of {len(analysis.questions)}"
+                f"Ragas Faithfulness: evaluating part {i + 1} of {len(samples)}"
             )
-            sample = SingleTurnSample(
-                user_input=q.question,
-                response=q.answer,
-                retrieved_contexts=[notice_text],
-            )
-            scorer = Faithfulness(llm=ragas_llm)
-            score = scorer.single_turn_score(sample)
+            with measure() as measurement:
+                usage = _usage_handler()
+                score = scorer.single_turn_score(sample, callbacks=[usage])
+                _record_usage(usage)
             results.append(
+                measurement.apply(
+                    EvaluationResult(
+                        metric_name=RagasFaithfulnessExperiment.METRIC_NAME,
+                        score=score,
+                        llm_model_name=MODEL_NAME,
+                        related_analysis=related_analysis,
+                    )
+                )
+            )
+        return results
+
+    @staticmethod
+    async def _a_score(
+        scorer: Faithfulness, sample: SingleTurnSample
+    ) -> Tuple[float, Measurement]:
+        with measure() as measurement:
+            usage = _usage_handler()
+            score = await scorer.single_turn_ascore(sample, callbacks=[usage])
+            _record_usage(usage)
+        return score, measurement
+
+    @staticmethod
+    async def a_run_eval(
+        analysis: Analysis, notice_text: str, notice_path: str
+    ) -> EvaluationResult | List[EvaluationResult]:
+        """
+        Run RAGAS faithfulness evaluation on a given scenario, scoring all parts at once.
+        """
+        samples = RagasFaithfulnessExperiment._get_samples(analysis, notice_text)
+        scorer = Faithfulness(llm=get_judge("ragas", MODEL_NAME))
+        logger.info(f"Ragas Faithfulness: evaluating {len(samples)} parts concurrently")
+        scores = await asyncio.gather(
+            *(
+                RagasFaithfulnessExperiment._a_score(scorer, sample)
+                for _, sample in samples
+            )
+        )
+        return [
+            measurement.apply(
                 EvaluationResult(
                     metric_name=RagasFaithfulnessExperiment.METRIC_NAME,
                     score=score,
                     llm_model_name=MODEL_NAME,
-                    related_analysis=q.question,
+                    related_analysis=related_analysis,
                 )
             )
-        return results
+            for (score, measurement), (related_analysis, _) in zip(scores, samples)
+        ]
+
+    @classmethod
+    def run_eval_batch(
+        cls, items: List[EvaluationItem]
+    ) -> List[List[EvaluationResult]]:
+        """
+        Run RAGAS faithfulness evaluation on every analysis as a single dataset.
+
+        The dataset is scored on its own event loop, which the judge is built on and closed with.
+        """
+        return asyncio.run(cls._a_run_eval_batch(items))
+
+    @classmethod
+    async def _a_run_eval_batch(
+        cls, items: List[EvaluationItem]
+    ) -> List[List[EvaluationResult]]:
+        item_samples = [
+            cls._get_samples(item.analysis, item.notice_text) for item in items
+        ]
+        samples = [sample for parts in item_samples for _, sample in parts]
+        logger.info(
+            f"Ragas Faithfulness: evaluating {len(samples)} parts of {len(items)} analyses with {MAX_WORKERS} workers"
+        )
+        usage = _usage_handler()
+        try:
+            scorer = Faithfulness(llm=get_judge("ragas", MODEL_NAME))
+            evaluation = await aevaluate(
+                EvaluationDataset(samples=samples),
+                metrics=[scorer],
+                run_config=RunConfig(max_workers=MAX_WORKERS),
+                show_progress=False,
+                callbacks=[usage],
+            )
+        finally:
+            await close_loop_clients()
+        # The runner shares the batch's usage across its results.
+        _record_usage(usage)
+        scores = iter(evaluation.scores)
+        batch_results = []
+        for item, parts in zip(items, item_samples):
+            results = []
+            complete = True
+            for related_analysis, _ in parts:
+                score = next(scores)[scorer.name]
+                # Ragas scores samples whose judge calls failed as NaN instead of raising.
+                if score is None or math.isnan(score):
+                    logger.warning(
+                        f"Ragas Faithfulness: no score for {related_analysis!r} of {item.notice_path}, skipping"
+                    )
+                    complete = False
+                    continue
+                results.append(
+                    EvaluationResult(
+                        metric_name=cls.METRIC_NAME,
+                        score=score,
+                        llm_model_name=MODEL_NAME,
+                        related_analysis=related_analysis,
+                    )
+                )
+            batch_results.append(results if complete else IncompleteResults(results))
+        return batch_results
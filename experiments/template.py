@@ -11,6 +11,23 @@ They are called automatically through the main.py script.
 
 The run_eval method is passed an analysis instance with summary and assessment questions.
 The original document text and path are provided in case you need them.
+
+If your framework's judge has an async client, also override the a_run_eval coroutine with the
+same signature, so judge calls can overlap on one event loop. By default it runs run_eval on a
+worker thread.
+
+To score several analyses in a single pass, for example to send a notice to the judge once for
+all of its analyses, set BATCH_SCOPE to BATCH_DOCUMENT or BATCH_MANIFEST and override the
+run_eval_batch classmethod. It receives a list of EvaluationItems and returns results per item.
+
+Local metrics that don't call a judge, such as ROUGE or readability scores, should set CPU_BOUND
+to True so they're scored in worker processes instead of competing for one core.
+
+Experimental metrics whose scores aren't comparable with the rest of the suite can set
+DEFAULT_SUITE to False, so they only run when named with --metrics.
+
+LLM-judged metrics whose scores vary from call to call can set SAMPLEABLE to True. Runs with
+--samples then score each analysis several times and record the mean and variance.
 """
 
 
@@ -1,12 +1,29 @@
 import argparse
+import sys
+from typing import Iterable, Iterator
 
 import ollama
 from dotenv import load_dotenv
 
-from eval_eval.analysis import generate_analysis_from_manifest
-from eval_eval.evaluation import run_experiments_from_manifest
+from eval_eval.analysis import DEFAULT_CONCURRENCY as DEFAULT_ANALYSIS_CONCURRENCY
+from eval_eval.analysis import analyze_documents, generate_analysis_from_manifest
+from eval_eval.cache import DEFAULT_CACHE_PATH, ResultCache
+from eval_eval.checkpoint import Checkpoint
+from eval_eval.evaluation import (
+    DEFAULT_CONCURRENCY,
+    evaluate_documents,
+    run_experiments_from_manifest,
+)
+from eval_eval.instrumentation import RunSummary
 from eval_eval.logger import logger
-from eval_eval.utility import hydrate_document_manifest
+from eval_eval.sampling import DEFAULT_SAMPLE_TOLERANCE
+from eval_eval.schema import Document, Manifest
+from eval_eval.utility import (
+    hydrate_document_manifest,
+    is_jsonl_manifest,
+    iter_document_manifest,
+    write_documents,
+)
 
 """
 Main entrypoint script for interacting with the repo.
@@ -34,30 +51,213 @@ def handle_process(args: argparse.Namespace) -> None:
       Args provided from the CLI.
     """
     logger.info(f"Processing manifest: {args.manifest_path}")
-    hydrated_manifest = hydrate_document_manifest(args.manifest_path)
-    logger.info("Successfully hydrated manifest")
     if args.cmd == CMD_ANALYZE:
         assert_ollama_models_installed()
         if args.metrics is not None:
             raise ValueError(
                 "The --metrics option cannot be used with the analyze command."
             )
-        generate_analysis_from_manifest(hydrated_manifest, SUPPORTED_OLLAMA_MODELS)
+    if is_jsonl_manifest(args.manifest_path):
+        handle_stream(args)
+        return
+    hydrated_manifest = hydrate_document_manifest(args.manifest_path)
+    logger.info("Successfully hydrated manifest")
+    if args.cmd == CMD_ANALYZE:
+        generate_analysis_from_manifest(
+            hydrated_manifest,
+            SUPPORTED_OLLAMA_MODELS,
+            args.concurrency or DEFAULT_ANALYSIS_CONCURRENCY,
+            args.reuse_prefix,
+            args.stream_analysis,
+            args.dedupe,
+            args.near_duplicates,
+        )
         if args.output_path is not None:
             with open(args.output_path, "w", encoding="utf-8") as f:
                 f.write(hydrated_manifest.model_dump_json())
         else:
             print(hydrated_manifest.model_dump_json())
     if args.cmd == CMD_EVALUATE:
-        metrics = []
-        if args.metrics is not None:
-            metrics = args.metrics.split(",")
-        run_experiments_from_manifest(hydrated_manifest, metrics)
+        cache, checkpoint = get_evaluation_stores(args)
+        if args.resume and checkpoint is not None:
+            checkpoint.restore(hydrated_manifest)
+        summary = RunSummary()
+        for document in hydrated_manifest.documents:
+            summary.exclude(document)
+        try:
+            run_experiments_from_manifest(
+                hydrated_manifest,
+                get_metrics(args),
+                concurrency=args.concurrency or DEFAULT_CONCURRENCY,
+                processes=args.processes,
+                preprocess=args.preprocess,
+                context_chunks=args.context_chunks,
+                samples=args.samples,
+                sample_tolerance=args.sample_tolerance,
+                dedupe=args.dedupe,
+                near_duplicates=args.near_duplicates,
+                cache=cache,
+                refresh_cache=args.refresh_cache,
+                checkpoint=checkpoint,
+                resume=args.resume,
+            )
+        finally:
+            if cache is not None:
+                cache.close()
+            if checkpoint is not None:
+                checkpoint.close()
+        for document in hydrated_manifest.documents:
+            summary.add(document)
+        summary.log()
+        results_writer = get_results_writer(args)
+        if results_writer is not None:
+            for document in hydrated_manifest.documents:
+                results_writer.add(document)
+            results_writer.close()
         if args.output_path is not None:
             with open(args.output_path, "w", encoding="utf-8") as f:
                 f.write(hydrated_manifest.model_dump_json())
         else:
             print(hydrated_manifest.model_dump_json())
+        # Everything in the checkpoint is now in the output.
+        if checkpoint is not None:
+            checkpoint.remove()
+
+
+def handle_stream(args: argparse.Namespace) -> None:
+    """
+    Runs either command over a JSONL manifest one document at a time.
+
+    Documents are read, processed and written to a JSONL output before the next one is
+    read, so memory stays bounded by a single document.
+
+    Parameters
+    ----------
+    args: argparse.Namespace
+      Args provided from the CLI.
+    """
+    documents = iter_document_manifest(args.manifest_path)
+    cache, checkpoint, summary, results_writer = None, None, None, None
+    if args.cmd == CMD_ANALYZE:
+        processed = analyze_documents(
+            documents,
+            SUPPORTED_OLLAMA_MODELS,
+            args.concurrency or DEFAULT_ANALYSIS_CONCURRENCY,
+            args.reuse_prefix,
+            args.stream_analysis,
+            args.dedupe,
+            args.near_duplicates,
+        )
+    else:
+        cache, checkpoint = get_evaluation_stores(args)
+        if args.resume and checkpoint is not None:
+            documents = restore_documents(documents, checkpoint)
+        summary = RunSummary()
+        documents = observe_documents(documents, [summary.exclude])
+        processed = evaluate_documents(
+            documents,
+            get_metrics(args),
+            concurrency=args.concurrency or DEFAULT_CONCURRENCY,
+            processes=args.processes,
+            preprocess=args.preprocess,
+            context_chunks=args.context_chunks,
+            samples=args.samples,
+            sample_tolerance=args.sample_tolerance,
+            dedupe=args.dedupe,
+            near_duplicates=args.near_duplicates,
+            cache=cache,
+            refresh_cache=args.refresh_cache,
+            checkpoint=checkpoint,
+            resume=args.resume,
+        )
+        results_writer = get_results_writer(args)
+        observers = [summary.add]
+        if results_writer is not None:
+            observers.append(results_writer.add)
+        processed = observe_documents(processed, observers)
+    try:
+        if args.output_path is not None:
+            with open(args.output_path, "w", encoding="utf-8") as f:
+                count = write_documents(processed, f)
+        else:
+            count = write_documents(processed, sys.stdout)
+    finally:
+        if cache is not None:
+            cache.close()
+        if checkpoint is not None:
+            checkpoint.close()
+        if results_writer is not None:
+            results_writer.close()
+    logger.info(f"Processed {count} documents")
+    if summary is not None:
+        summary.log()
+    if checkpoint is not None:
+        checkpoint.remove()
+
+
+def restore_documents(
+    documents: Iterable[Document], checkpoint: Checkpoint
+) -> Iterator[Document]:
+    for document in documents:
+        checkpoint.restore(Manifest(documents=[document]))
+        yield document
+
+
+def observe_documents(
+    documents: Iterable[Document], observers: list
+) -> Iterator[Document]:
+    """
+    Passes each document to the observers as it streams through.
+    """
+    for document in documents:
+        for observer in observers:
+            observer(document)
+        yield document
+
+
+def get_metrics(args: argparse.Namespace) -> list:
+    metrics = []
+    if args.metrics is not None:
+        metrics = args.metrics.split(",")
+    return metrics
+
+
+def get_evaluation_stores(
+    args: argparse.Namespace,
+) -> tuple[ResultCache | None, Checkpoint | None]:
+    """
+    Opens the result cache and checkpoint requested for an evaluate run.
+    """
+    cache = None
+    if not args.no_cache:
+        cache = ResultCache(args.cache_path)
+    return cache, get_checkpoint(args)
+
+
+def get_checkpoint(args: argparse.Namespace) -> Checkpoint | None:
+    """
+    Gets the checkpoint for an evaluate run.
+
+    Defaults to a file next to the output path, so checkpointing is only skipped when
+    the output is printed and no checkpoint path is given.
+    """
+    if args.checkpoint_path is not None:
+        return Checkpoint(args.checkpoint_path)
+    if args.output_path is not None:
+        return Checkpoint(f"{args.output_path}.checkpoint.jsonl")
+    return None
+
+
+def get_results_writer(args: argparse.Namespace):
+    """
+    Gets the columnar results writer for an evaluate run, if one was asked for.
+    """
+    if args.results_path is None:
+        return None
+    # Imported here so runs without --results_path don't pay to import pyarrow.
+    from eval_eval.results_store import ResultsWriter
+
+    return ResultsWriter(args.results_path)
 
 
 def assert_ollama_models_installed():
@@ -91,7 +291,9 @@ def get_args() -> argparse.Namespace:
         help=f"Runs a {CMD_ANALYZE} or {CMD_EVALUATE} command that manipulates a manifest json file.",
     )
     parser.add_argument(
-        "manifest_path", type=str, help="Manifest JSON file to run command with"
+        "manifest_path",
+        type=str,
+        help="Manifest JSON file to run command with. A .jsonl manifest with one document per line is processed as a stream.",
     )
     parser.add_argument(
         "--output_path", type=str, help="Where to put the output of the command"
@@ -101,6 +303,89 @@ def get_args() -> argparse.Namespace:
         type=str,
         help="A comma separated list of metric names to run.",
     )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        help=f"The maximum number of evaluations to run at once (default {DEFAULT_CONCURRENCY}), or of analysis requests in flight per model (default {DEFAULT_ANALYSIS_CONCURRENCY}).",
+    )
+    parser.add_argument(
+        "--reuse_prefix",
+        action="store_true",
+        help="Send each document's analysis prompts in turn so Ollama reuses the encoded notice they share.",
+    )
+    parser.add_argument(
+        "--stream_analysis",
+        action="store_true",
+        help="Stream analysis responses, validating them as they're generated and retrying any that break the schema or run on.",
+    )
+    parser.add_argument(
+        "--dedupe",
+        action="store_true",
+        help="Analyze and evaluate each unique notice once, copying the results to documents with the same notice.",
+    )
+    parser.add_argument(
+        "--near_duplicates",
+        action="store_true",
+        help="With --dedupe, also treat notices that differ only slightly, such as in names and dates, as the same.",
+    )
+    parser.add_argument(
+        "--processes",
+        type=int,
+        help="The number of worker processes for CPU-bound experiments (default: the CPU count).",
+    )
+    parser.add_argument(
+        "--preprocess",
+        action="store_true",
+        help="Normalize whitespace and strip boilerplate from notices before judging.",
+    )
+    parser.add_argument(
+        "--context_chunks",
+        type=int,
+        help="Judge each answer against this many notice chunks most relevant to its question instead of the whole notice.",
+    )
+    parser.add_argument(
+        "--samples",
+        type=int,
+        help="Score each analysis up to this many times with sampleable LLM-judged experiments, recording the mean.",
+    )
+    parser.add_argument(
+        "--sample_tolerance",
+        type=float,
+        help=f"Stop sampling once every score's 95%% confidence interval half width is at most this (default {DEFAULT_SAMPLE_TOLERANCE}).",
+    )
+    parser.add_argument(
+        "--results_path",
+        type=str,
+        help="Also write evaluation results to this Parquet file, for fast aggregation with process_results.py.",
+    )
+    parser.add_argument(
+        "--no_cache",
+        "--no-cache",
+        action="store_true",
+        help="Don't read or write cached evaluation results.",
+    )
+    parser.add_argument(
+        "--refresh_cache",
+        "--refresh-cache",
+        action="store_true",
+        help="Recompute every evaluation and overwrite its cached results.",
+    )
+    parser.add_argument(
+        "--cache_path",
+        type=str,
+        default=DEFAULT_CACHE_PATH,
+        help="The SQLite file used to cache evaluation results.",
+    )
+    parser.add_argument(
+        "--checkpoint_path",
+        type=str,
+        help="Where to record evaluations as they complete. Defaults to <output_path>.checkpoint.jsonl.",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Restore evaluations from the checkpoint and skip metrics each analysis already has results for.",
+    )
     return parser.parse_args()
 
 
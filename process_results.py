@@ -1,9 +1,11 @@
 import argparse
 import os
 import glob
+from collections import Counter
 
 import pandas as pd
 
+from eval_eval.logger import logger
 from eval_eval.schema import Manifest
 from eval_eval.utility import hydrate_document_manifest
 
@@ -12,6 +14,10 @@ METRIC_VALUE_RANGE = {
         "positive": 1,
         "negative": 0,
     },
+    "deep_eval_batch_faithfulness": {
+        "positive": 1,
+        "negative": 0,
+    },
     "deep_eval_answer_relevancy": {
         "positive": 1,
         "negative": 0,
@@ -47,9 +53,54 @@ METRIC_VALUE_RANGE = {
     "ragas_faithfulness": {
         "positive": 1,
         "negative": 0,
+    },
+    "local_readability:flesch_kincaid_grade": {
+        "positive": 0,
+        "negative": 18,
+    },
+    "local_readability:flesch_reading_ease": {
+        "positive": 100,
+        "negative": 0,
+    },
+    "local_readability:gunning_fog": {
+        "positive": 0,
+        "negative": 18,
+    },
+    "local_overlap:bigram_precision": {
+        "positive": 1,
+        "negative": 0,
+    },
+    "local_overlap:novel_token_rate": {
+        "positive": 0,
+        "negative": 1,
+    },
+    "local_date_coverage": {
+        "positive": 1,
+        "negative": 0,
     }
 }
 
+# The columns of the aggregated results, before llm_model_name is renamed to evaluation_llm.
+RESULT_COLUMNS = [
+    "document",
+    "analysis_llm",
+    "analysis_prompt",
+    "metric_name",
+    "score",
+    "reason",
+    "llm_model_name",
+    "related_analysis",
+    "duration",
+    "queue_wait",
+    "judge_calls",
+    "prompt_tokens",
+    "completion_tokens",
+    "cost",
+    "cached",
+    "positive",
+    "negative",
+]
+
 QUESTION_MAP = {
     "Required Actions": "Required Actions",
     "**Required Actions**": "Required Actions",
@@ -81,6 +132,11 @@ def get_args() -> argparse.Namespace:
         "output",
         type=str,
     )
+    parser.add_argument(
+        "--metrics",
+        type=str,
+        help="Comma separated metric names to keep. Defaults to every metric with a value range.",
+    )
     return parser.parse_args()
 
 
@@ -91,31 +147,96 @@ def get_manifests(manifest_path: str) -> list:
     return all_manifests
 
 
-def process_results(manifests: list) -> pd.DataFrame:
+def get_metrics(metrics: str | None) -> list:
+    if metrics is None:
+        return list(METRIC_VALUE_RANGE)
+    return metrics.split(",")
+
+
+def process_results(manifests: list, metrics: list | None = None) -> pd.DataFrame:
+    if metrics is None:
+        metrics = list(METRIC_VALUE_RANGE)
+    unknown = [metric for metric in metrics if metric not in METRIC_VALUE_RANGE]
+    if len(unknown) > 0:
+        logger.warning(f"Skipping metrics without a value range: {', '.join(unknown)}")
+        metrics = [metric for metric in metrics if metric in METRIC_VALUE_RANGE]
+    # Parquet results and JSON manifests can be mixed in one glob.
+    results_paths = [path for path in manifests if path.endswith(".parquet")]
+    manifest_paths = [path for path in manifests if not path.endswith(".parquet")]
+    frames = []
+    if len(results_paths) > 0:
+        frames.append(_read_results_store(results_paths, metrics))
+    if len(manifest_paths) > 0:
+        frames.append(_read_manifests(manifest_paths, metrics))
+    frames = [frame for frame in frames if not frame.empty]
+    if len(frames) == 0:
+        logger.warning("No evaluation results found")
+        return _finish(pd.DataFrame(columns=RESULT_COLUMNS))
+    return _finish(pd.concat(frames, ignore_index=True))
+
+
+def _read_manifests(paths: list, metrics: list) -> pd.DataFrame:
     rows = []
-    for manifest_path in manifests:
+    skipped = Counter()
+    for manifest_path in paths:
         manifest: Manifest = hydrate_document_manifest(manifest_path)
         for document in manifest.documents:
             for analysis in document.notice_analysis:
                 for evaluation_result in analysis.evaluation_results:
+                    if evaluation_result.metric_name not in metrics:
+                        skipped[evaluation_result.metric_name] += 1
+                        continue
                     value_range = METRIC_VALUE_RANGE[evaluation_result.metric_name]
                     rows.append({
                         "document": os.path.basename(document.path),
                         "analysis_llm": analysis.llm_model_name,
                         "analysis_prompt": analysis.prompt_name,
-                        **evaluation_result.model_dump(),
+                        **evaluation_result.model_dump(exclude={"details"}),
                         **value_range
                     })
-    df = pd.DataFrame(rows)
+    if len(skipped) > 0:
+        logger.warning(
+            "Skipped results of metrics that weren't selected: "
+            + ", ".join(f"{metric} ({count})" for metric, count in skipped.items())
+        )
+    return pd.DataFrame(rows)
+
+
+def _read_results_store(paths: list, metrics: list) -> pd.DataFrame:
+    """
+    Reads results written with main.py's --results_path, loading only the columns and
+    metrics that are aggregated.
+    """
+    import pyarrow.dataset as ds
+
+    table = ds.dataset(paths, format="parquet").to_table(
+        columns=[
+            "document_path",
+            *(
+                column
+                for column in RESULT_COLUMNS
+                if column not in ("document", "positive", "negative")
+            ),
+        ],
+        filter=ds.field("metric_name").isin(metrics),
+    )
+    df = table.to_pandas()
+    df.insert(0, "document", df.pop("document_path").map(os.path.basename))
+    value_ranges = pd.DataFrame.from_dict(METRIC_VALUE_RANGE, orient="index")
+    return df.join(value_ranges, on="metric_name")
+
+
+def _finish(df: pd.DataFrame) -> pd.DataFrame:
     df = df.rename(columns={"llm_model_name": "evaluation_llm"})
+    if df.empty:
+        return df
     df["related_analysis"] = df["related_analysis"].replace(QUESTION_MAP)
     df["related_analysis"] = df["related_analysis"].str.lower()
-    df = df.drop(columns=["details", "duration"])
     print(df["related_analysis"].value_counts(dropna=False))
     return df
 
 if __name__ == "__main__":
     provided_args = get_args()
     manifests = get_manifests(provided_args.manifests)
-    results = process_results(manifests)
+    results = process_results(manifests, get_metrics(provided_args.metrics))
     results.to_csv(provided_args.output, index=False)
@@ -0,0 +1,69 @@
+from typing import Callable, Dict, List
+
+import pytest
+
+from eval_eval.evaluation import MetricExperimentBase
+from eval_eval.schema import (
+    Analysis,
+    AnalysisQuestion,
+    Document,
+    EvaluationResult,
+    Manifest,
+)
+
+
+@pytest.fixture
+def make_analysis() -> Callable[..., Analysis]:
+    """
+    Builds an analysis with four questions, as the schema requires.
+    """
+
+    def make(summary: str = "A summary.", prompt_name: str = "prompt") -> Analysis:
+        return Analysis(
+            summary=summary,
+            questions=[
+                AnalysisQuestion(question=f"Question {i}?", answer="An answer.")
+                for i in range(4)
+            ],
+            llm_model_name="model",
+            prompt_name=prompt_name,
+        )
+
+    return make
+
+
+@pytest.fixture
+def make_manifest(make_analysis) -> Callable[[Dict[str, str]], Manifest]:
+    """
+    Builds a manifest with one analysis per document from document paths and notice texts.
+    """
+
+    def make(notices: Dict[str, str]) -> Manifest:
+        return Manifest(
+            documents=[
+                Document(path=path, text=text, notice_analysis=[make_analysis()])
+                for path, text in notices.items()
+            ]
+        )
+
+    return make
+
+
+@pytest.fixture
+def recording_experiment() -> type:
+    """
+    An experiment that records the notice path of every analysis it scores.
+
+    The class is built per test, so its calls start empty.
+    """
+
+    class RecordingExperiment(MetricExperimentBase):
+        METRIC_NAME = "recorded"
+        calls: List[str] = []
+
+        @classmethod
+        def run_eval(cls, analysis, notice_text, notice_path):
+            cls.calls.append(notice_path)
+            return EvaluationResult(metric_name=cls.METRIC_NAME, score=1.0)
+
+    return RecordingExperiment
@@ -0,0 +1,186 @@
+import pytest
+
+from eval_eval import cache as cache_module
+from eval_eval.cache import ResultCache, cache_key
+from eval_eval.checkpoint import Checkpoint
+from eval_eval.evaluation import (
+    IncompleteResults,
+    MetricExperimentBase,
+    run_experiments_from_manifest,
+)
+from eval_eval.schema import EvaluationResult
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> FakeClock:
+    clock = FakeClock()
+    monkeypatch.setattr(cache_module, "time", clock)
+    return clock
+
+
+def make_results(score: float) -> list:
+    return [EvaluationResult(metric_name="metric", score=score)]
+
+
+def test_cache_key_ignores_analysis_names_and_results(make_analysis):
+    analysis = make_analysis()
+    other = make_analysis()
+    other.llm_model_name = "other model"
+    other.prompt_name = "other prompt"
+    other.evaluation_results = make_results(1.0)
+    assert cache_key("metric", "judge", "notice", analysis) == cache_key(
+        "metric", "judge", "notice", other
+    )
+
+
+@pytest.mark.parametrize(
+    "metric_name, judge_model, notice_text, summary",
+    [
+        ("other metric", "judge", "notice", "A summary."),
+        ("metric", "other judge", "notice", "A summary."),
+        ("metric", "judge", "other notice", "A summary."),
+        ("metric", "judge", "notice", "Another summary."),
+    ],
+)
+def test_cache_key_changes_with_judge_inputs(
+    make_analysis, metric_name, judge_model, notice_text, summary
+):
+    assert cache_key("metric", "judge", "notice", make_analysis()) != cache_key(
+        metric_name, judge_model, notice_text, make_analysis(summary)
+    )
+
+
+def test_cache_key_separates_its_parts(make_analysis):
+    analysis = make_analysis()
+    assert cache_key("ab", "c", "notice", analysis) != cache_key(
+        "a", "bc", "notice", analysis
+    )
+
+
+def test_get_returns_stored_results(tmp_path, clock):
+    cache = ResultCache(str(tmp_path / "cache.sqlite"))
+    assert cache.get("key") is None
+    cache.put("key", "metric", make_results(0.5))
+    assert cache.get("key") == make_results(0.5)
+    assert (cache.hits, cache.misses) == (1, 1)
+    cache.close()
+
+
+def test_expired_entries_are_missed_and_evicted(tmp_path, clock):
+    path = str(tmp_path / "cache.sqlite")
+    cache = ResultCache(path, max_age=60)
+    cache.put("key", "metric", make_results(0.5))
+    clock.now += 61
+    assert cache.get("key") is None
+    cache.close()
+    cache = ResultCache(path, max_age=3600)
+    assert cache.get("key") is None
+    cache.close()
+
+
+def test_eviction_drops_least_recently_used(tmp_path, clock):
+    cache = ResultCache(str(tmp_path / "cache.sqlite"), max_entries=2)
+    for key in ["first", "second", "third"]:
+        cache.put(key, "metric", make_results(0.5))
+        clock.now += 1
+    cache.get("first")
+    cache.evict()
+    assert cache.get("first") is not None
+    assert cache.get("second") is None
+    assert cache.get("third") is not None
+    cache.close()
+
+
+def test_runner_reuses_cached_results(tmp_path, make_manifest, recording_experiment):
+    path = str(tmp_path / "cache.sqlite")
+    notices = {"a.pdf": "Notice a.", "b.pdf": "Notice b."}
+    for _ in range(2):
+        cache = ResultCache(path)
+        manifest = run_experiments_from_manifest(
+            make_manifest(notices),
+            [],
+            experiment_classes=[recording_experiment],
+            cache=cache,
+        )
+        cache.close()
+    assert recording_experiment.calls == ["a.pdf", "b.pdf"]
+    assert (cache.hits, cache.misses) == (2, 0)
+    assert all(
+        result.cached
+        for document in manifest.documents
+        for result in document.notice_analysis[0].evaluation_results
+    )
+
+
+def test_runner_refreshes_cached_results(tmp_path, make_manifest, recording_experiment):
+    path = str(tmp_path / "cache.sqlite")
+    for refresh_cache in [False, True]:
+        cache = ResultCache(path)
+        run_experiments_from_manifest(
+            make_manifest({"a.pdf": "Notice a."}),
+            [],
+            experiment_classes=[recording_experiment],
+            cache=cache,
+            refresh_cache=refresh_cache,
+        )
+        cache.close()
+    assert recording_experiment.calls == ["a.pdf", "a.pdf"]
+
+
+class EmptyExperiment(MetricExperimentBase):
+    METRIC_NAME = "empty"
+    calls = 0
+
+    @classmethod
+    def run_eval(cls, analysis, notice_text, notice_path):
+        cls.calls += 1
+        return []
+
+
+class PartialExperiment(MetricExperimentBase):
+    METRIC_NAME = "partial"
+    calls = 0
+
+    @classmethod
+    def run_eval(cls, analysis, notice_text, notice_path):
+        cls.calls += 1
+        return IncompleteResults(
+            [EvaluationResult(metric_name=cls.METRIC_NAME, score=1.0)]
+        )
+
+
+@pytest.mark.parametrize("experiment", [EmptyExperiment, PartialExperiment])
+def test_runner_retries_incomplete_results(
+    tmp_path, make_manifest, monkeypatch, experiment
+):
+    monkeypatch.setattr(experiment, "calls", 0)
+    cache_path = str(tmp_path / "cache.sqlite")
+    checkpoint_path = str(tmp_path / "checkpoint.jsonl")
+    for _ in range(2):
+        cache = ResultCache(cache_path)
+        checkpoint = Checkpoint(checkpoint_path)
+        manifest = make_manifest({"a.pdf": "Notice a."})
+        checkpoint.restore(manifest)
+        run_experiments_from_manifest(
+            manifest,
+            [],
+            experiment_classes=[experiment],
+            cache=cache,
+            checkpoint=checkpoint,
+            resume=True,
+        )
+        cache.close()
+        checkpoint.close()
+    assert experiment.calls == 2
+    assert cache.hits == 0
+    assert (
+        Checkpoint(checkpoint_path).restore(make_manifest({"a.pdf": "Notice a."})) == 0
+    )
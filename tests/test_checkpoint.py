@@ -0,0 +1,94 @@
+from eval_eval.checkpoint import Checkpoint, has_results
+from eval_eval.evaluation import run_experiments_from_manifest
+from eval_eval.schema import EvaluationResult
+
+NOTICES = {"a.pdf": "Notice a.", "b.pdf": "Notice b."}
+
+
+def test_has_results_matches_sub_metrics(make_analysis):
+    analysis = make_analysis()
+    analysis.evaluation_results = [
+        EvaluationResult(metric_name="local_readability:gunning_fog", score=1.0)
+    ]
+    assert has_results(analysis, "local_readability")
+    assert not has_results(analysis, "local")
+
+
+def test_restore_attaches_results_to_matching_analyses(tmp_path, make_manifest):
+    checkpoint = Checkpoint(str(tmp_path / "checkpoint.jsonl"))
+    manifest = make_manifest(NOTICES)
+    for document in manifest.documents:
+        checkpoint.append(
+            document, 0, "metric", [EvaluationResult(metric_name="metric", score=0.5)]
+        )
+    checkpoint.close()
+
+    # Analyses that no longer match the record's model and prompt are left alone.
+    manifest = make_manifest(NOTICES)
+    manifest.documents[1].notice_analysis[0].prompt_name = "other prompt"
+    assert Checkpoint(checkpoint.path).restore(manifest) == 1
+    assert manifest.documents[0].notice_analysis[0].evaluation_results == [
+        EvaluationResult(metric_name="metric", score=0.5)
+    ]
+    assert manifest.documents[1].notice_analysis[0].evaluation_results == []
+
+
+def test_restore_skips_partial_lines_and_held_metrics(tmp_path, make_manifest):
+    checkpoint = Checkpoint(str(tmp_path / "checkpoint.jsonl"))
+    manifest = make_manifest(NOTICES)
+    checkpoint.append(
+        manifest.documents[0],
+        0,
+        "metric",
+        [EvaluationResult(metric_name="metric", score=0.5)],
+    )
+    checkpoint.close()
+    with open(checkpoint.path, "a", encoding="utf-8") as f:
+        f.write('{"document": "b.pdf", "anal')
+
+    manifest = make_manifest(NOTICES)
+    held = EvaluationResult(metric_name="metric", score=1.0)
+    manifest.documents[0].notice_analysis[0].evaluation_results.append(held)
+    assert Checkpoint(checkpoint.path).restore(manifest) == 0
+    assert manifest.documents[0].notice_analysis[0].evaluation_results == [held]
+
+
+def test_resume_evaluates_only_what_the_checkpoint_lacks(
+    tmp_path, make_manifest, recording_experiment
+):
+    checkpoint_path = str(tmp_path / "checkpoint.jsonl")
+    manifest = make_manifest(NOTICES)
+    checkpoint = Checkpoint(checkpoint_path)
+    checkpoint.append(
+        manifest.documents[0],
+        0,
+        recording_experiment.METRIC_NAME,
+        [EvaluationResult(metric_name=recording_experiment.METRIC_NAME, score=1.0)],
+    )
+    checkpoint.close()
+
+    manifest = make_manifest(NOTICES)
+    checkpoint = Checkpoint(checkpoint_path)
+    checkpoint.restore(manifest)
+    run_experiments_from_manifest(
+        manifest,
+        [],
+        experiment_classes=[recording_experiment],
+        checkpoint=checkpoint,
+        resume=True,
+    )
+    checkpoint.close()
+    assert recording_experiment.calls == ["b.pdf"]
+    assert [
+        len(document.notice_analysis[0].evaluation_results)
+        for document in manifest.documents
+    ] == [1, 1]
+
+    # The resumed run appended its own unit, so a later resume has nothing left to do.
+    recording_experiment.calls.clear()
+    manifest = make_manifest(NOTICES)
+    assert Checkpoint(checkpoint_path).restore(manifest) == 2
+    run_experiments_from_manifest(
+        manifest, [], experiment_classes=[recording_experiment], resume=True
+    )
+    assert recording_experiment.calls == []
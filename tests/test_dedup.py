@@ -0,0 +1,104 @@
+from eval_eval.checkpoint import Checkpoint
+from eval_eval.dedup import NoticeIndex
+from eval_eval.evaluation import MetricExperimentBase, run_experiments_from_manifest
+from eval_eval.schema import Document, EvaluationResult, Manifest
+
+
+class FirstExperiment(MetricExperimentBase):
+    METRIC_NAME = "first"
+
+    @staticmethod
+    def run_eval(analysis, notice_text, notice_path):
+        return EvaluationResult(metric_name="first", score=1.0)
+
+
+class SecondExperiment(MetricExperimentBase):
+    METRIC_NAME = "second"
+
+    @staticmethod
+    def run_eval(analysis, notice_text, notice_path):
+        return EvaluationResult(metric_name="second", score=2.0)
+
+
+NOTICES = {
+    "a.pdf": "The same notice.",
+    "b.pdf": "The  same notice.\n",
+    "c.pdf": "Another notice.",
+}
+
+
+def metric_names(manifest: Manifest) -> list:
+    return [
+        [result.metric_name for result in analysis.evaluation_results]
+        for document in manifest.documents
+        for analysis in document.notice_analysis
+    ]
+
+
+def test_split_matches_notices_with_whitespace_normalized(make_manifest):
+    index = NoticeIndex(match_analyses=True)
+    unique, duplicates = index.split(make_manifest(NOTICES).documents)
+    assert [document.path for document in unique] == ["a.pdf", "c.pdf"]
+    assert [(entry.document.path, document.path) for entry, document in duplicates] == [
+        ("a.pdf", "b.pdf")
+    ]
+
+
+def test_documents_with_different_analyses_do_not_match(make_manifest):
+    documents = make_manifest(NOTICES).documents
+    documents[1].notice_analysis[0].summary = "A different summary."
+    unique, duplicates = NoticeIndex(match_analyses=True).split(documents)
+    assert len(unique) == 3
+    assert duplicates == []
+
+
+def test_near_duplicates_match_only_when_enabled():
+    words = " ".join(f"word{i}" for i in range(200))
+    documents = [
+        Document(path="a.pdf", text=f"Dear Alice, {words}"),
+        Document(path="b.pdf", text=f"Dear Bob, {words}"),
+    ]
+    assert len(NoticeIndex().split(documents)[1]) == 0
+    assert len(NoticeIndex(near_duplicates=True).split(documents)[1]) == 1
+
+
+def test_fan_out_copies_results_marked_cached(make_manifest):
+    manifest = run_experiments_from_manifest(
+        make_manifest(NOTICES), [], experiment_classes=[FirstExperiment], dedupe=True
+    )
+    assert metric_names(manifest) == [["first"], ["first"], ["first"]]
+    copied = manifest.documents[1].notice_analysis[0].evaluation_results[0]
+    assert copied.cached
+
+
+def test_fan_out_on_resume_copies_restored_results(tmp_path, make_manifest):
+    checkpoint_path = str(tmp_path / "results.checkpoint.jsonl")
+    checkpoint = Checkpoint(checkpoint_path)
+    run_experiments_from_manifest(
+        make_manifest(NOTICES),
+        [],
+        experiment_classes=[FirstExperiment],
+        dedupe=True,
+        checkpoint=checkpoint,
+    )
+    checkpoint.close()
+
+    # Only the representatives were evaluated, so only they are checkpointed.
+    manifest = make_manifest(NOTICES)
+    checkpoint = Checkpoint(checkpoint_path)
+    checkpoint.restore(manifest)
+    assert metric_names(manifest) == [["first"], [], ["first"]]
+    run_experiments_from_manifest(
+        manifest,
+        [],
+        experiment_classes=[FirstExperiment, SecondExperiment],
+        dedupe=True,
+        checkpoint=checkpoint,
+        resume=True,
+    )
+    checkpoint.close()
+    assert metric_names(manifest) == [
+        ["first", "second"],
+        ["first", "second"],
+        ["first", "second"],
+    ]
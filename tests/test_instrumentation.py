@@ -0,0 +1,57 @@
+import pytest
+
+from eval_eval.evaluation import (
+    BATCH_MANIFEST,
+    MetricExperimentBase,
+    run_experiments_from_manifest,
+)
+from eval_eval.instrumentation import RunSummary
+from eval_eval.schema import EvaluationResult
+
+
+class BatchExperiment(MetricExperimentBase):
+    METRIC_NAME = "batch"
+    BATCH_SCOPE = BATCH_MANIFEST
+
+    @classmethod
+    def run_eval_batch(cls, items):
+        return [
+            [
+                EvaluationResult(metric_name=cls.METRIC_NAME, score=1.0),
+                EvaluationResult(metric_name=cls.METRIC_NAME, score=0.0),
+            ]
+            for _ in items
+        ]
+
+
+def test_batch_results_share_the_queue_wait(make_manifest):
+    manifest = run_experiments_from_manifest(
+        make_manifest({"a.pdf": "Notice a.", "b.pdf": "Notice b."}),
+        [],
+        experiment_classes=[BatchExperiment],
+    )
+    results = [
+        result
+        for document in manifest.documents
+        for result in document.notice_analysis[0].evaluation_results
+    ]
+    assert len(results) == 4
+    assert len({result.queue_wait for result in results}) == 1
+    assert sum(result.judge_calls for result in results) == 0
+
+
+def test_summary_excludes_results_from_before_the_run(make_manifest):
+    document = make_manifest({"a.pdf": "Notice a."}).documents[0]
+    results = document.notice_analysis[0].evaluation_results
+    results.append(
+        EvaluationResult(metric_name="metric", score=1.0, judge_calls=5, cost=1.0)
+    )
+    summary = RunSummary()
+    summary.exclude(document)
+    results.append(
+        EvaluationResult(metric_name="metric", score=1.0, judge_calls=2, cost=0.5)
+    )
+    summary.add(document)
+    assert summary.metrics["metric"]["results"] == 1
+    assert summary.metrics["metric"]["judge_calls"] == 2
+    assert summary.metrics["metric"]["cost"] == pytest.approx(0.5)
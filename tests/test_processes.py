@@ -0,0 +1,65 @@
+from eval_eval.checkpoint import Checkpoint
+from eval_eval.evaluation import EvaluationItem, run_experiments_from_manifest
+from experiments.local_metrics_experiment import (
+    LocalDateCoverageExperiment,
+    LocalOverlapExperiment,
+    LocalReadabilityExperiment,
+)
+
+EXPERIMENTS = [
+    LocalReadabilityExperiment,
+    LocalOverlapExperiment,
+    LocalDateCoverageExperiment,
+]
+NOTICES = {
+    "a.pdf": "Your benefits are approved. Reply by March 5, 2024.",
+    "b.pdf": "Your benefits are denied. You may appeal within 10 days.",
+}
+
+
+def test_cpu_bound_experiments_run_on_worker_processes(tmp_path, make_manifest):
+    manifest = make_manifest(NOTICES)
+    for document in manifest.documents:
+        document.notice_analysis.append(
+            document.notice_analysis[0].model_copy(
+                update={"summary": "Reply by March 5.", "evaluation_results": []}
+            )
+        )
+    checkpoint = Checkpoint(str(tmp_path / "checkpoint.jsonl"))
+    run_experiments_from_manifest(
+        manifest,
+        [],
+        experiment_classes=EXPERIMENTS,
+        processes=2,
+        checkpoint=checkpoint,
+    )
+    checkpoint.close()
+    # Every unit came back complete, so every unit was checkpointed.
+    assert Checkpoint(checkpoint.path).restore(make_manifest(NOTICES)) == len(
+        EXPERIMENTS
+    ) * len(NOTICES)
+    # Results from the workers match scoring the same analyses in this process.
+    for document in manifest.documents:
+        for analysis in document.notice_analysis:
+            item = EvaluationItem(analysis, document.text, document.path)
+            expected = []
+            for experiment in EXPERIMENTS:
+                results = experiment.run_eval_batch([item])[0]
+                expected.extend(results if isinstance(results, list) else [results])
+            actual = [
+                result.model_copy(
+                    update={
+                        field: None
+                        for field in [
+                            "duration",
+                            "queue_wait",
+                            "judge_calls",
+                            "prompt_tokens",
+                            "completion_tokens",
+                            "cost",
+                        ]
+                    }
+                )
+                for result in analysis.evaluation_results
+            ]
+            assert actual == expected
@@ -0,0 +1,118 @@
+import pytest
+
+from eval_eval import rate_limit
+from eval_eval.rate_limit import (
+    RateLimiter,
+    TokenBucket,
+    call_with_rate_limit,
+    items_per_minute,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000.0
+        self.slept = []
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch) -> FakeClock:
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limit, "time", clock)
+    return clock
+
+
+def test_reservations_within_the_balance_do_not_wait(clock):
+    bucket = TokenBucket(capacity=10, refill_per_second=1)
+    assert bucket.reserve(4, 1.0) == 0.0
+    assert bucket.reserve(6, 1.0) == 0.0
+
+
+def test_overdrawn_reservations_wait_in_order(clock):
+    bucket = TokenBucket(capacity=10, refill_per_second=2)
+    assert bucket.reserve(10, 1.0) == 0.0
+    assert bucket.reserve(4, 1.0) == pytest.approx(2.0)
+    assert bucket.reserve(4, 1.0) == pytest.approx(4.0)
+
+
+def test_bucket_refills_up_to_capacity(clock):
+    bucket = TokenBucket(capacity=10, refill_per_second=1)
+    bucket.reserve(10, 1.0)
+    clock.now += 5
+    assert bucket.reserve(5, 1.0) == 0.0
+    clock.now += 60
+    assert bucket.reserve(10, 1.0) == 0.0
+    assert bucket.reserve(1, 1.0) == pytest.approx(1.0)
+
+
+def test_rate_factor_slows_refills(clock):
+    bucket = TokenBucket(capacity=10, refill_per_second=1)
+    bucket.reserve(10, 1.0)
+    assert bucket.reserve(1, 0.5) == pytest.approx(2.0)
+
+
+def test_reservations_over_capacity_wait_for_a_full_bucket(clock):
+    bucket = TokenBucket(capacity=10, refill_per_second=1)
+    assert bucket.reserve(4, 1.0) == 0.0
+    assert bucket.reserve(25, 1.0) == pytest.approx(4.0)
+    # The bucket is overdrawn by no more than its capacity.
+    clock.now += 4
+    assert bucket.reserve(10, 1.0) == pytest.approx(10.0)
+
+
+def test_limiter_waits_for_the_tighter_budget(clock):
+    limiter = RateLimiter("model", requests_per_minute=60, tokens_per_minute=600)
+    limiter.acquire(requests=1, tokens=600)
+    limiter.acquire(requests=1, tokens=60)
+    assert clock.slept == [pytest.approx(6.0)]
+
+
+def test_limiter_slows_after_rate_limits_and_recovers(clock):
+    limiter = RateLimiter("model", requests_per_minute=60, tokens_per_minute=600)
+    limiter.record_rate_limited()
+    assert limiter.rate_factor == 0.5
+    for _ in range(20):
+        limiter.record_success()
+    assert limiter.rate_factor == 1.0
+
+
+class RateLimitError(Exception):
+    status_code = 429
+
+
+def test_call_with_rate_limit_retries_rate_limited_calls(clock, monkeypatch):
+    monkeypatch.setattr(rate_limit, "_limiters", {})
+    attempts = []
+
+    def call():
+        attempts.append(clock.now)
+        if len(attempts) < 3:
+            raise RateLimitError()
+        return "scored"
+
+    assert call_with_rate_limit("test-model", call) == "scored"
+    assert len(attempts) == 3
+    assert rate_limit.get_rate_limiter("test-model").rate_factor < 1.0
+
+
+def test_call_with_rate_limit_raises_other_errors(clock, monkeypatch):
+    monkeypatch.setattr(rate_limit, "_limiters", {})
+
+    def call():
+        raise KeyError("not a rate limit")
+
+    with pytest.raises(KeyError):
+        call_with_rate_limit("test-model", call)
+
+
+def test_items_per_minute_is_limited_by_the_tighter_budget():
+    requests_per_minute, tokens_per_minute = rate_limit.RATE_LIMITS["gpt-4.1"]
+    assert items_per_minute("openai:gpt-4.1", 2, 0) == requests_per_minute / 2
+    assert items_per_minute("gpt-4.1", 2, 1_000) == tokens_per_minute / 1_000
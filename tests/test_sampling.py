@@ -0,0 +1,68 @@
+import math
+
+import pytest
+
+from eval_eval.sampling import combine_samples, confidence_half_width, is_settled
+from eval_eval.schema import EvaluationResult
+
+
+def make_sample(*scores, **fields) -> list:
+    return [
+        EvaluationResult(
+            metric_name="metric",
+            score=score,
+            reason=f"Scored {score}",
+            judge_calls=1,
+            **fields,
+        )
+        for score in scores
+    ]
+
+
+def test_confidence_half_width():
+    assert confidence_half_width([0.5]) == math.inf
+    assert confidence_half_width([0.5, 0.5, 0.5]) == 0.0
+    # t(2) * stdev / sqrt(3) for scores 0, 0.5 and 1.
+    assert confidence_half_width([0.0, 0.5, 1.0]) == pytest.approx(
+        4.303 * 0.5 / math.sqrt(3)
+    )
+
+
+def test_is_settled():
+    assert is_settled([make_sample(0.5), make_sample(0.5)], 0.05)
+    assert not is_settled([make_sample(0.0), make_sample(1.0)], 0.05)
+    assert not is_settled([make_sample(0.5)], 0.05)
+
+
+def test_combine_samples_groups_results_by_position():
+    # Both results share a metric and have no related_analysis, so only their position
+    # tells them apart.
+    samples = [make_sample(0.2, 0.8), make_sample(0.4, 0.8), make_sample(0.3, 0.8)]
+    combined = combine_samples(samples)
+    assert [result.score for result in combined] == pytest.approx([0.3, 0.8])
+    assert combined[0].reason == "Scored 0.3"
+    assert combined[0].judge_calls == 3
+    assert combined[0].details["samples"]["n"] == 3
+    assert combined[0].details["samples"]["scores"] == [0.2, 0.4, 0.3]
+    assert combined[1].details["samples"]["variance"] == 0.0
+
+
+def test_combine_samples_skips_unscored_samples():
+    samples = [
+        make_sample(0.2, math.nan),
+        make_sample(math.nan, math.nan),
+        make_sample(0.4, math.nan),
+    ]
+    combined = combine_samples(samples)
+    assert len(combined) == 1
+    assert combined[0].score == pytest.approx(0.3)
+    assert combined[0].details["samples"]["n"] == 2
+    # Every sample was paid for, scored or not.
+    assert combined[0].judge_calls == 3
+    assert is_settled([make_sample(0.5, math.nan), make_sample(0.5, math.nan)], 0.05)
+
+
+def test_combine_samples_keeps_single_samples():
+    combined = combine_samples([make_sample(0.7)])
+    assert combined[0].score == 0.7
+    assert combined[0].details["samples"]["ci_half_width"] is None
@@ -0,0 +1,86 @@
+import json
+
+import pytest
+
+from eval_eval.schema import Analysis
+from eval_eval.streaming import StreamingJSONValidator, StreamViolation
+
+SCHEMA = Analysis.model_json_schema()
+
+
+def make_response(**changes) -> dict:
+    response = {
+        "summary": "The household is approved for SNAP benefits.",
+        "questions": [
+            {"question": f"Question {i}?", "answer": 'An answer with a "quote".'}
+            for i in range(4)
+        ],
+    }
+    response.update(changes)
+    return response
+
+
+def feed(text: str, chunk_size: int = 7, **kwargs) -> StreamingJSONValidator:
+    validator = StreamingJSONValidator(SCHEMA, **kwargs)
+    for start in range(0, len(text), chunk_size):
+        validator.feed(text[start : start + chunk_size])
+    return validator
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 10_000])
+def test_valid_response_completes(chunk_size):
+    validator = feed(json.dumps(make_response(), indent=2), chunk_size)
+    assert validator.done
+
+
+def test_partial_response_is_not_done():
+    text = json.dumps(make_response())
+    assert not feed(text[: len(text) // 2]).done
+
+
+@pytest.mark.parametrize(
+    "response, message",
+    [
+        (make_response(extra="value"), "Unexpected key 'extra'"),
+        (make_response(summary=3), "Expected string for summary"),
+        (
+            make_response(questions=make_response()["questions"] * 2),
+            "questions has more than 4 items",
+        ),
+        (
+            make_response(questions=make_response()["questions"][:3]),
+            "questions has fewer than 4 items",
+        ),
+        (
+            make_response(questions=[{"question": "Question?"}] * 4),
+            "questions.0 is missing answer",
+        ),
+    ],
+)
+def test_schema_violations_are_raised(response, message):
+    with pytest.raises(StreamViolation, match=message):
+        feed(json.dumps(response))
+
+
+def test_violation_is_raised_at_the_first_bad_chunk():
+    text = json.dumps(make_response(extra="value"))
+    end_of_key = text.index('"extra"') + len('"extra"')
+    validator = StreamingJSONValidator(SCHEMA)
+    validator.feed(text[: end_of_key - 1])
+    with pytest.raises(StreamViolation):
+        validator.feed(text[end_of_key - 1 : end_of_key])
+
+
+def test_long_strings_are_cut_off():
+    with pytest.raises(StreamViolation, match="summary is longer than 20"):
+        feed(json.dumps(make_response(summary="word " * 10)), max_string_chars=20)
+
+
+def test_long_responses_are_cut_off():
+    with pytest.raises(StreamViolation, match="longer than 100 characters"):
+        feed(json.dumps(make_response()), max_response_chars=100)
+
+
+def test_text_after_the_response_is_a_violation():
+    with pytest.raises(StreamViolation, match="after the response"):
+        feed(json.dumps(make_response()) + " {")
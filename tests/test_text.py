@@ -0,0 +1,52 @@
+import pytest
+
+from eval_eval.text import extract_dates, ngrams, sentence_count, syllable_count, tokens
+
+
+@pytest.mark.parametrize(
+    "word, syllables",
+    [
+        ("cat", 1),
+        ("make", 1),
+        ("table", 2),
+        ("agree", 2),
+        ("Beautiful", 3),
+        ("1,000", 1),
+    ],
+)
+def test_syllable_count(word, syllables):
+    assert syllable_count(word) == syllables
+
+
+@pytest.mark.parametrize(
+    "text, sentences",
+    [
+        ("One. Two! Three?", 3),
+        ("Ends with text. And more", 2),
+        ("No punctuation", 1),
+        ("First paragraph\n\nSecond paragraph.", 2),
+        ("", 1),
+    ],
+)
+def test_sentence_count(text, sentences):
+    assert sentence_count(text) == sentences
+
+
+def test_tokens_and_ngrams():
+    assert tokens("Don't pay $1,000.50 now") == ["don't", "pay", "1,000.50", "now"]
+    assert ngrams(["a", "b", "c"], 2) == [("a", "b"), ("b", "c")]
+    assert ngrams(["a"], 2) == []
+
+
+def test_extract_dates_normalizes_each_format():
+    assert extract_dates("Apply by March 5, 2024.") == {"03-05"}
+    assert extract_dates("Apply by the 5th Mar. 2024.") == {"03-05"}
+    assert extract_dates("Apply by 3/5/24.") == {"03-05"}
+    assert extract_dates("Reply within ten days or within 2 Weeks.") == {
+        "within 10 day",
+        "within 2 week",
+    }
+
+
+def test_extract_dates_skips_impossible_months():
+    assert extract_dates("Case 13/05/2024 and within several days.") == set()